@@ -0,0 +1,102 @@
+"""
+Benchmark per-call latency of chat completions made through pooled client (LLMClientPool) vs creating a new client
+for every call. LLM is served by a local mock OpenAI server, so the numbers reflect only client side overhead.
+
+Usage:
+    python benchmarks/bench_llm_client.py --calls 200
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+MOCK_COMPLETION = {
+    "id": "chatcmpl-mock",
+    "object": "chat.completion",
+    "created": 0,
+    "model": "mock-model",
+    "choices": [
+        {
+            "index": 0,
+            "message": {"role": "assistant", "content": "<ANS_START>42<ANS_END>"},
+            "finish_reason": "stop",
+        }
+    ],
+    "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15},
+}
+
+
+class MockOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        body = json.dumps(MOCK_COMPLETION).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_mock_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MockOpenAIHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def time_calls(make_call, calls: int) -> float:
+    make_call()  # warm up
+    start_time = time.perf_counter()
+    for _ in range(calls):
+        make_call()
+    return (time.perf_counter() - start_time) / calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark pooled vs per-call LLM clients")
+    parser.add_argument("--calls", type=int, default=200)
+    args = parser.parse_args()
+
+    server = start_mock_server()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+    os.environ["USE_OPENAI_API_KEY"] = "True"
+    os.environ["OPENAI_API_KEY"] = "mock-key"
+    os.environ["OPENAI_MODEL_NAME"] = "mock-model"
+    os.environ["OPENAI_BASE_URL"] = base_url
+
+    from openai import OpenAI
+    from promptwizard.glue.common.llm.client_pool import LLMClientPool
+
+    messages = [{"role": "user", "content": "What is 6 x 7?"}]
+
+    def new_client_per_call():
+        client = OpenAI(api_key="mock-key", base_url=base_url)
+        client.chat.completions.create(model="mock-model", messages=messages, temperature=0.0)
+
+    def pooled_client():
+        client, model = LLMClientPool.get_client_from_env()
+        client.chat.completions.create(model=model, messages=messages, temperature=0.0)
+
+    per_call_sec = time_calls(new_client_per_call, args.calls)
+    pooled_sec = time_calls(pooled_client, args.calls)
+    LLMClientPool.close_all()
+    server.shutdown()
+
+    print(f"calls={args.calls}")
+    print(f"new client per call : {per_call_sec * 1000:.3f} ms/call")
+    print(f"pooled client       : {pooled_sec * 1000:.3f} ms/call")
+    print(f"speedup             : {per_call_sec / pooled_sec:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
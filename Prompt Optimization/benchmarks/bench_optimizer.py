@@ -0,0 +1,300 @@
+"""
+Benchmark prompt optimization end to end, against offline mock LLM (MODEL_TYPE=Mock), so it can run in CI without
+network or quota. Runs GluePromptOpt.get_best_prompt() & GluePromptOpt.evaluate() over a synthetic arithmetic task,
+whose answers the mock knows. Mock answers correctly more often when instruction asks for careful work, so optimizer
+has a signal to follow. Responses, simulated errors & latency are deterministic for a given seed.
+
+Reports wall time, LLM calls & time spent outside LLM (wall time minus time during which some LLM call was in flight)
+for each phase. With --baseline, fails (exit code 1) when a technique makes more LLM calls than in baseline, or its
+wall time grows beyond tolerance.
+
+Usage:
+    python benchmarks/bench_optimizer.py --techniques critique_n_refine beam_search --latency-ms 20
+    python benchmarks/bench_optimizer.py --save-baseline bench_baseline.json
+    python benchmarks/bench_optimizer.py --baseline bench_baseline.json --tolerance 0.25
+"""
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+from os.path import join
+from typing import Dict, List
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT_DIR)
+
+import yaml  # noqa: E402
+
+from promptwizard.glue.common.llm.llm_mgr import LLMMgr  # noqa: E402
+from promptwizard.glue.common.llm.mock_llm import MockLLM  # noqa: E402
+from promptwizard.glue.promptopt.techniques.common_logic import DatasetSpecificProcessing  # noqa: E402
+
+# Words in instruction that make simulated LLM answer more accurately
+CAREFUL_WORDS = ("step", "verify", "check", "careful", "double")
+STYLE_PHRASES = (
+    "Work step by step.",
+    "Verify each computation.",
+    "Explain your reasoning briefly.",
+    "Be careful with carries.",
+    "Answer concisely.",
+    "Restate the question first.",
+)
+
+PROMPT_CONFIG = {
+    "prompt_technique_name": "critique_n_refine",
+    "unique_model_id": "mock",
+    "mutate_refine_iterations": 2,
+    "mutation_rounds": 2,
+    "refine_task_eg_iterations": 2,
+    "refine_instruction": True,
+    "style_variation": 3,
+    "questions_batch_size": 1,
+    "min_correct_count": 2,
+    "max_eval_batches": 4,
+    "top_n": 1,
+    "seen_set_size": 25,
+    "few_shot_count": 3,
+    "generate_reasoning": True,
+    "generate_expert_identity": True,
+    "generate_intent_keywords": False,
+    "num_train_examples": 5,
+    "task_description": "You are a mathematics expert. You will be given an arithmetic question.",
+    "base_instruction": "Compute the answer.",
+    "answer_format": "Wrap only your final answer between <ANS_START> and <ANS_END>.",
+}
+
+SETUP_CONFIG = {
+    "assistant_llm": {"prompt_opt": "mock"},
+    "dir_info": {"base_dir": None, "log_dir_name": "glue_logs"},
+    "experiment_name": "bench",
+    "mode": "offline",
+    "description": None,
+}
+
+
+class ArithmeticProcessor(DatasetSpecificProcessing):
+    def dataset_to_jsonl(self, dataset_jsonl: str, **kwargs) -> None:
+        pass
+
+    def extract_final_answer(self, llm_output: str) -> str:
+        answers = re.findall(self.ANSWER_DELIMITER_PATTERN, llm_output)
+        return answers[-1].strip() if answers else llm_output.strip()
+
+
+def make_dataset(size: int, seed: int) -> List[Dict]:
+    rng = random.Random(seed)
+    dataset = []
+    for index in range(size):
+        a, b = rng.randint(10, 999), rng.randint(10, 999)
+        dataset.append(
+            {
+                DatasetSpecificProcessing.QUESTION_LITERAL: f"Q{index}: What is {a} + {b}?",
+                DatasetSpecificProcessing.ANSWER_WITH_REASON_LITERAL: f"{a} + {b} = {a + b}",
+                DatasetSpecificProcessing.FINAL_ANSWER_LITERAL: str(a + b),
+            }
+        )
+    return dataset
+
+
+def unit_hash(*parts: str) -> float:
+    return int.from_bytes(hashlib.blake2b("|".join(parts).encode(), digest_size=8).digest(), "little") / 2 ** 64
+
+
+class SimulatedTaskResponder:
+    """
+    Answers requests made by critique_n_refine, by recognizing which of its prompt templates the request uses.
+    """
+
+    QUESTION_PATTERN = re.compile(r"Q\d+: What is \d+ \+ \d+\?")
+
+    def __init__(self, dataset: List[Dict], base_accuracy: float = 0.5):
+        self.answer_key = {
+            example[DatasetSpecificProcessing.QUESTION_LITERAL]: example[DatasetSpecificProcessing.FINAL_ANSWER_LITERAL]
+            for example in dataset
+        }
+        self.base_accuracy = base_accuracy
+
+    def accuracy(self, instruction: str) -> float:
+        instruction = instruction.lower()
+        return min(0.95, self.base_accuracy + 0.08 * sum(word in instruction for word in CAREFUL_WORDS))
+
+    def answer(self, instruction: str, question: str) -> str:
+        correct_answer = self.answer_key.get(question, "0")
+        if unit_hash(instruction, question) < self.accuracy(instruction):
+            return correct_answer
+        return str(int(correct_answer) + 1)
+
+    def __call__(self, messages: List[Dict]) -> str:
+        text = messages[-1]["content"]
+        if "[Generated Prompts]:" in text:
+            instruction = text.split("[Prompt Instruction]:")[-1].split("[Generated Prompts]:")[0].strip()
+            num_variations = int(re.search(r"generate (\d+) variations", text).group(1))
+            variations = [
+                f"{instruction} {STYLE_PHRASES[int(unit_hash(instruction, str(k)) * len(STYLE_PHRASES))]}"
+                for k in range(num_variations)
+            ]
+            if "JSON object" in text:
+                return json.dumps({"prompts": variations})
+            return "\n".join(f"<START>{variation}<END>" for variation in variations)
+        if "[Refined Prompts]:" in text:
+            instruction = re.search(r'My current prompt is: "(.*?)"\n', text, re.DOTALL).group(1)
+            return f"<START>{instruction} Double-check the final sum.<END>"
+        if "Wrap each reason with <START> and <END>" in text:
+            return "<START>The prompt doesn't ask to verify the arithmetic.<END>"
+        if "[Answers]:" in text:
+            instruction = text.split("[Instruction]:")[-1].split("[Question]:")[0].strip()
+            return "\n".join(
+                f"{question} <ANS_START>{self.answer(instruction, question)}<ANS_END>"
+                for question in self.QUESTION_PATTERN.findall(text)
+            )
+        if "[New Examples]:" in text:
+            questions = list(self.answer_key)[:3]
+            return "\n".join(
+                f"<START>[Question] {question}\n[Answer] Add the numbers. "
+                f"<ANS_START>{self.answer_key[question]}<ANS_END><END>"
+                for question in questions
+            )
+        if "[Improved Reasoning Chain]:" in text:
+            return "Add the units, then the tens, then the hundreds, carrying over when a column exceeds nine."
+        if "[Agent Description]:" in text:
+            return "You are a meticulous mathematician, who checks every computation."
+        if "[Intent]:" in text:
+            return "arithmetic, accuracy, step by step"
+        if "[Answer]" in text:
+            # Evaluation prompt, that asks a single question
+            instruction = text.split("[Question]")[0]
+            questions = self.QUESTION_PATTERN.findall(text)
+            if questions:
+                return f"<ANS_START>{self.answer(instruction, questions[-1])}<ANS_END>"
+        return "Use examples that cover carries & different number of digits."
+
+
+def write_jsonl(path: str, rows: List[Dict]) -> None:
+    with open(path, "w") as file:
+        for row in rows:
+            file.write(json.dumps(row) + "\n")
+
+
+def run_technique(technique: str, args) -> Dict:
+    """
+    :return: Wall time, LLM calls & time outside LLM, of optimization & evaluation phases
+    """
+    from promptwizard.glue.promptopt.instantiate import GluePromptOpt
+
+    dataset = make_dataset(args.train_size + args.test_size, args.seed)
+    responder = SimulatedTaskResponder(dataset)
+    with tempfile.TemporaryDirectory() as work_dir:
+        train_path, test_path = join(work_dir, "train.jsonl"), join(work_dir, "test.jsonl")
+        write_jsonl(train_path, dataset[: args.train_size])
+        write_jsonl(test_path, dataset[args.train_size:])
+        prompt_config_path, setup_config_path = join(work_dir, "promptopt.yaml"), join(work_dir, "setup.yaml")
+        with open(prompt_config_path, "w") as file:
+            yaml.safe_dump(dict(PROMPT_CONFIG, prompt_technique_name=technique, max_concurrency=args.concurrency), file)
+        with open(setup_config_path, "w") as file:
+            yaml.safe_dump(dict(SETUP_CONFIG, dir_info=dict(SETUP_CONFIG["dir_info"], base_dir=work_dir)), file)
+
+        results = {}
+        mock_llm = LLMMgr.enable_mock_llm(
+            MockLLM(
+                responder,
+                latency_seconds=args.latency_ms / 1000,
+                latency_jitter_seconds=args.latency_jitter_ms / 1000,
+                error_rate=args.error_rate,
+                req_per_min=args.req_per_min,
+                seed=args.seed,
+            )
+        )
+        LLMMgr.usage_tracker.reset()
+        random.seed(args.seed)
+        # Progress bars & prints of optimizer aren't part of the report
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            for phase in ("get_best_prompt", "evaluate"):
+                stats_before = dict(mock_llm.stats)
+                start_time = time.perf_counter()
+                if phase == "get_best_prompt":
+                    glue = GluePromptOpt(prompt_config_path, setup_config_path, train_path, ArithmeticProcessor())
+                    glue.get_best_prompt(use_examples=True)
+                else:
+                    accuracy = glue.evaluate(test_path, num_workers=args.concurrency)
+                wall_sec = time.perf_counter() - start_time
+                busy_sec = mock_llm.stats["busy_seconds"] - stats_before["busy_seconds"]
+                results[phase] = {
+                    "wall_sec": round(wall_sec, 4),
+                    "llm_calls": mock_llm.stats["requests"] - stats_before["requests"],
+                    "failed_calls": (mock_llm.stats["errors"] + mock_llm.stats["throttled"])
+                    - (stats_before["errors"] + stats_before["throttled"]),
+                    "outside_llm_sec": round(wall_sec - busy_sec, 4),
+                }
+        results["evaluate"]["accuracy"] = accuracy
+    return results
+
+
+def compare_with_baseline(report: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """
+    :return: Description of each regression of `report` with respect to `baseline`
+    """
+    regressions = []
+    for technique, phases in report.items():
+        for phase, result in phases.items():
+            expected = baseline.get(technique, {}).get(phase)
+            if not expected:
+                continue
+            if result["llm_calls"] > expected["llm_calls"]:
+                regressions.append(
+                    f"{technique}/{phase}: {result['llm_calls']} LLM calls, baseline {expected['llm_calls']}"
+                )
+            if result["wall_sec"] > expected["wall_sec"] * (1 + tolerance) + 0.05:
+                regressions.append(
+                    f"{technique}/{phase}: {result['wall_sec']:.3f} sec, baseline {expected['wall_sec']:.3f} sec"
+                )
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--techniques", nargs="+", default=["critique_n_refine", "successive_halving", "beam_search"])
+    parser.add_argument("--train-size", type=int, default=40)
+    parser.add_argument("--test-size", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=4, help="max_concurrency of optimizer & evaluation workers")
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--latency-jitter-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument("--req-per-min", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", help="Report saved by an earlier run, to check for regressions against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed fractional growth of wall time")
+    parser.add_argument("--save-baseline", help="Save report to this path")
+    args = parser.parse_args()
+    os.environ.pop("GLUE_LLM_CACHE_PATH", None)
+
+    report = {technique: run_technique(technique, args) for technique in args.techniques}
+    for technique, phases in report.items():
+        for phase, result in phases.items():
+            print(
+                f"{technique:20s} {phase:16s} wall={result['wall_sec']:8.3f}s calls={result['llm_calls']:5d} "
+                f"failed={result['failed_calls']:4d} outside_llm={result['outside_llm_sec']:7.3f}s"
+                + (f" accuracy={result['accuracy']}" if "accuracy" in result else "")
+            )
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as file:
+            json.dump(report, file, indent=2)
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare_with_baseline(report, json.load(file), args.tolerance)
+        for regression in regressions:
+            print(f"FAIL: {regression}")
+        if regressions:
+            sys.exit(1)
+        print("OK")
+
+
+if __name__ == "__main__":
+    main()
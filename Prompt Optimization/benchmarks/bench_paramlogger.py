@@ -0,0 +1,74 @@
+"""
+Benchmark per-call overhead of ParamLogger decorators. Compares introspecting the decorated method on every call
+(run_method_get_io_dict, as decorators did before) with SignaturePlan computed once at decoration time, and shows
+effect of CapturePolicy on calls having large prompt strings.
+
+Usage:
+    python benchmarks/bench_paramlogger.py --calls 20000 --prompt-chars 100000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+
+def time_calls(method_obj, calls: int) -> float:
+    start_time = time.perf_counter()
+    for _ in range(calls):
+        method_obj()
+    return (time.perf_counter() - start_time) / calls
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=20000)
+    parser.add_argument("--prompt-chars", type=int, default=100000)
+    args = parser.parse_args()
+
+    from promptwizard.glue.paramlogger import ParamLogger
+    from promptwizard.glue.paramlogger.utils import (FULL_CAPTURE_POLICY, CapturePolicy, SignaturePlan,
+                                                     run_method_get_io_dict)
+
+    class Technique:
+        def chat_completion(self, user_prompt: str, system_prompt: str = "You are a helpful assistant", n: int = 1):
+            return "<ANS_START>42<ANS_END>"
+
+    technique = Technique()
+    prompt = "What is 6 x 7? " * (args.prompt_chars // 15)
+    iolog = ParamLogger()
+    decorated = iolog.append_to_chained_log(Technique.chat_completion)
+
+    def introspect_per_call():
+        run_method_get_io_dict(Technique.chat_completion, True, technique, prompt)
+
+    signature_plan = SignaturePlan(Technique.chat_completion, True)
+
+    def signature_plan_per_decoration():
+        signature_plan.run(FULL_CAPTURE_POLICY, technique, prompt)
+
+    def decorator():
+        decorated(technique, prompt)
+        iolog.clear_chained_log()
+
+    policies = {
+        "full capture": CapturePolicy(),
+        "truncate at 1000 chars": CapturePolicy(max_str_len=1000),
+        "hash above 1000 chars": CapturePolicy(hash_str_longer_than=1000),
+        "skip user_prompt": CapturePolicy(skip_args=("user_prompt",)),
+    }
+
+    print(f"calls={args.calls} prompt_chars={len(prompt)}")
+    introspect_sec = time_calls(introspect_per_call, args.calls)
+    plan_sec = time_calls(signature_plan_per_decoration, args.calls)
+    print(f"introspect per call (before) : {introspect_sec * 1e6:.2f} us/call")
+    print(f"signature plan (after)       : {plan_sec * 1e6:.2f} us/call")
+    print(f"speedup                      : {introspect_sec / plan_sec:.2f}x")
+    for policy_name, capture_policy in policies.items():
+        iolog.CAPTURE_POLICY = capture_policy
+        print(f"decorator, {policy_name:<22}: {time_calls(decorator, args.calls) * 1e6:.2f} us/call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Benchmark startup time: importing glue & constructing LLM pool with LLMMgr.get_llm_pool(), for a config having only
+chat models. Each run is done in a fresh interpreter, so that import caches of earlier runs don't hide the cost.
+Also lists which optional backends got imported, to check that embedding/ multi-modal libraries aren't loaded when
+they aren't configured.
+
+Usage:
+    python benchmarks/bench_startup.py --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+CHILD_SCRIPT = """
+import json, sys, time
+sys.path.insert(0, {root_dir!r})
+start_time = time.perf_counter()
+from promptwizard.glue.common.base_classes import LLMConfig
+from promptwizard.glue.common.llm.llm_mgr import LLMMgr
+import_sec = time.perf_counter() - start_time
+
+llm_config = LLMConfig(
+    azure_open_ai={{
+        # Dummy key, so that the pool is built without going through Azure AD, which needs azure-identity
+        "api_key": "dummy-api-key",
+        "api_version": "2024-08-01-preview",
+        "api_type": "azure",
+        "azure_endpoint": "https://localhost",
+        "azure_oai_models": [{{
+            "unique_model_id": "gpt-4o",
+            "model_type": "chat",
+            "track_tokens": False,
+            "req_per_min": 100,
+            "tokens_per_min": 100000,
+            "error_backoff_in_seconds": 1,
+            "model_name_in_azure": "gpt-4o",
+            "deployment_name_in_azure": "gpt-4o",
+        }}],
+    }},
+    user_limits=None,
+    scheduler_limits=None,
+    custom_models=None,
+)
+start_time = time.perf_counter()
+LLMMgr.get_llm_pool(llm_config)
+pool_sec = time.perf_counter() - start_time
+
+backends = ["tiktoken", "llama_index.embeddings.azure_openai", "llama_index.multi_modal_llms.azure_openai"]
+print(json.dumps({{
+    "import_sec": import_sec,
+    "pool_sec": pool_sec,
+    "backends_imported": [name for name in backends if name in sys.modules],
+}}))
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    results = []
+    for _ in range(args.runs):
+        completed = subprocess.run(
+            [sys.executable, "-c", CHILD_SCRIPT.format(root_dir=ROOT_DIR)],
+            capture_output=True,
+            text=True,
+        )
+        if completed.returncode:
+            print(completed.stderr, file=sys.stderr)
+            sys.exit(f"Benchmark run failed with exit code {completed.returncode}")
+        results.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+
+    print(f"runs={args.runs}")
+    print(f"import glue (median)     : {statistics.median(r['import_sec'] for r in results) * 1e3:.1f} ms")
+    print(f"get_llm_pool (median)    : {statistics.median(r['pool_sec'] for r in results) * 1e3:.1f} ms")
+    print(f"optional backends loaded : {results[-1]['backends_imported']}")
+
+
+if __name__ == "__main__":
+    main()
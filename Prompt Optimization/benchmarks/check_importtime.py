@@ -0,0 +1,89 @@
+"""
+Regression check for import time of glue. Imports the module in a fresh interpreter with `python -X importtime` and
+fails (exit code 1) when cumulative import time exceeds the budget, or when a heavy library that should be imported
+lazily shows up in the import graph.
+
+Usage:
+    python benchmarks/check_importtime.py --module promptwizard.glue.promptopt.instantiate --budget-ms 300
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+# Libraries that must not be imported just by importing glue. They are imported when they are first needed.
+LAZY_MODULES = (
+    "llama_index",
+    "tenacity",
+    "tqdm",
+    "yaml",
+    "openai",
+    "tiktoken",
+    "azure.identity",
+    "promptwizard.glue.promptopt.techniques.critique_n_refine.core_logic",
+)
+
+
+def import_times(module_name: str) -> dict:
+    """
+    :param module_name: Module to be imported
+    :return: Dict key=name of every module imported, value=cumulative import time in microseconds
+    """
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT_DIR, os.environ.get("PYTHONPATH")])))
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module_name}"],
+        check=True,
+        capture_output=True,
+        text=True,
+        env=env,
+    ).stderr
+
+    times = {}
+    for line in stderr.splitlines():
+        # Format: "import time: self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, imported_name = line[len("import time:"):].split("|")
+        times[imported_name.strip()] = int(cumulative_us)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--module", default="promptwizard.glue.promptopt.instantiate")
+    parser.add_argument("--budget-ms", type=float, default=300)
+    parser.add_argument("--runs", type=int, default=5, help="Best of these many runs is compared with budget")
+    args = parser.parse_args()
+
+    runs = [import_times(args.module) for _ in range(args.runs)]
+    best_ms = min(times[args.module] for times in runs) / 1e3
+    slowest = sorted(
+        ((name, cumulative_us) for name, cumulative_us in runs[-1].items() if name.count(".") <= 1),
+        key=lambda item: item[1],
+        reverse=True,
+    )[:10]
+    eager_imports = sorted(
+        {name for name in runs[-1] for lazy_name in LAZY_MODULES if name == lazy_name or name.startswith(lazy_name + ".")}
+    )
+
+    print(f"import {args.module}: {best_ms:.1f} ms (best of {args.runs}), budget {args.budget_ms:.1f} ms")
+    print("slowest top level imports (cumulative):")
+    for name, cumulative_us in slowest:
+        print(f"  {cumulative_us / 1e3:8.1f} ms  {name}")
+
+    failed = False
+    if best_ms > args.budget_ms:
+        print(f"FAIL: import time is over budget by {best_ms - args.budget_ms:.1f} ms")
+        failed = True
+    if eager_imports:
+        print(f"FAIL: modules that should be imported lazily were imported: {eager_imports}")
+        failed = True
+    if not failed:
+        print("OK")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,15 @@
 # Licensed under The MIT License [see LICENSE for details]
 
 # flake8: noqa
-from .glue.promptopt.instantiate import GluePromptOpt
 from .version import VERSION as __version__
 
-__all__ = ["GluePromptOpt"]
\ No newline at end of file
+__all__ = ["GluePromptOpt"]
+
+
+def __getattr__(name):
+    # GluePromptOpt is imported on first access, so that `import promptwizard` & its submodules start fast
+    if name == "GluePromptOpt":
+        from .glue.promptopt.instantiate import GluePromptOpt
+
+        return GluePromptOpt
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
\ No newline at end of file
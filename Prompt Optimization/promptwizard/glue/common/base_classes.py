@@ -50,6 +50,8 @@ class LLMQueueSchedulerLimits(UniversalBaseClass):
 class AzureAOIModels(LLMModel, UniversalBaseClass):
     model_name_in_azure: str
     deployment_name_in_azure: str
+    # Endpoint of this deployment, when it differs from `azure_endpoint` of AzureAOILM
+    azure_endpoint: Optional[str] = None
 
 
 @dataclass
@@ -59,6 +61,9 @@ class AzureAOILM(UniversalBaseClass):
     api_type: str
     azure_endpoint: str
     azure_oai_models: List[AzureAOIModels]
+    # Spread requests across all the chat/ completion deployments in `azure_oai_models`, instead of sending them to
+    # the deployment set in AZURE_OPENAI_DEPLOYMENT_NAME environment variable
+    load_balance_deployments: bool = False
 
     def __post_init__(self):
         azure_oai_models_obj = []
@@ -83,6 +88,10 @@ class LLMConfig(UniversalBaseClass):
 
     def __post_init__(self):
         self.azure_open_ai = AzureAOILM(**self.azure_open_ai)
+        if isinstance(self.user_limits, dict):
+            self.user_limits = UserLimits(**self.user_limits)
+        if isinstance(self.scheduler_limits, dict):
+            self.scheduler_limits = LLMQueueSchedulerLimits(**self.scheduler_limits)
         custom_model_obj = []
         if self.custom_models:
             for custom_model in self.custom_models:
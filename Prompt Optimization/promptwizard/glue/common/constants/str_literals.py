@@ -17,6 +17,13 @@ class OAILiterals:
     OPENAI_API_TYPE = "OPENAI_API_TYPE"
     OPENAI_API_VERSION = "OPENAI_API_VERSION"
     AZ_OPEN_AI_OBJECT = "AZ_OPEN_AI_OBJECT"
+    OPENAI_BASE_URL = "OPENAI_BASE_URL"
+    OPENAI_MODEL_NAME = "OPENAI_MODEL_NAME"
+    USE_OPENAI_API_KEY = "USE_OPENAI_API_KEY"
+    AZURE_OPENAI_ENDPOINT = "AZURE_OPENAI_ENDPOINT"
+    AZURE_OPENAI_API_KEY = "AZURE_OPENAI_API_KEY"
+    AZURE_OPENAI_DEPLOYMENT_NAME = "AZURE_OPENAI_DEPLOYMENT_NAME"
+    AZURE_COGNITIVE_SERVICES_SCOPE = "https://cognitiveservices.azure.com/.default"
 
 
 @dataclass
@@ -27,6 +34,37 @@ class LLMOutputTypes:
     MULTI_MODAL = "multimodal"
 
 
+@dataclass
+class GlueEnvVars:
+    # Path to SQLite file, in which LLM responses should be cached. Caching is off when not set.
+    LLM_CACHE_PATH = "GLUE_LLM_CACHE_PATH"
+    # Settings of offline mock LLM, used when MODEL_TYPE is Mock. Path to jsonl file of scripted responses, each line
+    # being {"pattern": <regex searched in last message>, "response": <text>}
+    MOCK_LLM_SCRIPT = "GLUE_MOCK_LLM_SCRIPT"
+    MOCK_LLM_LATENCY_MS = "GLUE_MOCK_LLM_LATENCY_MS"
+    MOCK_LLM_LATENCY_JITTER_MS = "GLUE_MOCK_LLM_LATENCY_JITTER_MS"
+    # Fraction of requests that fail with server error
+    MOCK_LLM_ERROR_RATE = "GLUE_MOCK_LLM_ERROR_RATE"
+    # Requests beyond this rate/ concurrency are throttled
+    MOCK_LLM_REQ_PER_MIN = "GLUE_MOCK_LLM_REQ_PER_MIN"
+    MOCK_LLM_MAX_CONCURRENCY = "GLUE_MOCK_LLM_MAX_CONCURRENCY"
+    MOCK_LLM_SEED = "GLUE_MOCK_LLM_SEED"
+    # Path to io_logs.jsonl written by ParamLogger. When set, chat completions recorded in it are answered from it.
+    REPLAY_IO_LOGS = "GLUE_REPLAY_IO_LOGS"
+
+
+@dataclass
+class LLMAuthModes:
+    API_KEY = "api_key"
+    AZURE_AD = "azure_ad"
+
+
+@dataclass
+class LLMProviders:
+    AZURE_OPENAI = "azure_openai"
+    OPENAI = "openai"
+
+
 @dataclass
 class InstallLibs:
     LLAMA_LLM_AZ_OAI = "llama-index-llms-azure-openai==0.1.5"
@@ -34,6 +72,7 @@ class InstallLibs:
     LLAMA_MM_LLM_AZ_OAI = "llama-index-multi-modal-llms-azure-openai==0.1.4"
     AZURE_CORE = "azure-core==1.30.1"
     TIKTOKEN = "tiktoken"
+    LLAMA_INDEX_CORE = "llama-index-core==0.12.28"
 
 
 @dataclass
@@ -42,4 +81,19 @@ class LLMLiterals:
     PROMPT_LLM_TOKEN_COUNT = "prompt_llm_token_count"
     COMPLETION_LLM_TOKEN_COUNT = "completion_llm_token_count"
     TOTAL_LLM_TOKEN_COUNT = "total_llm_token_count"
+    # Returned by LLMMgr.chat_completion() in place of LLM output, when call fails with an error other than
+    # GlueLLMException (e.g. timeout, connection error)
+    FAILED_RESPONSE = "Sorry, I am not able to understand your query. Please try again."
 
+
+
+@dataclass
+class LLMPhases:
+    # Phases of prompt optimization, to which token usage of LLM calls is attributed
+    MUTATION = "mutation"
+    SCORING = "scoring"
+    CRITIQUE = "critique"
+    FEW_SHOT_MINING = "few_shot_mining"
+    REASONING = "reasoning"
+    EVALUATION = "evaluation"
+    OTHER = "other"
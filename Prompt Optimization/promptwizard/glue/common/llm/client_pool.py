@@ -0,0 +1,190 @@
+import hashlib
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Tuple
+
+from ..constants.str_literals import LLMAuthModes, LLMProviders, OAILiterals
+from ..utils.logging import get_glue_logger
+
+logger = get_glue_logger(__name__)
+
+
+@dataclass(frozen=True)
+class LLMClientKey:
+    """
+    Identity of a pooled client. Two calls that resolve to the same key share the same client object, and hence the
+    same keep-alive HTTP connection pool and credentials. API version & a digest of API key are part of the key, so
+    that changing them (e.g. in a running notebook) creates a new client, instead of reusing a stale one.
+    """
+    provider: str
+    endpoint: str
+    deployment: str
+    auth_mode: str
+    api_version: str = ""
+    api_key_digest: str = ""
+
+    @staticmethod
+    def digest_api_key(api_key: str) -> str:
+        """
+        :return: Digest of API key, so that key itself isn't held in pool keys or logs. Empty if there's no key.
+        """
+        if not api_key:
+            return ""
+        return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+
+
+class CachedTokenProvider:
+    """
+    Bearer token provider for Azure AD auth. Token is fetched once from the credential & reused until it is about to
+    expire, instead of going back to the credential (e.g. `az` CLI) for every request.
+    """
+
+    def __init__(self, credential, scope: str, refresh_margin_in_seconds: int = 300):
+        """
+        :param credential: Object of azure.identity credential class, having get_token() method
+        :param scope: Scope for which token should be requested
+        :param refresh_margin_in_seconds: Refresh token when it's going to expire in less than these many seconds
+        """
+        self._credential = credential
+        self._scope = scope
+        self._refresh_margin_in_seconds = refresh_margin_in_seconds
+        self._access_token = None
+        self._lock = threading.Lock()
+
+    def __call__(self) -> str:
+        with self._lock:
+            if (
+                self._access_token is None
+                or self._access_token.expires_on - self._refresh_margin_in_seconds <= time.time()
+            ):
+                self._access_token = self._credential.get_token(self._scope)
+            return self._access_token.token
+
+
+class LLMClientPool:
+    """
+    Process-wide registry of OpenAI/ Azure OpenAI clients. All the clients share a single keep-alive HTTP connection
+    pool, so that TLS handshake & connection setup is paid only once per endpoint and not once per LLM call.
+    Retries are disabled in clients, as they are done by LLMRequestScheduler.
+    """
+
+    _clients: Dict[LLMClientKey, Any] = {}
+    _token_providers: Dict[str, CachedTokenProvider] = {}
+    _http_client = None
+    _lock = threading.RLock()
+
+    @classmethod
+    def get_http_client(cls):
+        """
+        :return: Object of httpx.Client that is shared by all the clients in pool
+        """
+        with cls._lock:
+            if cls._http_client is None:
+                from openai import DefaultHttpxClient
+
+                cls._http_client = DefaultHttpxClient()
+            return cls._http_client
+
+    @classmethod
+    def get_token_provider(cls, scope: str = OAILiterals.AZURE_COGNITIVE_SERVICES_SCOPE) -> CachedTokenProvider:
+        """
+        :param scope: Scope for which bearer token is needed
+        :return: Token provider that caches the token till it expires. One provider is created per scope.
+        """
+        with cls._lock:
+            if scope not in cls._token_providers:
+                from azure.identity import AzureCliCredential
+
+                cls._token_providers[scope] = CachedTokenProvider(AzureCliCredential(), scope)
+            return cls._token_providers[scope]
+
+    @classmethod
+    def get_client(cls, client_key: LLMClientKey, api_key: str = None, api_version: str = None):
+        """
+        Return client for the given key. Create it if this is the first call for the key.
+
+        :param client_key: Object of LLMClientKey, identifying endpoint, deployment & auth mode
+        :param api_key: API key, needed when auth_mode is LLMAuthModes.API_KEY
+        :param api_version: API version, needed for Azure OpenAI
+        :return: Object of openai.OpenAI or openai.AzureOpenAI class
+        """
+        client = cls._clients.get(client_key)
+        if client is not None:
+            return client
+
+        with cls._lock:
+            client = cls._clients.get(client_key)
+            if client is not None:
+                return client
+
+            if client_key.provider == LLMProviders.OPENAI:
+                from openai import OpenAI
+
+                client = OpenAI(
+                    api_key=api_key,
+                    base_url=client_key.endpoint or None,
+                    http_client=cls.get_http_client(),
+                    max_retries=0,
+                )
+            else:
+                from openai import AzureOpenAI
+
+                auth_kwargs = {"api_key": api_key}
+                if client_key.auth_mode == LLMAuthModes.AZURE_AD:
+                    auth_kwargs = {"azure_ad_token_provider": cls.get_token_provider()}
+                client = AzureOpenAI(
+                    api_version=api_version,
+                    azure_endpoint=client_key.endpoint,
+                    http_client=cls.get_http_client(),
+                    max_retries=0,
+                    **auth_kwargs,
+                )
+            logger.info(f"Created LLM client for {client_key}")
+            cls._clients[client_key] = client
+            return client
+
+    @classmethod
+    def get_client_from_env(cls) -> Tuple[Any, str]:
+        """
+        Resolve endpoint, deployment & auth mode from environment variables and return the pooled client for it.
+
+        :return: (client, model) client-> pooled client object
+                                 model-> Name of model/ deployment to be passed in chat completion request
+        """
+        if os.environ.get(OAILiterals.USE_OPENAI_API_KEY) == "True":
+            api_key = os.environ[OAILiterals.OPENAI_API_KEY]
+            client_key = LLMClientKey(
+                provider=LLMProviders.OPENAI,
+                endpoint=os.environ.get(OAILiterals.OPENAI_BASE_URL, ""),
+                deployment=os.environ[OAILiterals.OPENAI_MODEL_NAME],
+                auth_mode=LLMAuthModes.API_KEY,
+                api_key_digest=LLMClientKey.digest_api_key(api_key),
+            )
+            client = cls.get_client(client_key, api_key=api_key)
+        else:
+            api_key = os.environ.get(OAILiterals.AZURE_OPENAI_API_KEY)
+            api_version = os.environ[OAILiterals.OPENAI_API_VERSION]
+            client_key = LLMClientKey(
+                provider=LLMProviders.AZURE_OPENAI,
+                endpoint=os.environ[OAILiterals.AZURE_OPENAI_ENDPOINT],
+                deployment=os.environ[OAILiterals.AZURE_OPENAI_DEPLOYMENT_NAME],
+                auth_mode=LLMAuthModes.API_KEY if api_key else LLMAuthModes.AZURE_AD,
+                api_version=api_version,
+                api_key_digest=LLMClientKey.digest_api_key(api_key),
+            )
+            client = cls.get_client(client_key, api_key=api_key, api_version=api_version)
+        return client, client_key.deployment
+
+    @classmethod
+    def close_all(cls) -> None:
+        """
+        Close shared HTTP connection pool and forget all the clients & cached credentials.
+        """
+        with cls._lock:
+            if cls._http_client is not None:
+                cls._http_client.close()
+            cls._http_client = None
+            cls._clients = {}
+            cls._token_providers = {}
@@ -1,9 +1,13 @@
-from llama_index.core.llms import LLM
-from llama_index.core.callbacks.token_counting import TokenCountingHandler
-from llama_index.core.callbacks.base_handler import BaseCallbackHandler
+from typing import TYPE_CHECKING
 
+if TYPE_CHECKING:
+    # Handlers are matched by class name, so llama_index needn't be imported at runtime
+    from llama_index.core.llms import LLM
+    from llama_index.core.callbacks.token_counting import TokenCountingHandler
+    from llama_index.core.callbacks.base_handler import BaseCallbackHandler
 
-def get_token_counter(llm_handle: LLM) -> TokenCountingHandler:
+
+def get_token_counter(llm_handle: "LLM") -> "TokenCountingHandler":
     """
     Extract TokenCountingHandler handler from llm_handle.
 
@@ -13,7 +17,7 @@ def get_token_counter(llm_handle: LLM) -> TokenCountingHandler:
     return get_callback_handler(llm_handle, "TokenCountingHandler")
 
 
-def get_callback_handler(llm_handle: LLM, class_name: str) -> BaseCallbackHandler:
+def get_callback_handler(llm_handle: "LLM", class_name: str) -> "BaseCallbackHandler":
     """
     Extract callback_manager from llm_handle, find out which call back manager is of class type `class_name`.
     Return that object.
@@ -1,78 +1,377 @@
-from typing import Dict
-from llama_index.core.callbacks import CallbackManager, TokenCountingHandler
-from llama_index.core.llms import ChatMessage
-from llama_index.core.llms import LLM
-from tenacity import retry, stop_after_attempt, wait_fixed, wait_random
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
 from ..base_classes import LLMConfig
 from ..constants.str_literals import (
+    GlueEnvVars,
     InstallLibs,
     OAILiterals,
     OAILiterals,
     LLMLiterals,
     LLMOutputTypes,
 )
+from .client_pool import LLMClientPool
 from .llm_helper import get_token_counter
+from .mock_llm import MockLLM
+from .providers import LLMProviderRegistry, import_optional
+from .response_cache import ResponseCache
+from .router import DeploymentRouter, RoutedDeployment
+from .scheduler import LLMRequestScheduler, estimate_tokens
+from .streaming import AnswerStreamParser, EstimatedUsage, StreamedCompletion
+from .usage_tracker import LLMUsageTracker
 from ..exceptions import GlueLLMException
-from ..utils.runtime_tasks import install_lib_if_missing
 from ..utils.logging import get_glue_logger
 from ..utils.runtime_tasks import str_to_class
 import os
+import threading
+import time
+
+if TYPE_CHECKING:
+    # llama_index is imported at runtime only when token tracking is enabled for a model
+    from llama_index.core.llms import LLM
+    from ...paramlogger.replay import IOLogReplay
 
 logger = get_glue_logger(__name__)
 
 
-def call_api(messages):
+def stream_completion(client, model: str, messages, expected_answers: int, **sampling_params) -> StreamedCompletion:
+    """
+    Stream chat completion & stop generation as soon as `expected_answers` answers wrapped between <ANS_START> and
+    <ANS_END> are received, so that tokens generated after the answers aren't waited for or paid for.
 
-    from openai import OpenAI
-    from azure.identity import get_bearer_token_provider, AzureCliCredential
-    from openai import AzureOpenAI
+    :param client: Object of openai.OpenAI or openai.AzureOpenAI class
+    :param model: Name of model/ deployment
+    :param messages: List of messages in OpenAI chat format
+    :param expected_answers: Number of answers LLM is expected to give
+    :return: Object of StreamedCompletion
+    """
+    answer_parser = AnswerStreamParser(expected_answers)
+    text_pieces = []
+    usage = None
+    stopped_early = False
+    stream = client.chat.completions.create(
+        model=model,
+        messages=messages,
+        stream=True,
+        stream_options={"include_usage": True},
+        **sampling_params,
+    )
+    try:
+        for chunk in stream:
+            if chunk.usage is not None:
+                usage = chunk.usage
+            if not chunk.choices or not chunk.choices[0].delta.content:
+                continue
+            text_pieces.append(chunk.choices[0].delta.content)
+            if answer_parser.feed(chunk.choices[0].delta.content):
+                stopped_early = True
+                break
+    finally:
+        # Closing the connection makes service stop generating
+        stream.close()
 
-    if os.environ["USE_OPENAI_API_KEY"] == "True":
-        client = OpenAI(api_key=os.environ["OPENAI_API_KEY"])
+    content = "".join(text_pieces)
+    if usage is None:
+        prompt_tokens, completion_tokens = estimate_tokens(messages), len(content) // 4
+        usage = EstimatedUsage(prompt_tokens, completion_tokens, prompt_tokens + completion_tokens)
+    return StreamedCompletion(content, usage, stopped_early)
 
-        response = client.chat.completions.create(
-            model=os.environ["OPENAI_MODEL_NAME"],
-            messages=messages,
-            temperature=0.0,
-        )
+
+def call_api(messages, priority: int = 0, expected_answers: int = None, client=None, cache_salt: str = None):
+    """
+    Make chat completion request using the pooled client for the endpoint/ deployment set in environment variables,
+    or for the deployment picked by LLMMgr.router when load balancing across deployments is turned on, or using
+    `client` when it is given.
+    Request is sent via LLMMgr.scheduler, which enforces rate limits of the deployment & retries on throttling.
+    Token usage & latency of the call are recorded in LLMMgr.usage_tracker.
+
+    :param messages: List of messages in OpenAI chat format
+    :param priority: Priority of request in scheduler queue. Lower value is served first.
+    :param expected_answers: If set, completion is streamed and stopped once these many answers wrapped between
+                             <ANS_START> and <ANS_END> are received.
+    :param client: Client with same interface as openai client, that has `model_name` attribute e.g. MockLLM
+    :param cache_salt: Added to key of response cache. Requests that are sent more than once on purpose, to get
+                       different responses (e.g. rounds of mutation), pass a different salt each time, so that they
+                       aren't all answered with the first response.
+    :return: Text generated by LLM
+    """
+    router = LLMMgr.router if LLMMgr.router.deployments and client is None else None
+    if router:
+        client, model = None, router.model_names
+    elif client is None:
+        client, model = LLMClientPool.get_client_from_env()
     else:
-        print("=== Using Azure OpenAI ===")
-        token_provider = get_bearer_token_provider(
-            AzureCliCredential(), "https://cognitiveservices.azure.com/.default"
+        model = client.model_name
+    sampling_params = {"temperature": 0.0}
+
+    response_cache = LLMMgr.get_response_cache()
+    if response_cache:
+        # Streamed response, that is stopped early, is cached separately from the complete response
+        cache_key_params = dict(sampling_params)
+        if expected_answers:
+            cache_key_params["expected_answers"] = expected_answers
+        if cache_salt is not None:
+            cache_key_params["salt"] = cache_salt
+        cache_key = response_cache.make_key(messages, model, **cache_key_params)
+        prediction = response_cache.get(cache_key)
+        if prediction is not None:
+            LLMMgr.usage_tracker.record(model, cache_hit=True)
+            return prediction
+
+    def send_request(client=client, model=model):
+        if expected_answers:
+            return stream_completion(client, model, messages, expected_answers, **sampling_params)
+        return client.chat.completions.create(
+            model=model,
+            messages=messages,
+            **sampling_params,
         )
-        client = AzureOpenAI(
-            api_version=os.environ["OPENAI_API_VERSION"],
-            azure_endpoint=os.environ["AZURE_OPENAI_ENDPOINT"],
-            api_key=os.environ["AZURE_OPENAI_API_KEY"],
-            # azure_ad_token_provider=token_provider,
+
+    # Deployment that served the request, when it is routed
+    served_by = []
+
+    def send_routed_request(deployment: RoutedDeployment):
+        served_by.append(deployment.key)
+        return send_request(deployment.get_client(), deployment.deployment_name)
+
+    start_time = time.perf_counter()
+    if router:
+        response = router.execute(
+            LLMMgr.scheduler, send_routed_request, estimated_tokens=estimate_tokens(messages), priority=priority
         )
-        response = client.chat.completions.create(
-            model=os.environ["AZURE_OPENAI_DEPLOYMENT_NAME"],
-            messages=messages,
-            temperature=0.0,
+    else:
+        response = LLMMgr.scheduler.execute(
+            model, send_request, estimated_tokens=estimate_tokens(messages), priority=priority
         )
+    LLMMgr.usage_tracker.record_response(
+        served_by[-1] if served_by else model, response, time.perf_counter() - start_time
+    )
 
-    prediction = response.choices[0].message.content
+    if expected_answers:
+        prediction = response.content
+    else:
+        prediction = response.choices[0].message.content
+    if response_cache:
+        response_cache.put(cache_key, prediction, model)
     return prediction
 
 
+def import_token_counting():
+    """
+    :return: llama_index's CallbackManager & TokenCountingHandler classes, imported only when tokens are tracked
+    """
+    return (
+        import_optional("llama_index.core.callbacks", "CallbackManager", InstallLibs.LLAMA_INDEX_CORE),
+        import_optional("llama_index.core.callbacks", "TokenCountingHandler", InstallLibs.LLAMA_INDEX_CORE),
+    )
+
+
 class LLMMgr:
+    # Scheduler through which all the LLM requests are sent. Replaced with the one having limits from llm config,
+    # when configure() is called.
+    scheduler = LLMRequestScheduler()
+    # Spreads requests across deployments in llm config. Has no deployments unless load balancing is turned on in
+    # llm config. Without deployments, requests go to the deployment set in environment variables.
+    router = DeploymentRouter()
+    # Cache of deterministic LLM responses. None when caching is turned off.
+    response_cache = None
+    # Guards creation of objects that are set up lazily from environment variables, when first LLM calls are made
+    # concurrently. Otherwise every thread would create its own object & tear down the ones of other threads.
+    _lazy_init_lock = threading.Lock()
+    # Token usage & latency of all the LLM calls, per phase of prompt optimization & per deployment
+    usage_tracker = LLMUsageTracker()
+    # Offline LLM used when MODEL_TYPE environment variable is Mock. Created from GLUE_MOCK_LLM_* environment
+    # variables when first needed, unless set via enable_mock_llm().
+    mock_llm = None
+    # Chat completions recorded by ParamLogger, that are answered from disk instead of LLM. None when replay is off.
+    replay_log = None
+    # Whether a request that isn't found in replay_log is an error, rather than being sent to LLM
+    replay_strict = False
+    # Config passed to configure() & pool of LLM handles built from it, when a model from pool is first needed
+    llm_config = None
+    llm_pool = None
+
+    @staticmethod
+    def configure(llm_config: LLMConfig) -> None:
+        """
+        Apply rate limits & scheduler settings defined in llm config to all subsequent LLM calls.
+
+        :param llm_config: Object having all settings & preferences for all LLMs to be used in out system
+        """
+        LLMMgr.llm_config = llm_config
+        LLMMgr.llm_pool = None
+        LLMMgr.scheduler = LLMRequestScheduler.from_llm_config(llm_config)
+        LLMMgr.router = DeploymentRouter.from_llm_config(llm_config)
+        LLMMgr.router.register_limits(LLMMgr.scheduler)
+        if LLMMgr.router.deployments:
+            logger.info(f"Load balancing LLM requests across deployments: {list(LLMMgr.router.get_stats())}")
+
+    @staticmethod
+    def enable_response_cache(db_path: str, max_memory_entries: int = 4096) -> ResponseCache:
+        """
+        Serve repeated LLM requests from cache persisted at `db_path`. Can also be turned on by setting
+        GLUE_LLM_CACHE_PATH environment variable.
+
+        :param db_path: Path to SQLite file in which responses are persisted
+        :param max_memory_entries: Max number of responses to be held in memory
+        :return: Object of ResponseCache, that has hit/ miss counters
+        """
+        with LLMMgr._lazy_init_lock:
+            LLMMgr.disable_response_cache()
+            LLMMgr.response_cache = ResponseCache(db_path, max_memory_entries)
+            return LLMMgr.response_cache
+
+    @staticmethod
+    def enable_mock_llm(mock_llm: MockLLM = None) -> MockLLM:
+        """
+        Serve all subsequent chat completion requests from offline mock LLM, instead of live endpoints. Requests still
+        go through response cache, scheduler & usage tracker, so their overhead is part of what is measured.
+
+        :param mock_llm: Object of MockLLM. If None, one is created from GLUE_MOCK_LLM_* environment variables.
+        :return: Object of MockLLM in use, that has counters of requests served
+        """
+        os.environ["MODEL_TYPE"] = "Mock"
+        LLMMgr.mock_llm = mock_llm or MockLLM.from_env()
+        return LLMMgr.mock_llm
+
+    @staticmethod
+    def disable_response_cache() -> None:
+        if LLMMgr.response_cache:
+            LLMMgr.response_cache.close()
+        LLMMgr.response_cache = None
+
+    @staticmethod
+    def get_response_cache() -> ResponseCache:
+        """
+        :return: Object of ResponseCache if caching is turned on, else None
+        """
+        cache_path = os.environ.get(GlueEnvVars.LLM_CACHE_PATH)
+        if LLMMgr.response_cache is None and cache_path:
+            LLMMgr.init_lazily("response_cache", lambda: ResponseCache(cache_path))
+        return LLMMgr.response_cache
+
+    @staticmethod
+    def init_lazily(attr_name: str, create: Callable[[], Any]) -> Any:
+        """
+        Set class attribute `attr_name` to object returned by `create`, unless another thread has already set it.
+        Nothing that is already set up is torn down, as other threads may be using it.
+
+        :param attr_name: Name of class attribute of LLMMgr
+        :param create: Method that creates the object
+        :return: Value of class attribute
+        """
+        with LLMMgr._lazy_init_lock:
+            if getattr(LLMMgr, attr_name) is None:
+                setattr(LLMMgr, attr_name, create())
+            return getattr(LLMMgr, attr_name)
+
+    @staticmethod
+    def enable_replay(io_log_path: str, strict: bool = False) -> "IOLogReplay":
+        """
+        Answer chat completion requests of prompt optimizer from outputs recorded in io_logs.jsonl by ParamLogger, so
+        that an experiment can be re-run without calling LLM. Index of io log is built on first use & reused after.
+        Can also be turned on by setting GLUE_REPLAY_IO_LOGS environment variable.
+
+        :param io_log_path: Path to io_logs.jsonl
+        :param strict: If True, a request that isn't found in io log raises error, instead of being sent to LLM
+        :return: Object of IOLogReplay, that has hit/ miss counters
+        """
+        with LLMMgr._lazy_init_lock:
+            LLMMgr.disable_replay()
+            LLMMgr.replay_log = LLMMgr._create_replay_log(io_log_path)
+            LLMMgr.replay_strict = strict
+            return LLMMgr.replay_log
+
+    @staticmethod
+    def _create_replay_log(io_log_path: str) -> "IOLogReplay":
+        from ...paramlogger.replay import IOLogReplay
+
+        replay_log = IOLogReplay(io_log_path)
+        logger.info(f"Replaying {replay_log.num_entries} recorded LLM responses from {io_log_path}")
+        return replay_log
+
+    @staticmethod
+    def disable_replay() -> None:
+        if LLMMgr.replay_log:
+            LLMMgr.replay_log.close()
+        LLMMgr.replay_log = None
+        LLMMgr.replay_strict = False
+
+    @staticmethod
+    def get_replay_log() -> "IOLogReplay":
+        """
+        :return: Object of IOLogReplay if replay is turned on, else None
+        """
+        io_log_path = os.environ.get(GlueEnvVars.REPLAY_IO_LOGS)
+        if LLMMgr.replay_log is None and io_log_path:
+            LLMMgr.init_lazily("replay_log", lambda: LLMMgr._create_replay_log(io_log_path))
+        return LLMMgr.replay_log
+
+    @staticmethod
+    def replay(
+        user_prompt: str, system_prompt: str = None, expected_answers: int = None, cache_salt: str = None
+    ) -> Optional[str]:
+        """
+        :return: Recorded output of chat_completion() of prompt optimizer for given arguments. None if replay is off,
+                 or request wasn't recorded.
+        """
+        replay_log = LLMMgr.get_replay_log()
+        if replay_log is None:
+            return None
+        response = replay_log.get(user_prompt, system_prompt, expected_answers, cache_salt)
+        if response is not None:
+            LLMMgr.usage_tracker.record("replay", cache_hit=True)
+        elif LLMMgr.replay_strict:
+            raise GlueLLMException(f"Request not found in {replay_log.io_log_path}: {user_prompt[:200]}", None)
+        return response
+
     @staticmethod
-    def chat_completion(messages: Dict):
+    def chat_completion(messages: Dict, priority: int = 0, expected_answers: int = None, cache_salt: str = None):
         llm_handle = os.environ.get("MODEL_TYPE", "AzureOpenAI")
         try:
             if llm_handle == "AzureOpenAI":
                 # Code to for calling LLMs
-                return call_api(messages)
+                return call_api(messages, priority, expected_answers, cache_salt=cache_salt)
             elif llm_handle == "LLamaAML":
                 # Code to for calling SLMs
                 return 0
+            elif llm_handle == "Mock":
+                # Offline responses, for benchmarks & tests that shouldn't spend quota
+                if LLMMgr.mock_llm is None:
+                    LLMMgr.mock_llm = MockLLM.from_env()
+                return call_api(messages, priority, expected_answers, client=LLMMgr.mock_llm, cache_salt=cache_salt)
+        except GlueLLMException:
+            # Rate limit retries exhausted or request expired in queue. Returning a placeholder answer here would
+            # get scored as a wrong answer by prompt optimizer.
+            raise
         except Exception as e:
             print(e)
-            return "Sorry, I am not able to understand your query. Please try again."
+            return LLMLiterals.FAILED_RESPONSE
             # raise GlueLLMException(f"Exception when calling {llm_handle.__class__.__name__} "
             #                        f"LLM in chat mode, with message {messages} ", e)
 
+    @staticmethod
+    def get_text_embeddings(texts: List[str], unique_model_id: str) -> List[List[float]]:
+        """
+        Embed texts using embedding model of llm config passed to configure().
+
+        :param texts: Texts to be embedded
+        :param unique_model_id: unique_model_id of embedding model in llm config
+        :return: Embedding of each text, in order of `texts`
+        """
+        if LLMMgr.llm_config is None:
+            raise GlueLLMException(
+                f"Embedding model `{unique_model_id}` was asked for, but no llm config is set. "
+                f"Call LLMMgr.configure() with llm config having this model.",
+                None,
+            )
+        if LLMMgr.llm_pool is None:
+            LLMMgr.llm_pool = LLMMgr.get_llm_pool(LLMMgr.llm_config)
+        if unique_model_id not in LLMMgr.llm_pool:
+            raise GlueLLMException(
+                f"Model `{unique_model_id}` isn't in llm config. Models in it are: {list(LLMMgr.llm_pool)}",
+                None,
+            )
+        return LLMMgr.llm_pool[unique_model_id].get_text_embedding_batch(texts)
+
     @staticmethod
     def get_all_model_ids_of_type(llm_config: LLMConfig, llm_output_type: str):
         res = []
@@ -86,7 +385,7 @@ class LLMMgr:
         return res
 
     @staticmethod
-    def get_llm_pool(llm_config: LLMConfig) -> Dict[str, LLM]:
+    def get_llm_pool(llm_config: LLMConfig) -> Dict[str, "LLM"]:
         """
         Create a dictionary of LLMs. key would be unique id of LLM, value is object using which
         methods associated with that LLM service can be called.
@@ -98,34 +397,30 @@ class LLMMgr:
         llm_pool = {}
         az_llm_config = llm_config.azure_open_ai
 
-        if az_llm_config:
-            install_lib_if_missing(InstallLibs.LLAMA_LLM_AZ_OAI)
-            install_lib_if_missing(InstallLibs.LLAMA_EMB_AZ_OAI)
-            install_lib_if_missing(InstallLibs.LLAMA_MM_LLM_AZ_OAI)
-            install_lib_if_missing(InstallLibs.TIKTOKEN)
-
-            import tiktoken
-
-            # from llama_index.llms.azure_openai import AzureOpenAI
-            from openai import AzureOpenAI
-            from llama_index.embeddings.azure_openai import AzureOpenAIEmbedding
-            from llama_index.multi_modal_llms.azure_openai import AzureOpenAIMultiModal
-
+        # Backends are imported only for the model types that are configured. Missing libraries raise
+        # GlueLLMException saying what to install, instead of being installed in the middle of a run.
+        if az_llm_config and az_llm_config.azure_oai_models:
             az_token_provider = None
-            # if az_llm_config.use_azure_ad:
-            from azure.identity import get_bearer_token_provider, AzureCliCredential
+            # Azure AD is used only when there is no API key, like DeploymentRouter does
+            if not az_llm_config.api_key:
+                get_bearer_token_provider = import_optional(
+                    "azure.identity", "get_bearer_token_provider", "azure-identity"
+                )
+                AzureCliCredential = import_optional("azure.identity", "AzureCliCredential", "azure-identity")
 
-            az_token_provider = get_bearer_token_provider(
-                AzureCliCredential(), "https://cognitiveservices.azure.com/.default"
-            )
+                az_token_provider = get_bearer_token_provider(
+                    AzureCliCredential(), "https://cognitiveservices.azure.com/.default"
+                )
 
             for azure_oai_model in az_llm_config.azure_oai_models:
                 callback_mgr = None
                 if azure_oai_model.track_tokens:
+                    encoding_for_model = import_optional("tiktoken", "encoding_for_model", InstallLibs.TIKTOKEN)
 
                     # If we need to count number of tokens used in LLM calls
+                    CallbackManager, TokenCountingHandler = import_token_counting()
                     token_counter = TokenCountingHandler(
-                        tokenizer=tiktoken.encoding_for_model(
+                        tokenizer=encoding_for_model(
                             azure_oai_model.model_name_in_azure
                         ).encode
                     )
@@ -138,6 +433,7 @@ class LLMMgr:
                     LLMOutputTypes.COMPLETION,
                 ]:
                     # ()
+                    AzureOpenAI = LLMProviderRegistry.get(azure_oai_model.model_type)
                     llm_pool[azure_oai_model.unique_model_id] = AzureOpenAI(
                         # use_azure_ad=az_llm_config.use_azure_ad,
                         azure_ad_token_provider=az_token_provider,
@@ -150,6 +446,7 @@ class LLMMgr:
                     )
                     # ()
                 elif azure_oai_model.model_type == LLMOutputTypes.EMBEDDINGS:
+                    AzureOpenAIEmbedding = LLMProviderRegistry.get(azure_oai_model.model_type)
                     llm_pool[azure_oai_model.unique_model_id] = AzureOpenAIEmbedding(
                         use_azure_ad=az_llm_config.use_azure_ad,
                         azure_ad_token_provider=az_token_provider,
@@ -161,7 +458,7 @@ class LLMMgr:
                         callback_manager=callback_mgr,
                     )
                 elif azure_oai_model.model_type == LLMOutputTypes.MULTI_MODAL:
-
+                    AzureOpenAIMultiModal = LLMProviderRegistry.get(azure_oai_model.model_type)
                     llm_pool[azure_oai_model.unique_model_id] = AzureOpenAIMultiModal(
                         use_azure_ad=az_llm_config.use_azure_ad,
                         azure_ad_token_provider=az_token_provider,
@@ -183,6 +480,7 @@ class LLMMgr:
                 callback_mgr = None
                 if custom_model.track_tokens:
                     # If we need to count number of tokens used in LLM calls
+                    CallbackManager, TokenCountingHandler = import_token_counting()
                     token_counter = TokenCountingHandler(
                         tokenizer=custom_llm_class.get_tokenizer()
                     )
@@ -196,7 +494,7 @@ class LLMMgr:
         return llm_pool
 
     @staticmethod
-    def get_tokens_used(llm_handle: LLM) -> Dict[str, int]:
+    def get_tokens_used(llm_handle: "LLM") -> Dict[str, int]:
         """
         For a given LLM, output the number of tokens used.
 
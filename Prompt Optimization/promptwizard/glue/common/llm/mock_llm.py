@@ -0,0 +1,225 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from types import SimpleNamespace
+from typing import Callable, Dict, Iterator, List, Tuple
+
+from ..constants.str_literals import GlueEnvVars
+from ..exceptions import GlueLLMException
+from .scheduler import CHARS_PER_TOKEN, TokenBucket, estimate_tokens
+
+# Response given when no scripted rule matches the request & no responder is set
+DEFAULT_MOCK_RESPONSE = "<START>Mock response<END> <ANS_START>mock<ANS_END>"
+
+
+class MockLLMError(Exception):
+    """
+    Error raised by MockLLM. Has `status_code` & `response.headers` like errors of openai client, so that it is
+    retried & backed off from in the same way.
+    """
+
+    def __init__(self, message: str, status_code: int, retry_after_seconds: float = None):
+        super().__init__(message)
+        self.status_code = status_code
+        headers = {}
+        if retry_after_seconds is not None:
+            headers["retry-after-ms"] = str(int(retry_after_seconds * 1000))
+        self.response = SimpleNamespace(headers=headers)
+
+
+def load_script(script_path: str) -> List[Tuple["re.Pattern", str]]:
+    """
+    :param script_path: Path to jsonl file, where each line is {"pattern": <regex>, "response": <text>}
+    :return: List of (compiled pattern, response), in order of file
+    """
+    rules = []
+    with open(script_path, encoding="utf-8") as script_file:
+        for line in script_file:
+            if line.strip():
+                rule = json.loads(line)
+                rules.append((re.compile(rule["pattern"], re.DOTALL), rule["response"]))
+    return rules
+
+
+class MockLLM:
+    """
+    Offline stand-in for OpenAI chat completion client, used when MODEL_TYPE environment variable is `Mock`. Responses
+    come from scripted rules (first rule whose pattern is found in the last message wins), else from `responder`.
+    Latency, errors & throttling are simulated, and are decided by a hash of the request & how many times it has been
+    sent, so a run is reproducible irrespective of the order in which concurrent requests arrive.
+    """
+
+    def __init__(
+        self,
+        responder: Callable[[List[Dict]], str] = None,
+        rules: List[Tuple["re.Pattern", str]] = None,
+        latency_seconds: float = 0.0,
+        latency_jitter_seconds: float = 0.0,
+        seconds_per_token: float = 0.0,
+        error_rate: float = 0.0,
+        req_per_min: int = None,
+        max_concurrent_requests: int = None,
+        seed: int = 0,
+        model_name: str = "mock",
+    ):
+        """
+        :param responder: Method that takes messages in OpenAI chat format & returns text of response
+        :param rules: List of (compiled pattern, response), as returned by load_script()
+        :param latency_seconds: Time taken before first token of response is returned
+        :param latency_jitter_seconds: Up to this much time is added to latency, varying by request
+        :param seconds_per_token: Time taken to generate each token of response. Streamed responses that are closed
+                                  early don't spend time on tokens that aren't read.
+        :param error_rate: Fraction of requests that fail with a server error (HTTP 500)
+        :param req_per_min: Requests beyond this rate are throttled (HTTP 429), with Retry-After. None is unlimited.
+        :param max_concurrent_requests: Requests beyond these many in flight are throttled. None is unlimited.
+        :param seed: Seed mixed into the hash that decides latency jitter & errors
+        :param model_name: Name under which calls to mock are tracked
+        """
+        self.responder = responder
+        self.rules = rules or []
+        self.latency_seconds = latency_seconds
+        self.latency_jitter_seconds = latency_jitter_seconds
+        self.seconds_per_token = seconds_per_token
+        self.error_rate = error_rate
+        self.max_concurrent_requests = max_concurrent_requests
+        self.seed = seed
+        self.model_name = model_name
+        self.request_bucket = TokenBucket(req_per_min) if req_per_min else None
+        self._lock = threading.Lock()
+        # Number of times each request has been sent, key=digest of request
+        self._attempts: Dict[str, int] = {}
+        self.in_flight = 0
+        # busy_seconds is the time during which at least one request was in flight. Wall time of a run minus this, is
+        # the time spent outside LLM.
+        self.stats = {"requests": 0, "served": 0, "errors": 0, "throttled": 0, "busy_seconds": 0.0}
+        self._busy_since = None
+        # Mimics `client.chat.completions.create()` of openai client
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    @staticmethod
+    def from_env() -> "MockLLM":
+        """
+        :return: Object of MockLLM, configured by GLUE_MOCK_LLM_* environment variables
+        """
+        script_path = os.environ.get(GlueEnvVars.MOCK_LLM_SCRIPT)
+        req_per_min = os.environ.get(GlueEnvVars.MOCK_LLM_REQ_PER_MIN)
+        max_concurrent_requests = os.environ.get(GlueEnvVars.MOCK_LLM_MAX_CONCURRENCY)
+        return MockLLM(
+            rules=load_script(script_path) if script_path else None,
+            latency_seconds=float(os.environ.get(GlueEnvVars.MOCK_LLM_LATENCY_MS, 0)) / 1000,
+            latency_jitter_seconds=float(os.environ.get(GlueEnvVars.MOCK_LLM_LATENCY_JITTER_MS, 0)) / 1000,
+            error_rate=float(os.environ.get(GlueEnvVars.MOCK_LLM_ERROR_RATE, 0)),
+            req_per_min=int(req_per_min) if req_per_min else None,
+            max_concurrent_requests=int(max_concurrent_requests) if max_concurrent_requests else None,
+            seed=int(os.environ.get(GlueEnvVars.MOCK_LLM_SEED, 0)),
+        )
+
+    def respond(self, messages: List[Dict]) -> str:
+        """
+        :param messages: List of messages in OpenAI chat format
+        :return: Text of response to `messages`
+        """
+        last_message = str(messages[-1].get("content") or "") if messages else ""
+        for pattern, response in self.rules:
+            if pattern.search(last_message):
+                return response
+        if self.responder:
+            return self.responder(messages)
+        return DEFAULT_MOCK_RESPONSE
+
+    def _unit_hash(self, digest: str, attempt: int, purpose: str) -> float:
+        """
+        :return: Number in [0, 1) that is fixed for given request, attempt & purpose
+        """
+        hashed = hashlib.blake2b(f"{self.seed}|{digest}|{attempt}|{purpose}".encode(), digest_size=8).digest()
+        return int.from_bytes(hashed, "little") / 2 ** 64
+
+    def _admit(self, digest: str) -> int:
+        """
+        Count request as in flight, or raise the error that service would have returned for it.
+
+        :return: Number of times request was sent before
+        """
+        with self._lock:
+            self.stats["requests"] += 1
+            attempt = self._attempts.get(digest, 0)
+            self._attempts[digest] = attempt + 1
+
+            retry_after = None
+            if self.max_concurrent_requests and self.in_flight >= self.max_concurrent_requests:
+                retry_after = self.latency_seconds
+            elif self.request_bucket:
+                wait_time = self.request_bucket.time_to_available(1, time.monotonic())
+                if wait_time > 0:
+                    retry_after = wait_time
+                else:
+                    self.request_bucket.consume(1)
+            if retry_after is not None:
+                self.stats["throttled"] += 1
+                raise MockLLMError("Mock LLM rate limit exceeded", 429, retry_after)
+
+            if self._unit_hash(digest, attempt, "error") < self.error_rate:
+                self.stats["errors"] += 1
+                raise MockLLMError("Mock LLM server error", 500)
+            if self.in_flight == 0:
+                self._busy_since = time.perf_counter()
+            self.in_flight += 1
+            return attempt
+
+    def _release(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            self.stats["served"] += 1
+            if self.in_flight == 0:
+                self.stats["busy_seconds"] += time.perf_counter() - self._busy_since
+
+    def create(self, model: str = None, messages: List[Dict] = None, stream: bool = False, **kwargs):
+        """
+        Same as `client.chat.completions.create()` of openai client. Sampling parameters are ignored.
+
+        :return: Object shaped like openai ChatCompletion, or iterator of objects shaped like ChatCompletionChunk
+                 when `stream` is True
+        """
+        if not messages:
+            raise GlueLLMException("Mock LLM was called without messages", None)
+        digest = hashlib.sha256(json.dumps(messages, sort_keys=True).encode()).hexdigest()
+        attempt = self._admit(digest)
+        content = self.respond(messages)
+        usage = SimpleNamespace(
+            prompt_tokens=estimate_tokens(messages),
+            completion_tokens=len(content) // CHARS_PER_TOKEN + 1,
+            prompt_tokens_details=None,
+        )
+        usage.total_tokens = usage.prompt_tokens + usage.completion_tokens
+
+        try:
+            time.sleep(self.latency_seconds + self.latency_jitter_seconds * self._unit_hash(digest, attempt, "latency"))
+        except BaseException:
+            self._release()
+            raise
+        if stream:
+            return self._stream(content, usage)
+
+        try:
+            time.sleep(self.seconds_per_token * usage.completion_tokens)
+        finally:
+            self._release()
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content), finish_reason="stop")],
+            usage=usage,
+            model=self.model_name,
+        )
+
+    def _stream(self, content: str, usage: SimpleNamespace) -> Iterator[SimpleNamespace]:
+        # Generator, so that closing it early (like closing an HTTP stream) skips generation of remaining tokens
+        try:
+            for start in range(0, len(content), CHARS_PER_TOKEN):
+                time.sleep(self.seconds_per_token)
+                piece = content[start: start + CHARS_PER_TOKEN]
+                yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=piece))], usage=None)
+            yield SimpleNamespace(choices=[], usage=usage)
+        finally:
+            self._release()
@@ -0,0 +1,88 @@
+import threading
+from dataclasses import dataclass
+from importlib import import_module
+from typing import Any, Dict
+
+from ..constants.str_literals import InstallLibs, LLMOutputTypes
+from ..exceptions import GlueLLMException
+
+
+@dataclass(frozen=True)
+class LLMProviderSpec:
+    """
+    Where to find the class that serves a type of model, and what to install when it can't be imported.
+    """
+    import_path: str
+    class_name: str
+    # pip requirement that provides `import_path`
+    requirement: str
+
+
+def import_optional(import_path: str, attr_name: str, requirement: str) -> Any:
+    """
+    Import `attr_name` from module `import_path`. Libraries are never installed at runtime; if module isn't available,
+    fail with an error that says what has to be installed.
+
+    :param import_path: Import path of module e.g. llama_index.embeddings.azure_openai
+    :param attr_name: Name of class/ function in module
+    :param requirement: pip requirement that provides the module
+    :return: Class/ function
+    """
+    try:
+        return getattr(import_module(import_path), attr_name)
+    except ImportError as e:
+        raise GlueLLMException(
+            f"{import_path}.{attr_name} couldn't be imported. Install it using: pip install \"{requirement}\"", e
+        )
+
+
+class LLMProviderRegistry:
+    """
+    Registry of classes that serve each type of model. Backend of a model type is imported only when a model of that
+    type is first used, so that configuring only chat models doesn't import embedding/ multi-modal libraries.
+    """
+
+    _specs: Dict[str, LLMProviderSpec] = {
+        LLMOutputTypes.CHAT: LLMProviderSpec("openai", "AzureOpenAI", "openai>=1.70.0"),
+        LLMOutputTypes.COMPLETION: LLMProviderSpec("openai", "AzureOpenAI", "openai>=1.70.0"),
+        LLMOutputTypes.EMBEDDINGS: LLMProviderSpec(
+            "llama_index.embeddings.azure_openai", "AzureOpenAIEmbedding", InstallLibs.LLAMA_EMB_AZ_OAI
+        ),
+        LLMOutputTypes.MULTI_MODAL: LLMProviderSpec(
+            "llama_index.multi_modal_llms.azure_openai", "AzureOpenAIMultiModal", InstallLibs.LLAMA_MM_LLM_AZ_OAI
+        ),
+    }
+    _loaded: Dict[str, Any] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def register(cls, model_type: str, import_path: str, class_name: str, requirement: str) -> None:
+        """
+        Register (or replace) the class that serves models of type `model_type`.
+
+        :param model_type: Type of model, one of LLMOutputTypes
+        :param import_path: Import path of module having the class
+        :param class_name: Name of class
+        :param requirement: pip requirement that provides the module
+        """
+        with cls._lock:
+            cls._specs[model_type] = LLMProviderSpec(import_path, class_name, requirement)
+            cls._loaded.pop(model_type, None)
+
+    @classmethod
+    def get(cls, model_type: str) -> Any:
+        """
+        :param model_type: Type of model, one of LLMOutputTypes
+        :return: Class that serves models of type `model_type`. Its module is imported on first call.
+        """
+        with cls._lock:
+            if model_type in cls._loaded:
+                return cls._loaded[model_type]
+            spec = cls._specs.get(model_type)
+            if spec is None:
+                raise GlueLLMException(
+                    f"No provider is registered for model_type={model_type}. "
+                    f"Registered types are {sorted(cls._specs)}", None
+                )
+            cls._loaded[model_type] = import_optional(spec.import_path, spec.class_name, spec.requirement)
+            return cls._loaded[model_type]
@@ -0,0 +1,125 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from os import makedirs
+from os.path import dirname
+from typing import Dict, List, Optional
+
+from ..utils.logging import get_glue_logger
+
+logger = get_glue_logger(__name__)
+
+
+class ResponseCache:
+    """
+    Content addressed cache of LLM responses. Key is hash of normalized chat messages along with model & sampling
+    parameters. Recently used entries are held in an in-memory LRU, backed by a SQLite file on disk, so that
+    re-running an experiment answers already made requests without calling LLM.
+    Only deterministic requests (temperature=0) should be cached. In prompt optimizer, these are scoring of prompts,
+    critique & refinement, synthesis & reasoning of examples, and evaluation, where same request should get same
+    answer. Rounds of mutation send the same request on purpose to get different variations, so they pass a
+    different `cache_salt` per round to call_api().
+    """
+
+    def __init__(self, db_path: str, max_memory_entries: int = 4096):
+        """
+        :param db_path: Path to SQLite file in which responses are persisted
+        :param max_memory_entries: Max number of responses to be held in in-memory LRU
+        """
+        if dirname(db_path):
+            makedirs(dirname(db_path), exist_ok=True)
+        self.db_path = db_path
+        self.max_memory_entries = max_memory_entries
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(db_path, check_same_thread=False)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS responses "
+            "(key TEXT PRIMARY KEY, model TEXT, response TEXT, created_at REAL)"
+        )
+        self._connection.commit()
+
+    @staticmethod
+    def make_key(messages: List[Dict], model: str, **sampling_params) -> str:
+        """
+        :param messages: List of messages in OpenAI chat format
+        :param model: Name of model/ deployment
+        :param sampling_params: Parameters like temperature, max_tokens that affect the response
+        :return: Hex digest identifying the request
+        """
+        normalized_messages = [
+            {
+                "role": message.get("role"),
+                "content": str(message.get("content") or "").replace("\r\n", "\n").strip(),
+            }
+            for message in messages
+        ]
+        request_str = json.dumps(
+            {"messages": normalized_messages, "model": model, "params": sampling_params},
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(request_str.encode("utf-8")).hexdigest()
+
+    def _remember(self, key: str, response: str) -> None:
+        self._memory[key] = response
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        :param key: Key created using make_key()
+        :return: Cached response. None if request was never cached.
+        """
+        with self._lock:
+            response = self._memory.get(key)
+            if response is not None:
+                self._memory.move_to_end(key)
+            else:
+                row = self._connection.execute(
+                    "SELECT response FROM responses WHERE key = ?", (key,)
+                ).fetchone()
+                if row:
+                    response = row[0]
+                    self._remember(key, response)
+
+            if response is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return response
+
+    def put(self, key: str, response: str, model: str = None) -> None:
+        """
+        :param key: Key created using make_key()
+        :param response: Text generated by LLM
+        :param model: Name of model/ deployment. Saved only for inspection of cache file.
+        """
+        if response is None:
+            return
+        with self._lock:
+            self._remember(key, response)
+            self._connection.execute(
+                "INSERT OR REPLACE INTO responses (key, model, response, created_at) VALUES (?, ?, ?, ?)",
+                (key, model, response, time.time()),
+            )
+            self._connection.commit()
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        :return: Dict having hit & miss counts since cache was opened
+        """
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+    def close(self) -> None:
+        with self._lock:
+            self._connection.close()
+        logger.info(f"Response cache {self.db_path} closed. {self.hits} hits, {self.misses} misses")
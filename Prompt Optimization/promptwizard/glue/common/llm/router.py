@@ -0,0 +1,248 @@
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List
+from urllib.parse import urlparse
+
+from ..base_classes import LLMConfig
+from ..constants.str_literals import LLMAuthModes, LLMOutputTypes, LLMProviders, OAILiterals
+from ..exceptions import GlueLLMException
+from ..utils.logging import get_glue_logger
+from .client_pool import LLMClientKey, LLMClientPool
+from .scheduler import DeploymentLimiter, LLMRequestScheduler, is_retryable_error
+
+logger = get_glue_logger(__name__)
+
+
+@dataclass
+class RoutedDeployment:
+    """
+    A deployment to which router can send requests, along with its load & health.
+    """
+    deployment_name: str
+    model_name: str
+    endpoint: str
+    api_key: str
+    api_version: str
+    req_per_min: int = None
+    tokens_per_min: int = None
+    error_backoff_in_seconds: float = 1
+    # Requests that have been routed to deployment & haven't completed, including the ones waiting in scheduler queue
+    in_flight: int = 0
+    consecutive_failures: int = 0
+    # Monotonic time till which deployment is skipped, after it failed repeatedly
+    unhealthy_until: float = 0.0
+
+    @property
+    def key(self) -> str:
+        """
+        :return: Name under which deployment's rate limits & usage are tracked. Host is part of it, as same deployment
+                 name can exist on different endpoints.
+        """
+        return f"{self.deployment_name}@{urlparse(self.endpoint).netloc or self.endpoint}"
+
+    def get_client(self):
+        """
+        :return: Pooled client for endpoint of this deployment
+        """
+        client_key = LLMClientKey(
+            provider=LLMProviders.AZURE_OPENAI,
+            endpoint=self.endpoint,
+            deployment=self.deployment_name,
+            auth_mode=LLMAuthModes.API_KEY if self.api_key else LLMAuthModes.AZURE_AD,
+            api_version=self.api_version or "",
+            api_key_digest=LLMClientKey.digest_api_key(self.api_key),
+        )
+        return LLMClientPool.get_client(client_key, api_key=self.api_key, api_version=self.api_version)
+
+    def drain_seconds(self, estimated_tokens: int) -> float:
+        """
+        :return: Time deployment would take to admit requests that are already routed to it, at its rate limits
+        """
+        drain_times = [0.0]
+        if self.req_per_min:
+            drain_times.append(self.in_flight * 60 / self.req_per_min)
+        if self.tokens_per_min:
+            drain_times.append(self.in_flight * estimated_tokens * 60 / self.tokens_per_min)
+        return max(drain_times)
+
+
+class DeploymentRouter:
+    """
+    Spreads requests across deployments serving the same type of model. Each request goes to the healthy deployment
+    that can start serving it soonest, judging by its `req_per_min`/ `tokens_per_min` limits, requests already routed
+    to it and pauses asked by service. So deployments get traffic in proportion to their quota. A deployment that
+    fails `failure_threshold` times in a row with throttling/ server errors is skipped for `cooldown_in_seconds`, and
+    failed requests are retried on other deployments.
+    """
+
+    def __init__(
+        self,
+        deployments: List[RoutedDeployment] = None,
+        failure_threshold: int = 3,
+        cooldown_in_seconds: float = 30,
+    ):
+        """
+        :param deployments: Deployments among which requests are spread
+        :param failure_threshold: Number of consecutive retryable failures after which deployment is marked unhealthy
+        :param cooldown_in_seconds: Time for which unhealthy deployment isn't sent any request
+        """
+        self.deployments = deployments or []
+        self.failure_threshold = failure_threshold
+        self.cooldown_in_seconds = cooldown_in_seconds
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def from_llm_config(llm_config: LLMConfig) -> "DeploymentRouter":
+        """
+        Create router over all the chat/ completion deployments in `llm_config`, when `load_balance_deployments` is
+        set in it. Otherwise router has no deployments & requests go to deployment set in environment variables.
+
+        :param llm_config: Object having all settings & preferences for all LLMs to be used in out system
+        :return: Object of DeploymentRouter
+        """
+        az_llm_config = llm_config.azure_open_ai
+        deployments = []
+        if az_llm_config and az_llm_config.load_balance_deployments:
+            api_key = az_llm_config.api_key or os.environ.get(OAILiterals.AZURE_OPENAI_API_KEY)
+            api_version = az_llm_config.api_version or os.environ.get(OAILiterals.OPENAI_API_VERSION)
+            for azure_oai_model in az_llm_config.azure_oai_models:
+                if azure_oai_model.model_type in [LLMOutputTypes.CHAT, LLMOutputTypes.COMPLETION]:
+                    deployments.append(
+                        RoutedDeployment(
+                            deployment_name=azure_oai_model.deployment_name_in_azure,
+                            model_name=azure_oai_model.model_name_in_azure,
+                            endpoint=azure_oai_model.azure_endpoint or az_llm_config.azure_endpoint,
+                            api_key=api_key,
+                            api_version=api_version,
+                            req_per_min=azure_oai_model.req_per_min,
+                            tokens_per_min=azure_oai_model.tokens_per_min,
+                            error_backoff_in_seconds=azure_oai_model.error_backoff_in_seconds,
+                        )
+                    )
+        return DeploymentRouter(deployments)
+
+    @property
+    def model_names(self) -> str:
+        """
+        :return: Names of models served by deployments of router. Responses are cached against these, as any of the
+                 deployments could have served the request.
+        """
+        return ",".join(sorted({deployment.model_name for deployment in self.deployments}))
+
+    def register_limits(self, scheduler: LLMRequestScheduler) -> None:
+        """
+        Add rate limits of all the deployments of router to `scheduler`.
+
+        :param scheduler: Scheduler through which routed requests are sent
+        """
+        for deployment in self.deployments:
+            scheduler.deployment_limits[deployment.key] = DeploymentLimiter(
+                deployment.req_per_min, deployment.tokens_per_min, deployment.error_backoff_in_seconds
+            )
+
+    def choose(self, scheduler: LLMRequestScheduler, estimated_tokens: int) -> RoutedDeployment:
+        """
+        Pick deployment for next request & count request as in flight on it. Caller must call release() once
+        request completes.
+
+        :param scheduler: Scheduler that holds rate limits & pauses of deployments
+        :param estimated_tokens: Estimated number of tokens in request
+        :return: Deployment to which request should be sent
+        """
+        with self._lock:
+            now = time.monotonic()
+            candidates = [d for d in self.deployments if d.unhealthy_until <= now]
+            if not candidates:
+                # All the deployments are unhealthy. Use the one that would recover first, rather than failing.
+                candidates = [min(self.deployments, key=lambda d: d.unhealthy_until)]
+            deployment = min(
+                candidates,
+                key=lambda d: scheduler.time_to_capacity(d.key, estimated_tokens)
+                + d.drain_seconds(estimated_tokens),
+            )
+            deployment.in_flight += 1
+            return deployment
+
+    def release(self, deployment: RoutedDeployment, error: Exception = None) -> None:
+        """
+        Record completion of a request routed to `deployment`.
+
+        :param deployment: Deployment returned by choose()
+        :param error: Exception raised by request. None if request succeeded.
+        """
+        with self._lock:
+            deployment.in_flight -= 1
+            if error is None:
+                deployment.consecutive_failures = 0
+                return
+            if not is_retryable_error(error):
+                return
+            deployment.consecutive_failures += 1
+            if deployment.consecutive_failures >= self.failure_threshold:
+                deployment.unhealthy_until = time.monotonic() + self.cooldown_in_seconds
+                deployment.consecutive_failures = 0
+                logger.warning(
+                    f"Deployment {deployment.key} is marked unhealthy for "
+                    f"{self.cooldown_in_seconds} sec, after {self.failure_threshold} consecutive failures"
+                )
+
+    def execute(
+        self,
+        scheduler: LLMRequestScheduler,
+        send_request: Callable,
+        estimated_tokens: int = 0,
+        priority: int = 0,
+    ):
+        """
+        Send request to the deployment chosen by router, via scheduler. On throttling/ transient failure, deployment
+        is paused as asked by service & request is retried on whichever deployment can serve it soonest.
+
+        :param scheduler: Scheduler that enforces rate limits of deployments
+        :param send_request: Method that takes object of RoutedDeployment, sends request to it & returns response
+        :param estimated_tokens: Estimated number of tokens in request
+        :param priority: Lower value is served first
+        :return: Response returned by `send_request`
+        """
+        for attempt in range(scheduler.max_retries + 1):
+            deployment = self.choose(scheduler, estimated_tokens)
+            try:
+                scheduler.acquire(deployment.key, estimated_tokens, priority)
+                response = send_request(deployment)
+            except Exception as e:
+                self.release(deployment, e)
+                if not is_retryable_error(e):
+                    raise
+                if attempt == scheduler.max_retries:
+                    raise GlueLLMException(f"Request failed on all deployments after {attempt + 1} attempts", e)
+
+                retry_after = scheduler.retry_delay(deployment.key, attempt, e)
+                logger.warning(
+                    f"Request to deployment {deployment.key} failed with {type(e).__name__}. "
+                    f"Pausing it for {retry_after:.2f} sec & retrying (attempt {attempt + 1}/{scheduler.max_retries})"
+                )
+                scheduler.pause(deployment.key, retry_after)
+                continue
+
+            self.release(deployment)
+            usage = getattr(response, "usage", None)
+            if usage is not None:
+                scheduler.record_usage(
+                    deployment.key, estimated_tokens, getattr(usage, "total_tokens", None)
+                )
+            return response
+
+    def get_stats(self) -> Dict[str, Dict]:
+        """
+        :return: Dict key=deployment name, value=its load & health
+        """
+        with self._lock:
+            now = time.monotonic()
+            return {
+                d.key: {
+                    "in_flight": d.in_flight,
+                    "healthy": d.unhealthy_until <= now,
+                }
+                for d in self.deployments
+            }
@@ -0,0 +1,369 @@
+import heapq
+import itertools
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, List, Optional
+
+from ..base_classes import LLMConfig
+from ..constants.str_literals import LLMOutputTypes
+from ..exceptions import GlueLLMException
+from ..utils.logging import get_glue_logger
+
+logger = get_glue_logger(__name__)
+
+# Approximate number of characters per token, used to estimate size of request before sending it
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(messages: List[Dict]) -> int:
+    """
+    Cheap estimate of number of prompt tokens in chat messages, without loading a tokenizer.
+
+    :param messages: List of messages in OpenAI chat format
+    :return: Estimated number of tokens
+    """
+    return sum(len(str(message.get("content") or "")) for message in messages) // CHARS_PER_TOKEN + 1
+
+
+def get_retry_after_seconds(error: Exception) -> Optional[float]:
+    """
+    Read `retry-after-ms` or `retry-after` header from the HTTP response attached to the error.
+
+    :param error: Exception raised by LLM client
+    :return: Seconds to wait before retrying, as asked by service. None if service didn't ask.
+    """
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+
+    retry_after_ms = headers.get("retry-after-ms")
+    if retry_after_ms:
+        try:
+            return float(retry_after_ms) / 1000
+        except ValueError:
+            pass
+
+    retry_after = headers.get("retry-after")
+    if retry_after:
+        try:
+            return float(retry_after)
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(retry_after).timestamp() - time.time())
+            except (TypeError, ValueError):
+                pass
+    return None
+
+
+def is_retryable_error(error: Exception) -> bool:
+    """
+    :param error: Exception raised by LLM client
+    :return: True if error is transient (throttling, server error, connection failure) & request can be retried
+    """
+    status_code = getattr(error, "status_code", None)
+    if status_code is not None:
+        return status_code in (408, 409, 429) or status_code >= 500
+
+    from openai import APIConnectionError
+
+    return isinstance(error, APIConnectionError)
+
+
+class TokenBucket:
+    """
+    Token bucket that refills continuously at `per_minute / 60` units per second. Bucket holds at most
+    `burst_seconds` worth of units, as Azure OpenAI evaluates its per-minute quotas over short windows.
+    Not thread-safe. Caller should hold the scheduler lock.
+    """
+
+    def __init__(self, per_minute: int, burst_seconds: int = 10):
+        self.refill_per_sec = per_minute / 60
+        self.capacity = max(1.0, self.refill_per_sec * burst_seconds)
+        self.level = self.capacity
+        self.updated_at = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self.updated_at) * self.refill_per_sec)
+        self.updated_at = now
+
+    def time_to_available(self, amount: float, now: float) -> float:
+        """
+        :return: Seconds after which `amount` units would be available in bucket. 0 if they are available now.
+        """
+        self._refill(now)
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.refill_per_sec
+
+    def consume(self, amount: float) -> None:
+        """
+        Take `amount` units out of bucket. Level can go negative, when actual usage turns out to be more than
+        what was estimated.
+        """
+        self.level -= min(amount, self.capacity) if amount > 0 else amount
+
+
+class DeploymentLimiter:
+    """
+    Request & token limits of a single deployment, along with the queue of requests waiting for capacity on it.
+    """
+
+    def __init__(
+        self,
+        req_per_min: int = None,
+        tokens_per_min: int = None,
+        error_backoff_in_seconds: float = 1,
+    ):
+        self.request_bucket = TokenBucket(req_per_min) if req_per_min else None
+        self.token_bucket = TokenBucket(tokens_per_min) if tokens_per_min else None
+        self.error_backoff_in_seconds = error_backoff_in_seconds or 1
+        # Monotonic time till which no request should be sent, as asked by service via Retry-After
+        self.paused_until = 0.0
+        self.waiting_queue = []
+
+
+class _QueuedRequest:
+    def __init__(self, priority: int, sequence_num: int, estimated_tokens: int):
+        self.priority = priority
+        self.sequence_num = sequence_num
+        self.estimated_tokens = estimated_tokens
+        self.enqueued_at = time.monotonic()
+        self.evicted = False
+
+    def __lt__(self, other):
+        return (self.priority, self.sequence_num) < (other.priority, other.sequence_num)
+
+
+class LLMRequestScheduler:
+    """
+    Schedules LLM requests so that the per deployment `req_per_min` / `tokens_per_min` limits (and optional
+    user level limit) are never exceeded. Requests that are waiting for capacity are kept in a bounded priority
+    queue (lower value of priority is served first), and are evicted after waiting for `ttl_in_seconds`.
+    Throttled and transiently failed requests are retried after the delay asked by service in Retry-After header,
+    or with exponential backoff when there is no such header.
+    """
+
+    def __init__(
+        self,
+        deployment_limits: Dict[str, DeploymentLimiter] = None,
+        user_request_bucket: TokenBucket = None,
+        ttl_in_seconds: float = None,
+        max_queue_size: int = None,
+        max_retries: int = 5,
+        max_backoff_in_seconds: float = 60,
+    ):
+        """
+        :param deployment_limits: Dict key=deployment name, value=DeploymentLimiter for that deployment. Deployments
+                                  not present in dict are not throttled client side.
+        :param user_request_bucket: Bucket limiting requests sent across all deployments
+        :param ttl_in_seconds: Max time for which request can wait in queue. None means no limit.
+        :param max_queue_size: Max number of requests that can wait in queue of a deployment. None means no limit.
+        :param max_retries: Number of times a throttled/ transiently failed request is retried
+        :param max_backoff_in_seconds: Upper limit on time to wait before a retry
+        """
+        self.deployment_limits = deployment_limits or {}
+        self.user_request_bucket = user_request_bucket
+        self.ttl_in_seconds = ttl_in_seconds
+        self.max_queue_size = max_queue_size
+        self.max_retries = max_retries
+        self.max_backoff_in_seconds = max_backoff_in_seconds
+        self._condition = threading.Condition()
+        self._sequence = itertools.count()
+        # Private generator, so that jitter doesn't disturb the seeded global `random` used by prompt optimizers
+        self._jitter = random.Random()
+
+    @staticmethod
+    def from_llm_config(llm_config: LLMConfig) -> "LLMRequestScheduler":
+        """
+        Create scheduler with limits of all the chat/ completion deployments in `llm_config`.
+
+        :param llm_config: Object having all settings & preferences for all LLMs to be used in out system
+        :return: Object of LLMRequestScheduler
+        """
+        deployment_limits = {}
+        if llm_config.azure_open_ai:
+            for azure_oai_model in llm_config.azure_open_ai.azure_oai_models:
+                if azure_oai_model.model_type in [LLMOutputTypes.CHAT, LLMOutputTypes.COMPLETION]:
+                    deployment_limits[azure_oai_model.deployment_name_in_azure] = DeploymentLimiter(
+                        azure_oai_model.req_per_min,
+                        azure_oai_model.tokens_per_min,
+                        azure_oai_model.error_backoff_in_seconds,
+                    )
+
+        user_request_bucket = None
+        user_limits = llm_config.user_limits
+        if user_limits and user_limits.max_num_requests_in_time_window:
+            user_request_bucket = TokenBucket(
+                user_limits.max_num_requests_in_time_window * 60 / user_limits.time_window_length_in_seconds,
+                burst_seconds=user_limits.time_window_length_in_seconds,
+            )
+
+        scheduler_limits = llm_config.scheduler_limits
+        return LLMRequestScheduler(
+            deployment_limits,
+            user_request_bucket,
+            ttl_in_seconds=scheduler_limits.ttl_in_seconds if scheduler_limits else None,
+            max_queue_size=scheduler_limits.max_queue_size if scheduler_limits else None,
+        )
+
+    def get_limiter(self, deployment: str) -> DeploymentLimiter:
+        with self._condition:
+            if deployment not in self.deployment_limits:
+                self.deployment_limits[deployment] = DeploymentLimiter()
+            return self.deployment_limits[deployment]
+
+    def _time_to_capacity(self, limiter: DeploymentLimiter, estimated_tokens: int, now: float) -> float:
+        wait_times = [limiter.paused_until - now]
+        if limiter.request_bucket:
+            wait_times.append(limiter.request_bucket.time_to_available(1, now))
+        if limiter.token_bucket:
+            wait_times.append(limiter.token_bucket.time_to_available(estimated_tokens, now))
+        if self.user_request_bucket:
+            wait_times.append(self.user_request_bucket.time_to_available(1, now))
+        return max(wait_times)
+
+    def time_to_capacity(self, deployment: str, estimated_tokens: int) -> float:
+        """
+        :param deployment: Name of deployment
+        :param estimated_tokens: Estimated number of tokens in request
+        :return: Seconds after which `deployment` would have capacity for the request, ignoring requests that are
+                 already waiting in its queue. 0 if it has capacity now.
+        """
+        limiter = self.get_limiter(deployment)
+        with self._condition:
+            return max(0.0, self._time_to_capacity(limiter, estimated_tokens, time.monotonic()))
+
+    def _evict_expired(self, limiter: DeploymentLimiter, now: float) -> None:
+        if self.ttl_in_seconds is None:
+            return
+        alive_requests = []
+        for queued_request in limiter.waiting_queue:
+            if now - queued_request.enqueued_at > self.ttl_in_seconds:
+                queued_request.evicted = True
+            else:
+                alive_requests.append(queued_request)
+        if len(alive_requests) != len(limiter.waiting_queue):
+            heapq.heapify(alive_requests)
+            limiter.waiting_queue = alive_requests
+            self._condition.notify_all()
+
+    def acquire(self, deployment: str, estimated_tokens: int, priority: int = 0) -> None:
+        """
+        Block till there is capacity to send request of size `estimated_tokens` to `deployment`, and all requests
+        of higher priority (or same priority, but queued earlier) are sent.
+
+        :param deployment: Name of deployment to which request would be sent
+        :param estimated_tokens: Estimated number of tokens in request
+        :param priority: Lower value is served first
+        """
+        limiter = self.get_limiter(deployment)
+        with self._condition:
+            if self.max_queue_size and len(limiter.waiting_queue) >= self.max_queue_size:
+                raise GlueLLMException(
+                    f"Request queue of deployment {deployment} is full ({self.max_queue_size} requests)", None
+                )
+            queued_request = _QueuedRequest(priority, next(self._sequence), estimated_tokens)
+            heapq.heappush(limiter.waiting_queue, queued_request)
+
+            while True:
+                now = time.monotonic()
+                self._evict_expired(limiter, now)
+                if queued_request.evicted:
+                    raise GlueLLMException(
+                        f"Request to deployment {deployment} waited in queue for more than "
+                        f"{self.ttl_in_seconds} sec", None
+                    )
+
+                wait_time = self.ttl_in_seconds
+                if limiter.waiting_queue[0] is queued_request:
+                    wait_time = self._time_to_capacity(limiter, estimated_tokens, now)
+                    if wait_time <= 0:
+                        heapq.heappop(limiter.waiting_queue)
+                        if limiter.request_bucket:
+                            limiter.request_bucket.consume(1)
+                        if limiter.token_bucket:
+                            limiter.token_bucket.consume(estimated_tokens)
+                        if self.user_request_bucket:
+                            self.user_request_bucket.consume(1)
+                        self._condition.notify_all()
+                        return
+                    if self.ttl_in_seconds is not None:
+                        wait_time = min(wait_time, self.ttl_in_seconds)
+                self._condition.wait(timeout=wait_time)
+
+    def record_usage(self, deployment: str, estimated_tokens: int, actual_tokens: int) -> None:
+        """
+        Correct token bucket of deployment, once actual number of tokens consumed by request is known.
+        """
+        limiter = self.get_limiter(deployment)
+        if limiter.token_bucket and actual_tokens is not None:
+            with self._condition:
+                limiter.token_bucket.consume(actual_tokens - estimated_tokens)
+
+    def pause(self, deployment: str, seconds: float) -> None:
+        """
+        Hold all requests to `deployment` for `seconds`, e.g. when service responded with Retry-After.
+        """
+        limiter = self.get_limiter(deployment)
+        with self._condition:
+            limiter.paused_until = max(limiter.paused_until, time.monotonic() + seconds)
+            self._condition.notify_all()
+
+    def retry_delay(self, deployment: str, attempt: int, error: Exception) -> float:
+        """
+        :param deployment: Name of deployment to which failed request was sent
+        :param attempt: Number of attempts made before this one, for the request
+        :param error: Exception raised by LLM client
+        :return: Seconds to wait before retrying, as asked by service in Retry-After header, or exponential backoff
+                 with jitter when there is no such header
+        """
+        limiter = self.get_limiter(deployment)
+        retry_after = get_retry_after_seconds(error)
+        if retry_after is None:
+            retry_after = limiter.error_backoff_in_seconds * (2 ** attempt)
+            retry_after += self._jitter.uniform(0, limiter.error_backoff_in_seconds)
+        return min(retry_after, self.max_backoff_in_seconds)
+
+    def execute(
+        self,
+        deployment: str,
+        send_request: Callable,
+        estimated_tokens: int = 0,
+        priority: int = 0,
+    ):
+        """
+        Send request via `send_request` once there is capacity for it. Retry on throttling & transient failures.
+
+        :param deployment: Name of deployment to which request would be sent
+        :param send_request: Method with no arguments, that sends request & returns response of LLM client
+        :param estimated_tokens: Estimated number of tokens in request
+        :param priority: Lower value is served first
+        :return: Response returned by `send_request`
+        """
+        for attempt in range(self.max_retries + 1):
+            self.acquire(deployment, estimated_tokens, priority)
+            try:
+                response = send_request()
+            except Exception as e:
+                if not is_retryable_error(e):
+                    raise
+                if attempt == self.max_retries:
+                    raise GlueLLMException(
+                        f"Request to deployment {deployment} failed after {attempt + 1} attempts", e
+                    )
+
+                retry_after = self.retry_delay(deployment, attempt, e)
+                logger.warning(
+                    f"Request to deployment {deployment} failed with {type(e).__name__}. "
+                    f"Retrying in {retry_after:.2f} sec (attempt {attempt + 1}/{self.max_retries})"
+                )
+                self.pause(deployment, retry_after)
+                continue
+
+            usage = getattr(response, "usage", None)
+            if usage is not None:
+                self.record_usage(deployment, estimated_tokens, getattr(usage, "total_tokens", None))
+            return response
@@ -0,0 +1,73 @@
+from dataclasses import dataclass
+from typing import Any, List
+
+
+@dataclass
+class EstimatedUsage:
+    """
+    Token usage of a streamed completion that was stopped before the service sent its usage.
+    """
+    prompt_tokens: int
+    completion_tokens: int
+    total_tokens: int
+    prompt_tokens_details: Any = None
+
+
+@dataclass
+class StreamedCompletion:
+    """
+    Text & usage of a streamed chat completion.
+    """
+    content: str
+    usage: Any = None
+    # True if generation was stopped as soon as all the expected answers were received
+    stopped_early: bool = False
+
+
+class AnswerStreamParser:
+    """
+    Extracts answers wrapped between start & end delimiters from text that arrives in pieces. Text is scanned only
+    once, including when a delimiter is split across two pieces.
+    """
+
+    def __init__(self, expected_answers: int, start_delimiter: str = "<ANS_START>", end_delimiter: str = "<ANS_END>"):
+        """
+        :param expected_answers: Number of answers after which feed() reports that all answers are received
+        :param start_delimiter: Text that marks start of an answer
+        :param end_delimiter: Text that marks end of an answer
+        """
+        self.expected_answers = expected_answers
+        self.start_delimiter = start_delimiter
+        self.end_delimiter = end_delimiter
+        self.answers: List[str] = []
+        self._pending = ""
+        # Offset in _pending till which delimiter being looked for is known to be absent
+        self._scanned_till = 0
+        self._in_answer = False
+
+    def feed(self, text: str) -> bool:
+        """
+        :param text: Next piece of text generated by LLM
+        :return: True if all the expected answers are received
+        """
+        self._pending += text
+        while True:
+            delimiter = self.end_delimiter if self._in_answer else self.start_delimiter
+            found_at = self._pending.find(delimiter, self._scanned_till)
+            if found_at == -1:
+                # Delimiter may start in the last few characters & complete in next piece
+                self._scanned_till = max(self._scanned_till, len(self._pending) - len(delimiter) + 1)
+                if not self._in_answer:
+                    self._pending = self._pending[self._scanned_till:]
+                    self._scanned_till = 0
+                break
+
+            if self._in_answer:
+                self.answers.append(self._pending[:found_at])
+            self._pending = self._pending[found_at + len(delimiter):]
+            self._scanned_till = 0
+            self._in_answer = not self._in_answer
+        return self.all_answers_received()
+
+    def all_answers_received(self) -> bool:
+        return len(self.answers) >= self.expected_answers
@@ -0,0 +1,223 @@
+import json
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import asdict, dataclass
+from functools import wraps
+from os import makedirs
+from os.path import join
+from typing import Dict, Tuple
+
+from ..constants.str_literals import LLMPhases
+from ..utils.logging import get_glue_logger
+
+logger = get_glue_logger(__name__)
+
+# Phase to which LLM calls made in current context are attributed. Being a ContextVar, it is carried over to asyncio
+# tasks & to worker threads of run_in_thread().
+_current_phase = ContextVar("glue_llm_phase", default=LLMPhases.OTHER)
+
+
+@contextmanager
+def llm_phase(phase: str):
+    """
+    Attribute usage of all the LLM calls made within this context to `phase`.
+
+    :param phase: Name of phase, one of LLMPhases
+    """
+    token = _current_phase.set(phase)
+    try:
+        yield
+    finally:
+        _current_phase.reset(token)
+
+
+def get_llm_phase() -> str:
+    """
+    :return: Phase to which LLM calls made now are attributed
+    """
+    return _current_phase.get()
+
+
+@dataclass
+class LLMUsageStats:
+    requests: int = 0
+    cache_hits: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cached_tokens: int = 0
+    latency_sec: float = 0.0
+    max_latency_sec: float = 0.0
+
+    def add(self, other: "LLMUsageStats") -> None:
+        self.requests += other.requests
+        self.cache_hits += other.cache_hits
+        self.prompt_tokens += other.prompt_tokens
+        self.completion_tokens += other.completion_tokens
+        self.cached_tokens += other.cached_tokens
+        self.latency_sec += other.latency_sec
+        self.max_latency_sec = max(self.max_latency_sec, other.max_latency_sec)
+
+
+class LLMUsageTracker:
+    """
+    Aggregates token usage & latency of LLM calls, per phase of prompt optimization and per deployment.
+    """
+
+    # Metric name in Prometheus exposition format -> (field of LLMUsageStats, metric type, help text)
+    PROMETHEUS_METRICS = {
+        "glue_llm_requests_total": ("requests", "counter", "LLM requests sent to deployment"),
+        "glue_llm_cache_hits_total": ("cache_hits", "counter", "LLM requests served from response cache"),
+        "glue_llm_prompt_tokens_total": ("prompt_tokens", "counter", "Prompt tokens consumed"),
+        "glue_llm_completion_tokens_total": ("completion_tokens", "counter", "Completion tokens generated"),
+        "glue_llm_cached_tokens_total": ("cached_tokens", "counter", "Prompt tokens served from prompt cache"),
+        "glue_llm_latency_seconds_total": ("latency_sec", "counter", "Time spent waiting for LLM responses"),
+        "glue_llm_latency_seconds_max": ("max_latency_sec", "gauge", "Slowest LLM response"),
+    }
+
+    def __init__(self):
+        self._stats: Dict[Tuple[str, str], LLMUsageStats] = {}
+        self._lock = threading.Lock()
+
+    def record(
+        self,
+        deployment: str,
+        prompt_tokens: int = 0,
+        completion_tokens: int = 0,
+        cached_tokens: int = 0,
+        latency_sec: float = 0.0,
+        cache_hit: bool = False,
+    ) -> None:
+        """
+        Record usage of a single LLM call, against the phase set in current context.
+
+        :param deployment: Name of model/ deployment to which call was made
+        :param prompt_tokens: Number of tokens in prompt
+        :param completion_tokens: Number of tokens generated
+        :param cached_tokens: Number of prompt tokens that were served from prompt cache of deployment
+        :param latency_sec: Time taken for call to complete, including time spent waiting in scheduler queue
+        :param cache_hit: True if call was served from response cache, without sending it to deployment
+        """
+        call_stats = LLMUsageStats(
+            requests=0 if cache_hit else 1,
+            cache_hits=1 if cache_hit else 0,
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            cached_tokens=cached_tokens,
+            latency_sec=latency_sec,
+            max_latency_sec=latency_sec,
+        )
+        key = (get_llm_phase(), deployment)
+        with self._lock:
+            self._stats.setdefault(key, LLMUsageStats()).add(call_stats)
+
+    def record_response(self, deployment: str, response, latency_sec: float) -> None:
+        """
+        Record usage reported in `usage` field of chat completion response.
+
+        :param deployment: Name of model/ deployment to which call was made
+        :param response: Object of openai ChatCompletion class
+        :param latency_sec: Time taken for call to complete
+        """
+        usage = getattr(response, "usage", None)
+        prompt_tokens_details = getattr(usage, "prompt_tokens_details", None)
+        self.record(
+            deployment,
+            prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+            completion_tokens=getattr(usage, "completion_tokens", 0) or 0,
+            cached_tokens=getattr(prompt_tokens_details, "cached_tokens", 0) or 0,
+            latency_sec=latency_sec,
+        )
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats = {}
+
+    def load_summary(self, summary: Dict) -> None:
+        """
+        Replace usage recorded so far with usage in `summary`, e.g. when resuming a run from checkpoint.
+
+        :param summary: Usage summary, as returned by get_summary()
+        """
+        stats = {}
+        for usage_stats in summary.get("by_phase_and_deployment", []):
+            usage_stats = dict(usage_stats)
+            key = (usage_stats.pop("phase"), usage_stats.pop("deployment"))
+            stats[key] = LLMUsageStats(**usage_stats)
+        with self._lock:
+            self._stats = stats
+
+    def get_summary(self) -> Dict:
+        """
+        :return: Dict having usage aggregated by phase, by deployment, by both & in total
+        """
+        with self._lock:
+            stats = {key: LLMUsageStats(**asdict(value)) for key, value in self._stats.items()}
+
+        by_phase, by_deployment, total = {}, {}, LLMUsageStats()
+        for (phase, deployment), usage_stats in stats.items():
+            by_phase.setdefault(phase, LLMUsageStats()).add(usage_stats)
+            by_deployment.setdefault(deployment, LLMUsageStats()).add(usage_stats)
+            total.add(usage_stats)
+
+        return {
+            "total": asdict(total),
+            "by_phase": {phase: asdict(value) for phase, value in sorted(by_phase.items())},
+            "by_deployment": {deployment: asdict(value) for deployment, value in sorted(by_deployment.items())},
+            "by_phase_and_deployment": [
+                {"phase": phase, "deployment": deployment, **asdict(value)}
+                for (phase, deployment), value in sorted(stats.items())
+            ],
+        }
+
+    def to_prometheus(self) -> str:
+        """
+        :return: Usage in Prometheus text exposition format, labelled by phase & deployment
+        """
+        with self._lock:
+            stats = sorted(self._stats.items())
+
+        lines = []
+        for metric_name, (field_name, metric_type, help_text) in self.PROMETHEUS_METRICS.items():
+            lines.append(f"# HELP {metric_name} {help_text}")
+            lines.append(f"# TYPE {metric_name} {metric_type}")
+            for (phase, deployment), usage_stats in stats:
+                deployment_label = str(deployment).replace("\\", "\\\\").replace('"', '\\"')
+                lines.append(
+                    f'{metric_name}{{phase="{phase}",deployment="{deployment_label}"}} '
+                    f"{getattr(usage_stats, field_name)}"
+                )
+        return "\n".join(lines) + "\n"
+
+    def export(self, dir_path: str, file_name: str = "llm_usage") -> Dict:
+        """
+        Write usage as <file_name>.json & as Prometheus metrics in <file_name>.prom, in `dir_path`.
+
+        :param dir_path: Directory in which files should be written
+        :param file_name: Name of files, without extension
+        :return: Usage summary, as returned by get_summary()
+        """
+        summary = self.get_summary()
+        if dir_path:
+            makedirs(dir_path, exist_ok=True)
+        with open(join(dir_path, file_name + ".json"), "w") as file_obj:
+            json.dump(summary, file_obj, indent=2)
+        with open(join(dir_path, file_name + ".prom"), "w") as file_obj:
+            file_obj.write(self.to_prometheus())
+        logger.info(f"LLM usage: {summary['total']} by phase: {summary['by_phase']}")
+        return summary
+
+
+def in_llm_phase(phase: str):
+    """
+    Decorator that attributes usage of all the LLM calls made by decorated method to `phase`.
+
+    :param phase: Name of phase, one of LLMPhases
+    """
+    def decorator(method_obj):
+        @wraps(method_obj)
+        def wrap(*argv, **kwargs):
+            with llm_phase(phase):
+                return method_obj(*argv, **kwargs)
+        return wrap
+    return decorator
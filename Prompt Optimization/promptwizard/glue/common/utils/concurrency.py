@@ -0,0 +1,57 @@
+import asyncio
+import contextvars
+import functools
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable
+
+
+class LLMSlots(asyncio.Semaphore):
+    """
+    Semaphore that limits number of blocking calls (e.g. LLM calls) in flight, along with a thread pool of the same
+    size in which run_in_thread() runs them. Default executor of event loop has at most min(32, cpu count + 4)
+    threads, which would silently cap concurrency below the limit.
+    """
+
+    def __init__(self, max_concurrency: int):
+        """
+        :param max_concurrency: Max number of calls in flight. Values below 1 are treated as 1, so that a
+                                misconfigured limit doesn't make callers wait forever.
+        """
+        self.max_concurrency = max(1, max_concurrency or 1)
+        super().__init__(self.max_concurrency)
+        self.executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="llm-call")
+        weakref.finalize(self, self.executor.shutdown, wait=False)
+
+
+def run_coroutine_sync(coroutine: Awaitable) -> Any:
+    """
+    Run coroutine to completion from synchronous code & return its result. When called from a thread that already
+    has a running event loop (e.g. Jupyter notebook), coroutine is run in a fresh event loop on a worker thread,
+    with context variables of the calling thread.
+
+    :param coroutine: Coroutine object to be executed
+    :return: Value returned by coroutine
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(contextvars.copy_context().run, asyncio.run, coroutine).result()
+
+
+async def run_in_thread(llm_slots: asyncio.Semaphore, method_obj: Callable, *argv, **kwargs) -> Any:
+    """
+    Run blocking method (e.g. LLM call) in a worker thread, once a slot is available in `llm_slots`.
+
+    :param llm_slots: Semaphore that limits number of blocking calls in flight. When it is an LLMSlots object, method
+                      is run in its thread pool, else in default executor of event loop.
+    :param method_obj: Method reference, that has to be executed
+    :return: Value returned by method_obj
+    """
+    async with llm_slots:
+        # Context variables (e.g. LLM phase) are carried to worker thread, as asyncio.to_thread() does
+        call = functools.partial(contextvars.copy_context().run, method_obj, *argv, **kwargs)
+        return await asyncio.get_running_loop().run_in_executor(getattr(llm_slots, "executor", None), call)
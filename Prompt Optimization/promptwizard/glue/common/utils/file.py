@@ -1,12 +1,18 @@
 import json
-from os.path import join
-from typing import Dict, List
-import yaml
+import mmap
+import random
+from array import array
+from collections.abc import Sequence
+from os.path import getsize, join
+from typing import Dict, Iterator, List
 
 from ..exceptions import GlueValidaionException
 
 
 def yaml_to_dict(file_path: str) -> Dict:
+    # Imported here, so that importing this module for jsonl helpers doesn't load pyyaml
+    import yaml
+
     with open(file_path) as yaml_file:
         yaml_string = yaml_file.read()
 
@@ -94,6 +100,106 @@ def read_jsonl_row(file_path: str):
                 continue
 
 
+class JsonlDataset(Sequence):
+    """
+    Read only list-like view over rows of a jsonl file, that doesn't hold parsed rows in memory. Byte offsets of rows
+    are indexed in a single pass over the file, and a row is parsed from the memory-mapped file only when it's
+    accessed, so random access is O(1) & memory needed is 16 bytes per indexed row. Being a Sequence, it can be
+    passed to random.sample()/ random.choice(), which draw same rows as they would from a list of same rows.
+    """
+
+    def __init__(self, file_path: str, max_rows: int = None):
+        """
+        :param file_path: Path to jsonl file
+        :param max_rows: Index only first `max_rows` rows of file. None means index all the rows.
+        """
+        self.file_path = file_path
+        self._starts = array("q")
+        self._ends = array("q")
+        self._mmap = self._open_mmap(file_path)
+        # Total number of rows in file. Known only if file was scanned till end.
+        self.total_rows = None
+
+        row_count = 0
+        for start, end in self._iter_row_spans(file_path):
+            if max_rows is not None and row_count >= max_rows:
+                break
+            self._starts.append(start)
+            self._ends.append(end)
+            row_count += 1
+        else:
+            self.total_rows = row_count
+
+    @staticmethod
+    def _open_mmap(file_path: str):
+        if getsize(file_path) == 0:
+            return b""
+        with open(file_path, "rb") as file_obj:
+            return mmap.mmap(file_obj.fileno(), 0, access=mmap.ACCESS_READ)
+
+    @staticmethod
+    def _iter_row_spans(file_path: str) -> Iterator:
+        """
+        :return: (start, end) byte offsets of each non-blank line in file
+        """
+        offset = 0
+        with open(file_path, "rb") as file_obj:
+            for line in file_obj:
+                if line.strip():
+                    yield offset, offset + len(line)
+                offset += len(line)
+
+    @classmethod
+    def reservoir_sample(cls, file_path: str, sample_size: int, rng: random.Random = None) -> "JsonlDataset":
+        """
+        Draw `sample_size` rows uniformly at random from jsonl file, in a single pass over the file, without knowing
+        number of rows in advance (reservoir sampling). Sampled rows are kept in the order they appear in file.
+
+        :param file_path: Path to jsonl file
+        :param sample_size: Number of rows to be sampled
+        :param rng: Random number generator. Defaults to global `random` module.
+        :return: JsonlDataset having sampled rows
+        """
+        rng = rng or random
+        reservoir = []
+        row_count = 0
+        for row_span in cls._iter_row_spans(file_path):
+            if row_count < sample_size:
+                reservoir.append(row_span)
+            else:
+                replace_at = rng.randrange(row_count + 1)
+                if replace_at < sample_size:
+                    reservoir[replace_at] = row_span
+            row_count += 1
+
+        dataset = cls.__new__(cls)
+        dataset.file_path = file_path
+        dataset._mmap = cls._open_mmap(file_path)
+        reservoir.sort()
+        dataset._starts = array("q", [start for start, _ in reservoir])
+        dataset._ends = array("q", [end for _, end in reservoir])
+        dataset.total_rows = row_count
+        return dataset
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            dataset = self.__class__.__new__(self.__class__)
+            dataset.file_path = self.file_path
+            dataset._mmap = self._mmap
+            dataset._starts = self._starts[index]
+            dataset._ends = self._ends[index]
+            dataset.total_rows = self.total_rows
+            return dataset
+        return json.loads(self._mmap[self._starts[index]: self._ends[index]])
+
+    def __iter__(self) -> Iterator[Dict]:
+        for start, end in zip(self._starts, self._ends):
+            yield json.loads(self._mmap[start:end])
+
+
 def append_as_jsonl(file_path: str, args_to_log: Dict):
     """
 
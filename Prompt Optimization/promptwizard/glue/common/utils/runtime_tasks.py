@@ -1,10 +1,8 @@
 from importlib import import_module
-from importlib.metadata import distribution, PackageNotFoundError
 import os
 from importlib.util import module_from_spec, spec_from_file_location
 
 from os.path import basename, splitext
-import subprocess
 import sys
 
 from ..constants.log_strings import CommonLogsStr
@@ -21,6 +19,10 @@ def install_lib_if_missing(lib_name, find_links = None) -> bool:
     :param lib_name: Name of library
     :return: True if library was installed. False if it was not initially installed and was installed now.
     """
+    # Imported here, as only this rarely used helper needs them
+    from importlib.metadata import distribution, PackageNotFoundError
+    import subprocess
+
     try:
         version = None
         if "==" in lib_name:
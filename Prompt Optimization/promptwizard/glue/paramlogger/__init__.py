@@ -8,13 +8,17 @@ from uuid import uuid4
 
 from . import file_utils as futil
 from .constants import LogLiterals
-from .utils import run_method_get_io_dict
+from .utils import CapturePolicy, SignaturePlan
 
 
 class ParamLogger:
-    def __init__(self, base_path: str = ""):
+    def __init__(self, base_path: str = "", capture_policy: CapturePolicy = None, chained_log_chunk_size: int = 1000):
         """
         :param base_path: Path where all log files would be saved
+        :param capture_policy: Object of CapturePolicy, controlling truncation/ hashing/ skipping of logged inputs.
+                               By default all inputs are logged in full.
+        :param chained_log_chunk_size: Max number of records of CHAINED_LOG held in memory, before they are spilled
+                                       to disk
         """
         self.BASE_PATH = base_path
         if base_path:
@@ -23,12 +27,18 @@ class ParamLogger:
         # Unique `id` for a sample in dataset
         self.SAMPLE_UNQ_ID = None
 
-        # This dictionary can be used, when we want to log output and input of multiple components as a single jsonl
-        self.CHAINED_LOG = []
+        self.CHAINED_LOG_CHUNK_SIZE = chained_log_chunk_size
+
+        # This can be used, when we want to log output and input of multiple components as a single jsonl. Records
+        # are kept in memory in chunks of CHAINED_LOG_CHUNK_SIZE, and spilled to a file in BASE_PATH beyond that.
+        self.CHAINED_LOG = futil.SpillingJsonlBuffer(self.BASE_PATH, self.CHAINED_LOG_CHUNK_SIZE)
 
         # When using ParamLogger decorator over a method in a class, should we avoid logging arguement with name `self`
         self.DEL_SELF_ARG = True
 
+        # How input arguments of decorated methods are captured. Read on every call, so it can be changed any time.
+        self.CAPTURE_POLICY = capture_policy or CapturePolicy()
+
     def reset_eval_glue(self, base_path):
         # Path where all log files would be saved
         self.BASE_PATH = base_path
@@ -37,24 +47,52 @@ class ParamLogger:
         # Unique `id` for a sample in dataset
         self.SAMPLE_UNQ_ID = None
 
-        # This dictionary can be used, when we want to log output and input of multiple components as a single jsonl
-        self.CHAINED_LOG = []
+        # This can be used, when we want to log output and input of multiple components as a single jsonl
+        self.CHAINED_LOG.clear()
+        self.CHAINED_LOG = futil.SpillingJsonlBuffer(self.BASE_PATH, self.CHAINED_LOG_CHUNK_SIZE)
+
+    def flush(self):
+        """
+        Block till all the input/ output logs written so far are on disk.
+        """
+        futil.jsonl_writer.flush()
 
     def clear_chained_log(self):
         """
-        Deletes all previously saved data. Re-initialize CHAINED_LOG with new meta data.
+        Deletes all previously saved data, including the data spilled to disk.
+        """
+        self.CHAINED_LOG.clear()
+
+    def set_chained_log_target(self, file_name="chained_logs"):
+        """
+        Set name of file to which CHAINED_LOG data is going to be dumped, so that data spilled to disk can be
+        recovered to that file, if the process dies before dumping it.
+
+        :param file_name: Name of file (without extension)
         """
-        self.CHAINED_LOG = []
+        self.CHAINED_LOG.set_target(file_name)
 
     def dump_chained_log_to_file(self, file_name="chained_logs"):
         """
-        Append to file all data collected in CHAINED_LOG as json line.
-        Resets CHAINED_LOG to new instance
+        Append to file all data collected in CHAINED_LOG as json line, including the data spilled to disk.
+        Empties CHAINED_LOG
         """
 
         file_path = join(self.BASE_PATH, file_name + ".jsonl")
-        futil.save_jsonlist(file_path=file_path, json_list=self.CHAINED_LOG)
-        self.clear_chained_log()
+        self.CHAINED_LOG.replay_to(file_path)
+        # Data collected from here on is most likely dumped to same file
+        self.CHAINED_LOG.set_target(file_name)
+
+    def recover_chained_log(self, file_name="chained_logs") -> int:
+        """
+        Append to file the CHAINED_LOG data meant for it, that a process which died before calling
+        dump_chained_log_to_file() had spilled to disk in BASE_PATH.
+
+        :param file_name: Name of file (without extension), to which recovered data should be appended
+        :return: Number of spill files recovered
+        """
+        file_path = join(self.BASE_PATH, file_name + ".jsonl")
+        return futil.SpillingJsonlBuffer.recover_spill_files(self.BASE_PATH, file_path, file_name)
 
     def append_dict_to_chained_logs(self, args_to_log):
         self.CHAINED_LOG.append(args_to_log)
@@ -62,13 +100,15 @@ class ParamLogger:
     def append_to_chained_log(self, method_obj):
         """
         Execute the method referenced by method_obj. After executing, append the jsonl form of inputs and outputs of
-        that method to self.CHAINED_LOG list.
+        that method to self.CHAINED_LOG.
 
         :param method_obj:
         :return: None
         """
+        signature_plan = SignaturePlan(method_obj, self.DEL_SELF_ARG)
+
         def wrap(*argv, **kwargs):
-            args_to_log = run_method_get_io_dict(method_obj, self.DEL_SELF_ARG, *argv, **kwargs)
+            args_to_log = signature_plan.run(self.CAPTURE_POLICY, *argv, **kwargs)
             args_to_log[LogLiterals.META][LogLiterals.METHOD_NAME] = method_obj.__name__
             self.CHAINED_LOG.append(args_to_log)
             return args_to_log[LogLiterals.OUTPUTS]
@@ -83,14 +123,14 @@ class ParamLogger:
         :param file_name: Name of file in which we shall be logging the input output params of method
         :return: None
         """
+        signature_plan = SignaturePlan(method_obj, self.DEL_SELF_ARG)
+
         def wrap(*argv, **kwargs):
-            args_to_log = run_method_get_io_dict(method_obj, self.DEL_SELF_ARG, *argv, **kwargs)
-            if not self.SAMPLE_UNQ_ID:
-                self.SAMPLE_UNQ_ID = uuid4()
-            args_to_log[LogLiterals.ID] = self.SAMPLE_UNQ_ID
+            args_to_log = signature_plan.run(self.CAPTURE_POLICY, *argv, **kwargs)
+            args_to_log[LogLiterals.ID] = self.SAMPLE_UNQ_ID or uuid4()
             args_to_log[LogLiterals.META][LogLiterals.METHOD_NAME] = method_obj.__name__
             file_path = join(self.BASE_PATH, file_name + ".jsonl")
-            futil.append_as_jsonl(file_path=file_path, args_to_log=args_to_log)
+            futil.jsonl_writer.write(file_path, args_to_log)
             self.SAMPLE_UNQ_ID = None
             return args_to_log[LogLiterals.OUTPUTS]
         return wrap
@@ -103,13 +143,13 @@ class ParamLogger:
         :param method_obj: Method reference, that can be executed
         :return: None
         """
+        signature_plan = SignaturePlan(method_obj, self.DEL_SELF_ARG)
+
         def wrap(*argv, **kwargs):
-            args_to_log = run_method_get_io_dict(method_obj, self.DEL_SELF_ARG, *argv, **kwargs)
-            if not self.SAMPLE_UNQ_ID:
-                self.SAMPLE_UNQ_ID = uuid4()
-            args_to_log[LogLiterals.ID] = self.SAMPLE_UNQ_ID
+            args_to_log = signature_plan.run(self.CAPTURE_POLICY, *argv, **kwargs)
+            args_to_log[LogLiterals.ID] = self.SAMPLE_UNQ_ID or uuid4()
             file_path = join(self.BASE_PATH, method_obj.__name__+".jsonl")
-            futil.append_as_jsonl(file_path=file_path, args_to_log=args_to_log)
+            futil.jsonl_writer.write(file_path, args_to_log)
             self.SAMPLE_UNQ_ID = None
             return args_to_log[LogLiterals.OUTPUTS]
         return wrap
@@ -126,6 +166,8 @@ class ParamLogger:
         def wrap(file_path, dummy_id, dummy_input, dummy_output, dummy_meta, **kwargs):
             eval_file_path = join(self.BASE_PATH, method_obj.__name__ + "_" + basename(file_path))
             args_to_log = defaultdict(dict)
+            # Logs of file_path may still be in write buffer
+            self.flush()
 
             for json_obj in futil.read_jsonl_row(file_path):
                 eval_result = method_obj(None,
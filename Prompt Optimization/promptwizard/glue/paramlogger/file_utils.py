@@ -1,6 +1,19 @@
+import atexit
 import json
-from os.path import join
-from typing import Dict, List
+import os
+import queue
+import shutil
+import threading
+from os.path import exists, join
+from typing import Dict, Iterator, List
+from uuid import uuid4
+
+from ..common.utils.logging import get_glue_logger
+
+logger = get_glue_logger(__name__)
+
+# Serializes appends made by concurrent threads, so that json lines of different calls don't interleave
+_append_lock = threading.Lock()
 
 
 def read_jsonl(file_path: str) -> List:
@@ -46,8 +59,346 @@ def append_as_jsonl(file_path: str, args_to_log: Dict):
     :return:
     """
     json_str = json.dumps(args_to_log, default=str)
-    with open(file_path, "a") as fileobj:
-        fileobj.write(json_str + "\n")
+    with _append_lock:
+        with open(file_path, "a") as fileobj:
+            fileobj.write(json_str + "\n")
+
+
+class BufferedJsonlWriter:
+    """
+    Appends json lines to files from a background thread. Callers only serialize the record & put it in a bounded
+    queue, so logging doesn't wait on file I/O. File handles are kept open & flushed when `flush_every_records`
+    lines are written or `flush_interval_sec` has passed. Pending records are written on flush(), close() or at
+    interpreter exit. Records that couldn't be written due to an OS error are held & retried, in order, before the
+    next record of same file, on every flush & at close.
+    """
+
+    _STOP = object()
+
+    def __init__(self, max_queue_size: int = 10000, flush_every_records: int = 100, flush_interval_sec: float = 1.0):
+        """
+        :param max_queue_size: Max number of records waiting to be written. Callers block when queue is full.
+        :param flush_every_records: Flush file buffers after these many records are written
+        :param flush_interval_sec: Flush file buffers at least this often, when there are unflushed records
+        """
+        self.flush_every_records = flush_every_records
+        self.flush_interval_sec = flush_interval_sec
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._file_handles = {}
+        self._unflushed_count = 0
+        # Lines that couldn't be written yet, key=path of file
+        self._failed_lines: Dict[str, List[str]] = {}
+        self._thread = None
+        self._thread_lock = threading.Lock()
+        atexit.register(self.close)
+
+    def _start(self) -> None:
+        with self._thread_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="paramlogger-writer", daemon=True)
+                self._thread.start()
+
+    def write(self, file_path: str, args_to_log: Dict) -> None:
+        """
+        :param file_path: Path of jsonl file, to which record should be appended
+        :param args_to_log: Record to be written as a json line
+        """
+        self._start()
+        self._queue.put((file_path, json.dumps(args_to_log, default=str) + "\n"))
+
+    def flush(self) -> None:
+        """
+        Block till all the records queued so far are written & flushed to disk.
+        """
+        # close() may reset self._thread concurrently
+        with self._thread_lock:
+            thread = self._thread
+        if thread is None:
+            return
+        flushed = threading.Event()
+        self._queue.put(flushed)
+        while not flushed.wait(timeout=1) and thread.is_alive():
+            pass
+
+    def close(self) -> None:
+        """
+        Write all pending records and close file handles. Writer starts again if write() is called later.
+        """
+        with self._thread_lock:
+            if self._thread is None:
+                return
+            self._queue.put(self._STOP)
+            self._thread.join()
+            self._thread = None
+
+    def _flush_files(self) -> None:
+        for file_path in list(self._failed_lines):
+            self._write_lines(file_path, [])
+        for file_path, file_obj in list(self._file_handles.items()):
+            try:
+                file_obj.flush()
+            except OSError as e:
+                logger.error(f"Error while flushing jsonl file at {file_path}. Error: {e}")
+        self._unflushed_count = 0
+
+    def _write_lines(self, file_path: str, json_lines: List[str]) -> None:
+        """
+        Write `json_lines` to file, after lines of same file that failed earlier. If writing fails, lines are held to
+        be retried later.
+        """
+        failed_lines = self._failed_lines.pop(file_path, [])
+        json_lines = failed_lines + json_lines
+        try:
+            file_obj = self._file_handles.get(file_path)
+            if file_obj is None:
+                file_obj = open(file_path, "a")
+                self._file_handles[file_path] = file_obj
+            file_obj.write("".join(json_lines))
+        except OSError as e:
+            # Handle may be unusable, so file is opened again on retry
+            file_obj = self._file_handles.pop(file_path, None)
+            if file_obj is not None:
+                try:
+                    file_obj.close()
+                except OSError:
+                    pass
+            self._failed_lines[file_path] = json_lines
+            if not failed_lines:
+                logger.warning(f"Error while writing to jsonl file at {file_path}, will retry. Error: {e}")
+            return
+        if failed_lines:
+            logger.info(f"Wrote {len(failed_lines)} held records to jsonl file at {file_path}")
+        self._unflushed_count += len(json_lines)
+
+    def _run(self) -> None:
+        while True:
+            try:
+                item = self._queue.get(timeout=self.flush_interval_sec)
+            except queue.Empty:
+                if self._unflushed_count or self._failed_lines:
+                    self._flush_files()
+                continue
+
+            if item is self._STOP:
+                self._flush_files()
+                for file_path, json_lines in self._failed_lines.items():
+                    logger.error(
+                        f"Couldn't write {len(json_lines)} records to jsonl file at {file_path}. Records are:\n"
+                        + "".join(json_lines)
+                    )
+                self._failed_lines = {}
+                for file_obj in self._file_handles.values():
+                    try:
+                        file_obj.close()
+                    except OSError as e:
+                        logger.error(f"Error while closing jsonl file. Error: {e}")
+                self._file_handles = {}
+                return
+            if isinstance(item, threading.Event):
+                self._flush_files()
+                item.set()
+                continue
+
+            file_path, json_line = item
+            self._write_lines(file_path, [json_line])
+            if self._unflushed_count >= self.flush_every_records:
+                self._flush_files()
+
+
+# Writer shared by all ParamLogger objects in the process
+jsonl_writer = BufferedJsonlWriter()
+
+
+class SpillingJsonlBuffer:
+    """
+    Append only list of json records, whose memory usage is bounded. Records are serialized when appended. Once
+    `chunk_size_records` records or `max_buffer_bytes` bytes are buffered, they are appended as one chunk to a spill
+    file on disk, so that records survive a crash of the process. replay_to() streams spilled chunks followed by
+    buffered records to the final jsonl file, in the order in which they were appended.
+    Name of spill file carries pid of the process & name of log the records are meant for, i.e.
+    .chained_log_<pid>_<uuid>.<target_name>.spill.jsonl, so that they can be recovered to the right log, once the
+    process has died.
+    """
+
+    SPILL_FILE_PREFIX = ".chained_log_"
+    SPILL_FILE_SUFFIX = ".spill.jsonl"
+
+    def __init__(
+        self,
+        spill_dir: str = "",
+        chunk_size_records: int = 1000,
+        max_buffer_bytes: int = 4 * 1024 * 1024,
+        target_name: str = "chained_logs",
+    ):
+        """
+        :param spill_dir: Directory in which spill file is created
+        :param chunk_size_records: Spill to disk when these many records are buffered in memory
+        :param max_buffer_bytes: Spill to disk when serialized records buffered in memory exceed these many bytes
+        :param target_name: Name of log (without extension), to which records are meant to be replayed
+        """
+        self.spill_dir = spill_dir
+        self.chunk_size_records = chunk_size_records
+        self.max_buffer_bytes = max_buffer_bytes
+        self._spill_file_id = f"{os.getpid()}_{uuid4().hex}"
+        self.target_name = target_name
+        self.spill_file_path = self._get_spill_file_path(target_name)
+        self._buffer = []
+        self._buffer_bytes = 0
+        self._spilled_count = 0
+        self._lock = threading.Lock()
+
+    def _get_spill_file_path(self, target_name: str) -> str:
+        spill_file_name = f"{self.SPILL_FILE_PREFIX}{self._spill_file_id}.{target_name}{self.SPILL_FILE_SUFFIX}"
+        return join(self.spill_dir, spill_file_name)
+
+    def __len__(self) -> int:
+        return self._spilled_count + len(self._buffer)
+
+    def set_target(self, target_name: str) -> None:
+        """
+        Set name of log to which records are meant to be replayed. Spill file is renamed, if there is one.
+
+        :param target_name: Name of log (without extension)
+        """
+        with self._lock:
+            if target_name == self.target_name:
+                return
+            spill_file_path = self._get_spill_file_path(target_name)
+            if self._spilled_count and exists(self.spill_file_path):
+                os.replace(self.spill_file_path, spill_file_path)
+            self.target_name = target_name
+            self.spill_file_path = spill_file_path
+
+    def __iter__(self) -> Iterator[Dict]:
+        with self._lock:
+            spilled_count = self._spilled_count
+            buffer = list(self._buffer)
+        # Spill file is append only, so first `spilled_count` lines don't change while they are read
+        if spilled_count and exists(self.spill_file_path):
+            for row_num, json_obj in enumerate(read_jsonl_row(self.spill_file_path)):
+                if row_num >= spilled_count:
+                    break
+                yield json_obj
+        for json_line in buffer:
+            yield json.loads(json_line)
+
+    def append(self, json_obj: Dict) -> None:
+        """
+        :param json_obj: Record to be appended
+        """
+        json_line = json.dumps(json_obj, default=str, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._buffer.append(json_line)
+            self._buffer_bytes += len(json_line)
+            if len(self._buffer) >= self.chunk_size_records or self._buffer_bytes >= self.max_buffer_bytes:
+                self._spill()
+
+    def _spill(self) -> None:
+        with open(self.spill_file_path, "a", encoding="utf-8") as file_obj:
+            file_obj.writelines(self._buffer)
+            file_obj.flush()
+            os.fsync(file_obj.fileno())
+        self._spilled_count += len(self._buffer)
+        self._buffer = []
+        self._buffer_bytes = 0
+
+    def replay_to(self, file_path: str, mode: str = "a") -> None:
+        """
+        Write all the records to `file_path` & empty the buffer.
+
+        :param file_path: Path of jsonl file, to which records should be written
+        :param mode: Write mode
+        """
+        with self._lock:
+            with open(file_path, mode, encoding="utf-8") as file_obj:
+                if self._spilled_count:
+                    try:
+                        with open(self.spill_file_path, "r", encoding="utf-8") as spill_file_obj:
+                            shutil.copyfileobj(spill_file_obj, file_obj)
+                    except FileNotFoundError:
+                        logger.warning(
+                            f"Spill file {self.spill_file_path} was already recovered, skipping "
+                            f"{self._spilled_count} records spilled to it"
+                        )
+                file_obj.writelines(self._buffer)
+            self._clear()
+
+    def clear(self) -> None:
+        """
+        Delete all the records, including the ones spilled to disk.
+        """
+        with self._lock:
+            self._clear()
+
+    def _clear(self) -> None:
+        if self._spilled_count and exists(self.spill_file_path):
+            os.remove(self.spill_file_path)
+        self._buffer = []
+        self._buffer_bytes = 0
+        self._spilled_count = 0
+
+    @classmethod
+    def recover_spill_files(cls, spill_dir: str, file_path: str, target_name: str) -> int:
+        """
+        Append records left in spill files meant for `target_name` by processes that died before replaying them, to
+        `file_path`, and delete the spill files. Spill files of live processes, including this one, are left alone.
+
+        :param spill_dir: Directory in which spill files were created
+        :param file_path: Path of jsonl file, to which records should be written
+        :param target_name: Name of log (without extension), whose spill files should be recovered
+        :return: Number of spill files recovered
+        """
+        spill_file_names = []
+        for file_name in os.listdir(spill_dir or "."):
+            if not (file_name.startswith(cls.SPILL_FILE_PREFIX) and file_name.endswith(cls.SPILL_FILE_SUFFIX)):
+                continue
+            spill_file_id, _, spill_target_name = (
+                file_name[len(cls.SPILL_FILE_PREFIX):-len(cls.SPILL_FILE_SUFFIX)].partition(".")
+            )
+            pid = spill_file_id.split("_", 1)[0]
+            if spill_target_name == target_name and pid.isdigit() and not _is_process_alive(int(pid)):
+                spill_file_names.append(file_name)
+        spill_file_names.sort()
+        if not spill_file_names:
+            return 0
+
+        with open(file_path, "a", encoding="utf-8") as file_obj:
+            for file_name in spill_file_names:
+                with open(join(spill_dir, file_name), "r", encoding="utf-8") as spill_file_obj:
+                    shutil.copyfileobj(spill_file_obj, file_obj)
+                os.remove(join(spill_dir, file_name))
+        return len(spill_file_names)
+
+
+def _is_process_alive(pid: int) -> bool:
+    """
+    :return: True if process with `pid` is running
+    """
+    if pid == os.getpid():
+        return True
+    if os.name == "nt":
+        # os.kill() terminates the process on Windows, so it is queried instead
+        import ctypes
+
+        process_query_limited_information, still_active = 0x1000, 259
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(process_query_limited_information, False, pid)
+        if not handle:
+            return False
+        try:
+            exit_code = ctypes.c_ulong()
+            return bool(kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code))) and \
+                exit_code.value == still_active
+        finally:
+            kernel32.CloseHandle(handle)
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        # Process exists, but is owned by another user
+        return True
+    return True
 
 
 def save_jsonlist(file_path: str, json_list: List, mode: str = "a"):
@@ -0,0 +1,235 @@
+import hashlib
+import json
+import mmap
+import os
+import re
+import struct
+import threading
+from array import array
+from typing import Any, Dict, Optional, Tuple
+from uuid import uuid4
+
+from .constants import LogLiterals
+
+# Header of index file: magic, version, number of slots, number of entries, size & mtime of io log it was built from
+_HEADER = struct.Struct("<4sIQQQQ")
+_MAGIC = b"GLRI"
+_VERSION = 2
+# Each slot is (tag, offset + 1) as two unsigned 64 bit integers. Offset 0 marks an empty slot.
+_SLOT = struct.Struct("<QQ")
+# Occurrence under which the last recorded output of a request is indexed, for requests made more often than recorded
+_LAST_OCCURRENCE = -1
+# Patterns of values left by CapturePolicy, when a logged input is truncated or hashed rather than passed as is
+_ALTERED_INPUT_PATTERN = re.compile(r"(\A|\n)sha256:[0-9a-f]{64} len=\d+\Z|\.\.\.\[\d+ chars truncated\]\Z")
+
+
+def _normalize(value: Any) -> Optional[str]:
+    # Positional arguments are logged via str(), keyword arguments as they are. So None may show up as "None".
+    if value is None or value == "None":
+        return None
+    return str(value)
+
+
+def make_request_digest(
+    user_prompt: str, system_prompt: str = None, expected_answers: int = None, cache_salt: str = None
+) -> bytes:
+    """
+    :param user_prompt: Text spoken by user, as passed to chat_completion()
+    :param system_prompt: Text spoken by system, as passed to chat_completion()
+    :param expected_answers: Number of answers after which streamed completion was stopped
+    :param cache_salt: Salt that tells apart concurrent requests which are repeated on purpose, e.g. mutation rounds
+    :return: Digest identifying the request
+    """
+    request_str = json.dumps(
+        [_normalize(user_prompt), _normalize(system_prompt), _normalize(expected_answers), _normalize(cache_salt)],
+        ensure_ascii=False,
+    )
+    return hashlib.blake2b(request_str.encode("utf-8"), digest_size=16).digest()
+
+
+def _occurrence_key(request_digest: bytes, occurrence: int) -> Tuple[int, int]:
+    """
+    :return: (tag, hash) of key under which `occurrence`th record of request is indexed
+    """
+    digest = hashlib.blake2b(request_digest + occurrence.to_bytes(8, "little", signed=True), digest_size=16).digest()
+    return int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little")
+
+
+class IOLogReplay:
+    """
+    Answers chat_completion() calls with outputs recorded in io_logs.jsonl by ParamLogger. An index from hash of
+    request to byte offset of its record in io log is built once, in a single pass, as an open addressing hash table
+    in a file next to the io log. Table is memory mapped, so a lookup touches a few slots & reads a single line of io
+    log, irrespective of number of records. Index is rebuilt when io log changes.
+    Same request is sent more than once on purpose to get different outputs. Concurrent ones, like rounds of
+    mutation, are told apart by their `cache_salt`. Ones made one after the other are indexed along with their
+    occurrence, & Nth time a request is made, its Nth recorded output is served. Requests made more often than they
+    were recorded are served the last recorded output.
+    """
+
+    def __init__(self, io_log_path: str, index_path: str = None, method_name: str = "chat_completion"):
+        """
+        :param io_log_path: Path to io_logs.jsonl written by ParamLogger.log_io_params
+        :param index_path: Path of index file. Defaults to io log path with .idx suffix.
+        :param method_name: Name of logged method whose calls are replayed
+        """
+        self.io_log_path = io_log_path
+        self.index_path = index_path or io_log_path + ".idx"
+        self.method_name = method_name
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # Number of times each request was looked up, key=digest of request
+        self._occurrences: Dict[bytes, int] = {}
+
+        if not self._is_index_current():
+            self.build_index()
+        self._io_log_fd = os.open(self.io_log_path, os.O_RDONLY)
+        with open(self.index_path, "rb") as index_file:
+            self._index = mmap.mmap(index_file.fileno(), 0, access=mmap.ACCESS_READ)
+        _, _, self.num_slots, self.num_entries, _, _ = _HEADER.unpack_from(self._index, 0)
+
+    def _io_log_signature(self) -> Tuple[int, int]:
+        stat = os.stat(self.io_log_path)
+        return stat.st_size, stat.st_mtime_ns
+
+    def _is_index_current(self) -> bool:
+        if not os.path.exists(self.index_path):
+            return False
+        with open(self.index_path, "rb") as index_file:
+            header = index_file.read(_HEADER.size)
+        if len(header) < _HEADER.size:
+            return False
+        magic, version, _, _, io_log_size, io_log_mtime = _HEADER.unpack(header)
+        return (magic, version, (io_log_size, io_log_mtime)) == (_MAGIC, _VERSION, self._io_log_signature())
+
+    def build_index(self) -> int:
+        """
+        Index all the records of `method_name` in io log, whose inputs were logged in full.
+
+        :return: Number of records indexed
+        """
+        io_log_size, io_log_mtime = self._io_log_signature()
+        # Key of each record & of last record of each request, along with offset of record
+        keys, offsets = [], array("Q")
+        last_offsets: Dict[bytes, int] = {}
+        occurrences: Dict[bytes, int] = {}
+        offset = 0
+        with open(self.io_log_path, "rb") as io_log_file:
+            for line in io_log_file:
+                digest = self._digest_of_record(line)
+                if digest is not None:
+                    occurrence = occurrences.get(digest, 0)
+                    occurrences[digest] = occurrence + 1
+                    keys.append(_occurrence_key(digest, occurrence))
+                    offsets.append(offset)
+                    last_offsets[digest] = offset
+                offset += len(line)
+        num_entries = len(keys)
+        for digest, record_offset in last_offsets.items():
+            keys.append(_occurrence_key(digest, _LAST_OCCURRENCE))
+            offsets.append(record_offset)
+
+        # Load factor of at most 0.5 keeps probe sequences short
+        num_slots = 1
+        while num_slots < 2 * len(keys):
+            num_slots *= 2
+        slots = array("Q", bytes(16 * num_slots))
+        for (tag, key_hash), record_offset in zip(keys, offsets):
+            slot = key_hash & (num_slots - 1)
+            while slots[2 * slot + 1]:
+                slot = (slot + 1) & (num_slots - 1)
+            slots[2 * slot], slots[2 * slot + 1] = tag, record_offset + 1
+
+        # Unique per writer, so that processes building index of same io log at once don't write into same file
+        temp_path = f"{self.index_path}.{os.getpid()}.{uuid4().hex}.tmp"
+        try:
+            with open(temp_path, "wb") as index_file:
+                index_file.write(_HEADER.pack(_MAGIC, _VERSION, num_slots, num_entries, io_log_size, io_log_mtime))
+                slots.tofile(index_file)
+            os.replace(temp_path, self.index_path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+        return num_entries
+
+    def _digest_of_record(self, line: bytes) -> Optional[bytes]:
+        if not line.strip():
+            return None
+        try:
+            record = json.loads(line)
+        except ValueError:
+            # Last line may be partially written, when process logging it was killed
+            return None
+        if record.get(LogLiterals.META, {}).get(LogLiterals.METHOD_NAME) != self.method_name:
+            return None
+        inputs = record.get(LogLiterals.INPUTS, {})
+        # Such a record can't be matched to the request that produced it
+        if any(isinstance(value, str) and _ALTERED_INPUT_PATTERN.search(value) for value in inputs.values()):
+            return None
+        return self._digest_of_inputs(inputs)
+
+    @staticmethod
+    def _digest_of_inputs(inputs: Dict) -> bytes:
+        return make_request_digest(
+            inputs.get("user_prompt"),
+            inputs.get("system_prompt"),
+            inputs.get("expected_answers"),
+            inputs.get("cache_salt"),
+        )
+
+    def _read_record(self, offset: int) -> dict:
+        chunks = []
+        while True:
+            chunk = os.pread(self._io_log_fd, 65536, offset)
+            newline_at = chunk.find(b"\n")
+            if newline_at >= 0 or not chunk:
+                chunks.append(chunk[:newline_at] if newline_at >= 0 else chunk)
+                return json.loads(b"".join(chunks))
+            chunks.append(chunk)
+            offset += len(chunk)
+
+    def _lookup(self, digest: bytes, occurrence: int) -> Optional[str]:
+        """
+        :return: Output of `occurrence`th record of request, None if there isn't such a record
+        """
+        tag, key_hash = _occurrence_key(digest, occurrence)
+        slot = key_hash & (self.num_slots - 1)
+        while True:
+            slot_tag, offset = _SLOT.unpack_from(self._index, _HEADER.size + slot * _SLOT.size)
+            if not offset:
+                return None
+            if slot_tag == tag:
+                record = self._read_record(offset - 1)
+                # Tag is only 64 bits of key, so request is confirmed against the record
+                if self._digest_of_inputs(record[LogLiterals.INPUTS]) == digest:
+                    return record[LogLiterals.OUTPUTS]
+            slot = (slot + 1) & (self.num_slots - 1)
+
+    def get(
+        self, user_prompt: str, system_prompt: str = None, expected_answers: int = None, cache_salt: str = None
+    ) -> Optional[str]:
+        """
+        :return: Output recorded for Nth occurrence of the request, when it is looked up for Nth time. Last output
+                 recorded for it, when looked up more often than recorded. None if it isn't in io log.
+        """
+        digest = make_request_digest(user_prompt, system_prompt, expected_answers, cache_salt)
+        with self._lock:
+            occurrence = self._occurrences.get(digest, 0)
+            self._occurrences[digest] = occurrence + 1
+
+        output = self._lookup(digest, occurrence)
+        if output is None and occurrence:
+            output = self._lookup(digest, _LAST_OCCURRENCE)
+
+        with self._lock:
+            if output is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return output
+
+    def close(self) -> None:
+        self._index.close()
+        os.close(self._io_log_fd)
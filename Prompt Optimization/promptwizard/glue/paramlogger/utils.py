@@ -1,57 +1,121 @@
+import hashlib
 from collections import defaultdict
+from dataclasses import dataclass
 from datetime import datetime
 from inspect import getfullargspec
 from time import time
-from typing import Dict, Hashable
+from typing import Any, Dict, Hashable, Tuple
 
 from .constants import LogLiterals
 
 
-def run_method_get_io_dict(method_obj, del_self_arg: bool, *argv, **kwargs) -> Dict:
+@dataclass
+class CapturePolicy:
     """
-    Run method method_obj with *argv as arguments.
-    Create dictionary of all input/ output and other meta data elements to be eventually logged to file.
+    Controls how input arguments of a decorated method are captured in logs.
+    """
+    # Strings longer than this are truncated to this length. None means no truncation.
+    max_str_len: int = None
+    # Strings longer than this are replaced by their sha256 digest. None means strings are never hashed.
+    hash_str_longer_than: int = None
+    # Names of arguments that shouldn't be logged at all
+    skip_args: Tuple[str, ...] = ()
 
-    :param method_obj: method reference
-    :param del_self_arg: True if we shouldn't include `self` variable in output dictionary
-    :param argv: Arguments that needs to be passed to method as *argv
-    :param kwargs: Arguments that needs to be passed to method as **kwargs
+    def capture(self, value: Any) -> Any:
+        """
+        :param value: Value of an input argument
+        :return: Value as it should appear in log
+        """
+        if not isinstance(value, str):
+            value = str(value)
+        value_len = len(value)
+        if self.hash_str_longer_than is not None and value_len > self.hash_str_longer_than:
+            return f"sha256:{hashlib.sha256(value.encode('utf-8')).hexdigest()} len={value_len}"
+        if self.max_str_len is not None and value_len > self.max_str_len:
+            return f"{value[:self.max_str_len]}...[{value_len - self.max_str_len} chars truncated]"
+        return value
 
-    :return: Dict that has inputs, outputs and meta data to be logged
+
+# Policy that logs every argument in full
+FULL_CAPTURE_POLICY = CapturePolicy()
+
+
+class SignaturePlan:
     """
-    args_to_log = defaultdict(dict)
+    Argument names & defaults of a method, computed once when method is decorated, so that capturing inputs of each
+    call doesn't have to introspect the method again.
+    """
+
+    def __init__(self, method_obj, del_self_arg: bool):
+        """
+        :param method_obj: method reference
+        :param del_self_arg: True if we shouldn't include `self` variable in output dictionary
+        """
+        self.method_obj = method_obj
+        arg_spec = getfullargspec(method_obj)
+        self.arg_names = arg_spec.args
+        # True for positional arguments that should be logged
+        self.log_positional = [not (del_self_arg and arg_name == "self") for arg_name in self.arg_names]
+        defaults = arg_spec.defaults or ()
+        self.hashable_defaults = [
+            (position, arg_name, default_value)
+            for position, (arg_name, default_value) in enumerate(
+                zip(self.arg_names[len(self.arg_names) - len(defaults):], defaults),
+                start=len(self.arg_names) - len(defaults),
+            )
+            if isinstance(default_value, Hashable)
+        ]
+
+    def run(self, capture_policy: CapturePolicy, *argv, **kwargs) -> Dict:
+        """
+        Run method with *argv & **kwargs as arguments.
+        Create dictionary of all input/ output and other meta data elements to be eventually logged to file.
 
-    start_time = time()
-    output = method_obj(*argv, **kwargs)
-    execution_time = time() - start_time
+        :param capture_policy: Object of CapturePolicy, controlling how inputs are captured
+        :return: Dict that has inputs, outputs and meta data to be logged
+        """
+        args_to_log = defaultdict(dict)
 
-    # get name of input parameters of method method_obj
-    arg_spec = getfullargspec(method_obj)
-    arg_names = arg_spec.args
-    argv_list = list(argv)
+        start_time = time()
+        output = self.method_obj(*argv, **kwargs)
+        execution_time = time() - start_time
 
-    # Capture all *argv values
-    for arg_name, arg_val in zip(arg_names[:len(argv_list)], argv_list):
-        if isinstance(arg_val, Hashable) and not (del_self_arg and arg_name == "self"):
-            args_to_log[LogLiterals.INPUTS][arg_name] = str(arg_val)
+        inputs = args_to_log[LogLiterals.INPUTS]
+        skip_args = capture_policy.skip_args
 
-    # Capture all **kwargs values
-    args_to_log[LogLiterals.INPUTS].update(kwargs)
+        # Capture all *argv values
+        for arg_name, log_arg, arg_val in zip(self.arg_names, self.log_positional, argv):
+            if log_arg and arg_name not in skip_args and isinstance(arg_val, Hashable):
+                inputs[arg_name] = capture_policy.capture(arg_val)
 
-    if arg_spec.defaults:
-        default_arg_values = list(arg_spec.defaults)
-        # For args that don't have any value, set defaults
-        arg_with_no_values_count = len(arg_names) - (len(argv_list) + len(kwargs))
-        # Number of arguments for which defaults should be used
-        defaults_count = min(arg_with_no_values_count, len(default_arg_values))
+        # Capture all **kwargs values
+        for arg_name, arg_val in kwargs.items():
+            if arg_name not in skip_args:
+                inputs[arg_name] = capture_policy.capture(arg_val) if isinstance(arg_val, str) else arg_val
 
         # Arguments for which values are not passed but defaults are specified, use defaults
-        for arg_names, arg_val in zip(arg_names[-defaults_count:], default_arg_values[-defaults_count:]):
-            if isinstance(arg_val, Hashable):
-                args_to_log[LogLiterals.INPUTS][arg_name] = str(arg_val)
+        for position, arg_name, default_value in self.hashable_defaults:
+            if position >= len(argv) and arg_name not in kwargs and arg_name not in skip_args:
+                inputs[arg_name] = capture_policy.capture(default_value)
 
-    args_to_log[LogLiterals.OUTPUTS] = output
-    args_to_log[LogLiterals.META][LogLiterals.EXEC_SEC] = execution_time
-    args_to_log[LogLiterals.META][LogLiterals.TIMESTAMP] = datetime.now()
+        args_to_log[LogLiterals.OUTPUTS] = output
+        args_to_log[LogLiterals.META][LogLiterals.EXEC_SEC] = execution_time
+        args_to_log[LogLiterals.META][LogLiterals.TIMESTAMP] = datetime.now()
 
-    return args_to_log
+        return args_to_log
+
+
+def run_method_get_io_dict(method_obj, del_self_arg: bool, *argv, **kwargs) -> Dict:
+    """
+    Run method method_obj with *argv as arguments.
+    Create dictionary of all input/ output and other meta data elements to be eventually logged to file.
+    Method is introspected on every call. Decorators should create SignaturePlan once & call SignaturePlan.run().
+
+    :param method_obj: method reference
+    :param del_self_arg: True if we shouldn't include `self` variable in output dictionary
+    :param argv: Arguments that needs to be passed to method as *argv
+    :param kwargs: Arguments that needs to be passed to method as **kwargs
+
+    :return: Dict that has inputs, outputs and meta data to be logged
+    """
+    return SignaturePlan(method_obj, del_self_arg).run(FULL_CAPTURE_POLICY, *argv, **kwargs)
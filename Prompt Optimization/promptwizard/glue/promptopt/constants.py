@@ -8,6 +8,10 @@ from ..common.base_classes import UniversalBaseClass
 # Hyperparameters defined in promptopt_config.yaml
 class SupportedPromptOpt(Enum):
     CRITIQUE_N_REFINE = "critique_n_refine"
+    # Critique & refine, where candidate prompts are chosen by successive halving instead of greedy top_n
+    SUCCESSIVE_HALVING = "successive_halving"
+    # Critique & refine, where top_n candidate prompts are kept as a beam & all of them are mutated every round
+    BEAM_SEARCH = "beam_search"
 
     @classmethod
     def all_values(cls):
@@ -23,6 +27,14 @@ class PromptOptimizationLiterals:
     PROMPT_TECHNIQUE_NAME = "prompt_technique_name"
 
 
+@dataclass
+class SeenSetSampling:
+    # First `seen_set_size` rows of dataset are used as training data
+    FIRST = "first"
+    # `seen_set_size` rows drawn uniformly at random from whole dataset are used as training data
+    RESERVOIR = "reservoir"
+
+
 @dataclass
 class PromptOptimizationParams(UniversalBaseClass):
     """
@@ -1,15 +1,22 @@
-from os.path import dirname, join
+import asyncio
+from collections import deque
+from os.path import dirname, exists, join
 import pickle
+import sys
 import time
-from typing import Any
+from typing import Any, Dict, Set, Tuple
 
 from ..common.base_classes import LLMConfig, SetupConfig
 from ..common.constants.log_strings import CommonLogsStr
+from ..common.constants.str_literals import LLMPhases
 from ..common.llm.llm_mgr import LLMMgr
+from ..common.llm.usage_tracker import in_llm_phase
 from ..common.utils.logging import get_glue_logger, set_logging_config
-from ..common.utils.file import read_jsonl, yaml_to_class, yaml_to_dict, read_jsonl_row
+from ..common.utils.concurrency import LLMSlots, run_coroutine_sync, run_in_thread
+from ..common.exceptions import GlueValidaionException
+from ..common.utils.file import JsonlDataset, yaml_to_class, yaml_to_dict, read_jsonl_row
 from ..paramlogger import ParamLogger
-from ..promptopt.constants import PromptOptimizationLiterals
+from ..promptopt.constants import PromptOptimizationLiterals, SeenSetSampling
 from ..promptopt.techniques.common_logic import DatasetSpecificProcessing
 from ..promptopt.utils import get_promptopt_class
 
@@ -39,12 +46,12 @@ class GluePromptOpt:
         data_processor: DatasetSpecificProcessing,
         dataset_processor_pkl_path: str = None,
         prompt_pool_path: str = None,
+        llm_config_path: str = None,
     ):
         """
         Collates all the configs present in different yaml files. Initialize logger, de-serialize pickle file that has
         class/method for dataset processing (for given dataset).
 
-        :param llm_config_path: Path to yaml file that has LLM related configs.
         :param prompt_config_path: Path to yaml file that has prompt templates for the given techniques.
         :param setup_config_path: Path to yaml file that has user preferences.
         :param dataset_jsonl: Path to jsonl file that has dataset present in jsonl format.
@@ -53,6 +60,7 @@ class GluePromptOpt:
         :param dataset_processor_pkl_path: Path to pickle file that has object of class DatasetSpecificProcessing
                                            serialized.
         :param prompt_pool_path: Path to yaml file that has prompts
+        :param llm_config_path: Path to yaml file that has LLM related configs e.g. rate limits of deployments.
         """
         if dataset_jsonl != None:
             if data_processor:
@@ -63,6 +71,9 @@ class GluePromptOpt:
                         file
                     )  # datatype: class DatasetSpecificProcessing
 
+        if llm_config_path:
+            LLMMgr.configure(yaml_to_class(llm_config_path, LLMConfig))
+
         prompt_config_dict = yaml_to_dict(prompt_config_path)
         prompt_opt_cls, prompt_opt_hyperparam_cls, promptpool_cls = get_promptopt_class(
             prompt_config_dict[PromptOptimizationLiterals.PROMPT_TECHNIQUE_NAME]
@@ -73,11 +84,9 @@ class GluePromptOpt:
         self.prompt_opt_param = yaml_to_class(
             prompt_config_path, prompt_opt_hyperparam_cls
         )
-        current_dir = dirname(__file__)
+        # Default prompts are kept next to the module of technique, which can be shared by several technique names
         default_yaml_path = join(
-            current_dir,
-            "techniques",
-            prompt_config_dict[PromptOptimizationLiterals.PROMPT_TECHNIQUE_NAME],
+            dirname(sys.modules[prompt_opt_cls.__module__].__file__),
             "prompt_pool.yaml",
         )
 
@@ -86,7 +95,18 @@ class GluePromptOpt:
         )
 
         if dataset_jsonl != None:
-            dataset = read_jsonl(dataset_jsonl)
+            # Rows are indexed by byte offset & parsed only when accessed, so large datasets aren't loaded in memory
+            seen_set_sampling = getattr(self.prompt_opt_param, "seen_set_sampling", SeenSetSampling.FIRST)
+            if seen_set_sampling == SeenSetSampling.RESERVOIR:
+                dataset = JsonlDataset.reservoir_sample(dataset_jsonl, self.prompt_opt_param.seen_set_size)
+            elif seen_set_sampling == SeenSetSampling.FIRST:
+                dataset = JsonlDataset(dataset_jsonl, max_rows=self.prompt_opt_param.seen_set_size)
+            else:
+                raise GlueValidaionException(
+                    f"Invalid value `{seen_set_sampling}` for seen_set_sampling. Valid values are "
+                    f"{SeenSetSampling.FIRST}, {SeenSetSampling.RESERVOIR}",
+                    None,
+                )
         self.prompt_opt_param.answer_format += (
             self.prompt_pool.ans_delimiter_instruction
         )
@@ -144,9 +164,11 @@ class GluePromptOpt:
         use_examples=False,
         run_without_train_examples=False,
         generate_synthetic_examples=False,
+        resume=False,
     ) -> (str, Any):
         """
         Call get_best_prompt() method of class PromptOptimizer & return its value.
+        :param resume: If True, continue from the checkpoint saved by an earlier, interrupted run of this experiment.
         :return: (best_prompt, expert_profile)
             best_prompt-> Best prompt for a given task description
             expert_profile-> Description of an expert who is apt to solve the task at hand. LLM would be asked to take
@@ -159,6 +181,7 @@ class GluePromptOpt:
             use_examples=use_examples,
             run_without_train_examples=run_without_train_examples,
             generate_synthetic_examples=generate_synthetic_examples,
+            resume=resume,
         )
 
         self.logger.info(
@@ -166,11 +189,19 @@ class GluePromptOpt:
         )
         return self.BEST_PROMPT, self.EXPERT_PROFILE
 
-    def evaluate(self, test_dataset_jsonl: str) -> float:
+    @in_llm_phase(LLMPhases.EVALUATION)
+    def evaluate(
+        self, test_dataset_jsonl: str, num_workers: int = 1, resume: bool = False
+    ) -> float:
         """
         Evaluate the performance of self.BEST_PROMPT over test dataset. Return the accuracy.
+        Up to `num_workers` questions are evaluated concurrently. Results are written to eval_result_*.jsonl file in
+        order of questions in test dataset, as and when they are available.
 
         :param test_dataset_jsonl: Path to jsonl file that has test dataset
+        :param num_workers: Number of questions to be evaluated concurrently
+        :param resume: If True, skip questions already present in eval_result_*.jsonl file of this experiment and
+                       continue accuracy computation from there.
         :return: Percentage accuracy
         """
 
@@ -183,29 +214,124 @@ class GluePromptOpt:
             )
             return
 
+        eval_file_name = f"eval_result_{self.setup_config.experiment_name}"
+        self.iolog.set_chained_log_target(eval_file_name)
+        completed_indices = set()
         total_correct = 0
-        total_count = 0
-        for json_obj in read_jsonl_row(test_dataset_jsonl):
-            answer = self.predict_and_access(
-                json_obj[DatasetSpecificProcessing.QUESTION_LITERAL],
-                json_obj[DatasetSpecificProcessing.FINAL_ANSWER_LITERAL],
+        if resume:
+            # Results that an interrupted run had spilled to disk, but not yet written to eval file
+            self.iolog.recover_chained_log(file_name=eval_file_name)
+            completed_indices, total_correct = self.read_eval_progress(
+                join(self.iolog.BASE_PATH, eval_file_name + ".jsonl")
+            )
+            self.logger.info(
+                f"Resuming evaluation. {len(completed_indices)} questions are already evaluated."
+            )
+
+        total_correct, total_count = run_coroutine_sync(
+            self.evaluate_async(
+                test_dataset_jsonl,
+                eval_file_name,
+                max(1, num_workers),
+                completed_indices,
+                total_correct,
             )
+        )
+
+        self.logger.info(f"Time taken for evaluation: {(time.time() - start_time)} sec")
+        LLMMgr.usage_tracker.export(self.iolog.BASE_PATH)
+        return total_correct / total_count
+
+    async def evaluate_async(
+        self,
+        test_dataset_jsonl: str,
+        eval_file_name: str,
+        num_workers: int,
+        completed_indices: Set[int],
+        total_correct: int,
+    ) -> Tuple[int, int]:
+        """
+        Evaluate questions in test dataset with at most `num_workers` LLM calls in flight. Only a bounded window of
+        questions is read ahead of the oldest question whose result isn't written yet. Results are collected in
+        chained log, which spills them to disk in chunks, & are written to eval file once every
+        CHAINED_LOG_CHUNK_SIZE results & at the end.
+
+        :param test_dataset_jsonl: Path to jsonl file that has test dataset
+        :param eval_file_name: Name of file (without extension) to which results are written
+        :param num_workers: Number of questions to be evaluated concurrently
+        :param completed_indices: Index of questions that are already evaluated and should be skipped
+        :param total_correct: Number of correctly answered questions among `completed_indices`
+        :return: (total_correct, total_count) over all the questions in test dataset
+        """
+        llm_slots = LLMSlots(num_workers)
+        window_size = 2 * num_workers
+        in_flight = deque()
+        total_count = len(completed_indices)
 
+        def write_result(index: int, json_obj: Dict, answer: Dict) -> None:
+            nonlocal total_correct, total_count
             total_correct += answer[self.EvalLiterals.IS_CORRECT]
             total_count += 1
             result = {
+                "index": index,
                 "accuracy": f"{total_correct}/{total_count} : {total_correct/total_count}%",
+                self.EvalLiterals.IS_CORRECT: answer[self.EvalLiterals.IS_CORRECT],
                 "predicted": answer[self.EvalLiterals.PREDICTED_ANS],
                 "actual": json_obj[DatasetSpecificProcessing.FINAL_ANSWER_LITERAL],
             }
             self.iolog.append_dict_to_chained_logs(result)
             self.logger.info(result)
+            if len(self.iolog.CHAINED_LOG) >= self.iolog.CHAINED_LOG_CHUNK_SIZE:
+                self.iolog.dump_chained_log_to_file(file_name=eval_file_name)
 
-        self.iolog.dump_chained_log_to_file(
-            file_name=f"eval_result_{self.setup_config.experiment_name}"
-        )
-        self.logger.info(f"Time taken for evaluation: {(time.time() - start_time)} sec")
-        return total_correct / total_count
+        for index, json_obj in enumerate(read_jsonl_row(test_dataset_jsonl)):
+            if index in completed_indices:
+                continue
+            in_flight.append(
+                (
+                    index,
+                    json_obj,
+                    asyncio.ensure_future(
+                        run_in_thread(
+                            llm_slots,
+                            self.predict_and_access,
+                            json_obj[DatasetSpecificProcessing.QUESTION_LITERAL],
+                            json_obj[DatasetSpecificProcessing.FINAL_ANSWER_LITERAL],
+                        )
+                    ),
+                )
+            )
+            if len(in_flight) >= window_size:
+                index, json_obj, answer_future = in_flight.popleft()
+                write_result(index, json_obj, await answer_future)
+
+        while in_flight:
+            index, json_obj, answer_future = in_flight.popleft()
+            write_result(index, json_obj, await answer_future)
+
+        self.iolog.dump_chained_log_to_file(file_name=eval_file_name)
+        self.iolog.flush()
+        return total_correct, total_count
+
+    @staticmethod
+    def read_eval_progress(eval_file_path: str) -> Tuple[Set[int], int]:
+        """
+        Read results written by an earlier (possibly interrupted) run of evaluate().
+
+        :param eval_file_path: Path to eval_result_*.jsonl file
+        :return: (completed_indices, total_correct) completed_indices-> Index of questions already evaluated
+                                                    total_correct-> Number of them answered correctly
+        """
+        completed_indices = set()
+        total_correct = 0
+        if not exists(eval_file_path):
+            return completed_indices, total_correct
+
+        for result in read_jsonl_row(eval_file_path):
+            if "index" in result and result["index"] not in completed_indices:
+                completed_indices.add(result["index"])
+                total_correct += result.get(GluePromptOpt.EvalLiterals.IS_CORRECT, False)
+        return completed_indices, total_correct
 
     @iolog.log_io_params
     def predict_and_access(self, question: str, gt_answer: str) -> (bool, str, str):
@@ -225,7 +351,9 @@ class GluePromptOpt:
             instruction=self.BEST_PROMPT, question=question
         )
         llm_output = self.prompt_opt.chat_completion(
-            user_prompt=final_prompt, system_prompt=self.EXPERT_PROFILE
+            user_prompt=final_prompt,
+            system_prompt=self.EXPERT_PROFILE,
+            expected_answers=1 if getattr(self.prompt_opt_param, "stream_answers", False) else None,
         )
 
         is_correct, predicted_ans = self.data_processor.access_answer(
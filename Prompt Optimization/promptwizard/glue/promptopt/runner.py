@@ -1,5 +1,4 @@
 import argparse
-from glue.promptopt.instantiate import GluePromptOpt
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description="Arguments needed by prompt manager")
@@ -10,20 +9,26 @@ if __name__ == '__main__':
     parser.add_argument('--test_file_name', default=None)
     parser.add_argument('--dataset_processor_pkl_path', default=None)
     parser.add_argument('--prompt_pool_path', default=None)
+    parser.add_argument('--resume', action='store_true',
+                        help="Continue from checkpoint of an earlier, interrupted run of this experiment")
 
     args = parser.parse_args()
 
-    gp = GluePromptOpt(args.llm_config_path,
-                       args.promptopt_config_path,
+    # Imported after parsing arguments, so that --help & argument errors don't wait for the optimizer to load
+    from glue.promptopt.instantiate import GluePromptOpt
+
+    gp = GluePromptOpt(args.prompt_config_path,
                        args.setup_config_path,
                        args.train_file_name,
+                       None,
                        args.dataset_processor_pkl_path,
-                       args.prompt_pool_path)
+                       args.prompt_pool_path,
+                       llm_config_path=args.llm_config_path)
 
-    best_prompt, expert_profile = gp.get_best_prompt()
+    best_prompt, expert_profile = gp.get_best_prompt(resume=args.resume)
     print(f"Best prompt: {best_prompt} \nExpert profile: {expert_profile}")
 
     if args.test_file_name:
-        accuracy = gp.evaluate(args.test_file_name)
+        accuracy = gp.evaluate(args.test_file_name, resume=args.resume)
         print(f"accuracy: {accuracy}")
 
@@ -0,0 +1,134 @@
+import re
+import string
+from dataclasses import dataclass, field
+from typing import Any, List, Tuple
+
+# Translation table that deletes punctuation. Built once, as building it is costlier than translating short answers.
+PUNCTUATION_TABLE = str.maketrans("", "", string.punctuation)
+
+
+@dataclass
+class AnswerParseFailureReasons:
+    # LLM output has fewer delimited answers than questions asked, so answers can't be mapped to questions
+    MISSING_ANSWERS = "missing_answers"
+    # LLM output has no delimited answer at all
+    NO_ANSWER = "no_answer"
+
+
+@dataclass
+class AnswerParseFailure:
+    """
+    A question whose answer couldn't be extracted from LLM output.
+    """
+    # Position of question in mini-batch
+    index: int
+    # One of AnswerParseFailureReasons
+    reason: str
+    # Number of delimited answers found in LLM output
+    answers_found: int
+    questions_asked: int
+
+
+@dataclass
+class ExtractedAnswers:
+    """
+    Answers extracted from output of a mini-batch, aligned with the questions of mini-batch.
+    """
+    # Answer for each question, in order. None for questions whose answer couldn't be extracted.
+    answers: List[Any]
+    failures: List[AnswerParseFailure] = field(default_factory=list)
+
+
+class AnswerExtractor:
+    """
+    Extracts answers wrapped between start & end delimiters from LLM output, with patterns compiled once.
+    """
+
+    def __init__(self, start_delimiter: str = "<ANS_START>", end_delimiter: str = "<ANS_END>"):
+        """
+        :param start_delimiter: Text that marks start of an answer
+        :param end_delimiter: Text that marks end of an answer
+        """
+        self.start_delimiter = start_delimiter
+        self.end_delimiter = end_delimiter
+        self.pattern = re.compile(re.escape(start_delimiter) + "(.*?)" + re.escape(end_delimiter), re.DOTALL)
+
+    def extract_all(self, text: str) -> List[str]:
+        """
+        :param text: Output of LLM
+        :return: All the delimited answers in `text`, in order
+        """
+        return self.pattern.findall(text)
+
+    def wrap(self, answer: str) -> str:
+        """
+        :param answer: Answer extracted from LLM output
+        :return: Answer wrapped between delimiters, as it was in LLM output
+        """
+        return f"{self.start_delimiter}{answer}{self.end_delimiter}"
+
+    def align(self, text: str, questions_count: int) -> ExtractedAnswers:
+        """
+        Map delimited answers in `text` to `questions_count` questions, in order. When there are more answers than
+        questions, last `questions_count` answers are used. When there are fewer, answers can't be attributed to
+        questions, so every question is reported as a parse failure.
+
+        :param text: Output of LLM, that has answers for a mini-batch of questions
+        :param questions_count: Number of questions asked in mini-batch
+        :return: Object of ExtractedAnswers
+        """
+        answers = self.extract_all(text)
+        if len(answers) >= questions_count:
+            return ExtractedAnswers(answers[len(answers) - questions_count:])
+
+        reason = AnswerParseFailureReasons.NO_ANSWER if not answers else AnswerParseFailureReasons.MISSING_ANSWERS
+        return ExtractedAnswers(
+            [None] * questions_count,
+            [AnswerParseFailure(index, reason, len(answers), questions_count) for index in range(questions_count)],
+        )
+
+
+def normalize_prediction(prediction: str, lowercase: bool = True) -> str:
+    """
+    Reduce predicted answer to its first sentence, without punctuation, so that it can be compared with ground truth.
+
+    :param prediction: Answer predicted by LLM
+    :param lowercase: Lowercase the answer
+    :return: Normalized answer
+    """
+    prediction = prediction.replace(" and ", " ")
+    prediction = prediction.replace("Sentence 1:", " ")
+    prediction = prediction.replace("Sentence 2:", " ")
+    prediction = prediction.strip()
+    prediction = prediction.split("\n")[0]
+    prediction = prediction.split(".")[0]
+
+    if lowercase:
+        prediction = prediction.lower()
+
+    # remove punctuation
+    prediction = prediction.replace("-", " ")
+    return prediction.translate(PUNCTUATION_TABLE)
+
+
+def normalize_predictions(predictions: List[str], lowercase: bool = True) -> List[str]:
+    """
+    :param predictions: Answers predicted by LLM
+    :param lowercase: Lowercase the answers
+    :return: Normalized answers, in same order
+    """
+    return [normalize_prediction(prediction, lowercase) for prediction in predictions]
+
+
+def compare_answers(predictions: List[str], gt_answers: List[str]) -> List[Tuple[bool, str]]:
+    """
+    Case insensitive comparison of predicted answers with ground truth, element-wise.
+
+    :param predictions: Answers predicted by LLM. Empty/ None answers are never correct.
+    :param gt_answers: Ground truth answers
+    :return: List of (is_correct, predicted_answer)
+    """
+    return [
+        (bool(prediction) and prediction.lower() == gt_answer.lower(), prediction)
+        for prediction, gt_answer in zip(predictions, gt_answers)
+    ]
@@ -1,7 +1,9 @@
 from abc import abstractmethod, ABC
-from typing import Any, List
+from dataclasses import dataclass, field
+from typing import Any, Callable, List, Tuple
 
 from ..constants import PromptOptimizationParams
+from .answer_extraction import compare_answers, normalize_prediction, normalize_predictions
 
 
 class PromptOptimizer(ABC):
@@ -16,6 +18,57 @@ class PromptOptimizer(ABC):
         pass
 
 
+@dataclass
+class ScoredPrompt:
+    """
+    Result of evaluating a candidate prompt in a search strategy.
+    """
+    prompt: str
+    # Whether prompt answered each question correctly, for the first len(correctness) questions of search
+    correctness: List[bool] = field(default_factory=list)
+
+    @property
+    def score(self) -> float:
+        return sum(self.correctness) / len(self.correctness) if self.correctness else 0.0
+
+
+class SearchStrategy(ABC):
+    """
+    Parent class for strategies that decide which candidate prompts survive a round of prompt optimization, & on how
+    many questions each candidate is evaluated before that decision is made. Strategies don't talk to LLM. They are
+    given an `evaluate` method by prompt optimizer, that returns correctness of prompts on questions & is expected to
+    remember answers, so that strategies can ask for the same (prompt, question) pair again at no cost.
+    """
+    STRATEGY_NAME = ""
+
+    @abstractmethod
+    def select(
+        self,
+        candidates: List[str],
+        questions: List,
+        evaluate: Callable[[List[str], List], List[List[bool]]],
+        keep: int,
+        batch_size: int = 1,
+    ) -> List[ScoredPrompt]:
+        """
+        :param candidates: Prompts to choose from
+        :param questions: Examples from dataset on which candidates can be evaluated, in the order they should be used
+        :param evaluate: Method that takes prompts & examples, and returns for each prompt, whether it answered each
+                         of the examples correctly
+        :param keep: Max number of prompts to return
+        :param batch_size: Number of questions asked to LLM in a single call. Questions are consumed in multiples of it.
+        :return: Best `keep` candidates, best first
+        """
+        pass
+
+    def frontier(self, ranked_prompts: List[str]) -> List[str]:
+        """
+        :param ranked_prompts: Prompts returned by select() in last round, best first
+        :return: Prompts to be mutated in next round
+        """
+        return ranked_prompts[:1]
+
+
 class DatasetSpecificProcessing(ABC):
     """
     Prompt Optimizer is agnostic of dataset on which its run. There are few processing requirements that are specific
@@ -38,24 +91,20 @@ class DatasetSpecificProcessing(ABC):
     
     
     def normalize_prediction(self, prediction, lowercase=True):
-        import re
-        import string
-        prediction = prediction.replace(' and ', ' ')
-        prediction = prediction.replace('Sentence 1:', ' ')
-        prediction = prediction.replace('Sentence 2:', ' ')
-        prediction = prediction.strip()
-        prediction = prediction.split("\n")[0]
-        prediction = prediction.split(".")[0]
-
-        if lowercase:
-            prediction = prediction.lower()
-
-        # remove punctuation
-        prediction = prediction.replace('-', ' ')
-        prediction = prediction.translate(
-            str.maketrans('', '', string.punctuation))
-
-        return prediction
+        return normalize_prediction(prediction, lowercase)
+
+    def normalize_predictions(self, predictions: List[str], lowercase: bool = True) -> List[str]:
+        """
+        Batch version of normalize_prediction()
+
+        :param predictions: Answers predicted by LLM
+        :param lowercase: Lowercase the answers
+        :return: Normalized answers, in same order
+        """
+        if type(self).normalize_prediction is not DatasetSpecificProcessing.normalize_prediction:
+            return [self.normalize_prediction(prediction, lowercase) for prediction in predictions]
+        return normalize_predictions(predictions, lowercase)
+
     def access_answer(self, llm_output: str, gt_answer: str) -> (bool, Any):
         """
         Compare answer generated by model with the answer in ground truth.
@@ -73,8 +122,20 @@ class DatasetSpecificProcessing(ABC):
             is_correct = True
 
         return is_correct, predicted_answer
-   
-    
+
+    def access_answers(self, llm_outputs: List[str], gt_answers: List[str]) -> List[Tuple[bool, Any]]:
+        """
+        Batch version of access_answer(). Compare each answer generated by model with its ground truth answer.
+        When access_answer() isn't overridden, answers are extracted & compared in one pass over the lists.
+
+        :param llm_outputs: Outputs of LLM i.e. the predicted answers
+        :param gt_answers: The expected ground truth answers, in same order
+        :return: List of (is_correct, predicted_answer) for each output
+        """
+        if type(self).access_answer is not DatasetSpecificProcessing.access_answer:
+            return [self.access_answer(llm_output, gt_answer) for llm_output, gt_answer in zip(llm_outputs, gt_answers)]
+        return compare_answers([self.extract_final_answer(llm_output) for llm_output in llm_outputs], gt_answers)
+
 
     def collate_to_str(self, examples: List, example_template: str) -> str:
         """
@@ -19,6 +19,7 @@ class CritiqueNRefinePromptPool(PromptPool):
     examples_critique_template: str
     examples_optimization_template: str
     meta_sample_template: str
+    meta_sample_json_template: str
     intent_template: str
     expert_template: str
     generate_reason_template: str
@@ -67,3 +68,40 @@ class CritiqueNRefineParams(PromptOptimizationParams, UniversalBaseClass):
     generate_intent_keywords: bool
     # number of synthetic training examples to be generated
     num_train_examples: int
+    # Max number of LLM calls that can be in flight at the same time
+    max_concurrency: int = 1
+    # Number of mini-batches of a prompt that can be solved ahead of time, while its earlier mini-batches are
+    # being evaluated. Mini-batches solved beyond the point where evaluation stops are wasted.
+    eval_batch_lookahead: int = 1
+    # How `seen_set_size` rows are picked from dataset. Either "first" or "reservoir" (uniformly at random, drawn
+    # in a single pass over dataset file)
+    seen_set_sampling: str = "first"
+    # Number of training questions asked in a single LLM call, when looking for examples that are answered wrongly,
+    # to be given as few shots
+    few_shot_mining_batch_size: int = 1
+    # Ask for all the mutated prompts of a mutation step in a single LLM call, as a JSON response, instead of making
+    # `mutation_rounds` calls
+    mutation_json_mode: bool = False
+    # Stream completions of calls that answer questions & stop generation as soon as answers to all the questions are
+    # received, instead of waiting for LLM to finish generating
+    stream_answers: bool = False
+    # Max number of tokens that few shot examples can take in final prompt. Examples that don't fit are dropped,
+    # preferring to keep earlier & mutually different ones. None keeps all the examples.
+    few_shot_token_budget: int = None
+    # Trade-off between preference order (0) & diversity (1) of examples, when packing them in token budget
+    few_shot_diversity_weight: float = 0.5
+    # Model whose tokenizer is used to count tokens of few shot examples
+    tokenizer_model: str = "gpt-4o"
+    # Number of times reasoning generation of a few shot example is retried, when it fails
+    reasoning_retries: int = 2
+    # Max number of questions on which a candidate prompt is evaluated, when a search strategy (successive_halving,
+    # beam_search) chooses candidates. None uses `max_eval_batches` mini-batches of questions.
+    search_eval_budget: int = None
+    # Candidate prompts whose estimated word 3-gram (shingle) overlap is at least this, are collapsed into one before
+    # scoring. None turns off deduplication.
+    dedup_similarity_threshold: float = 0.8
+    # unique_model_id of embedding model in llm config, used to also collapse paraphrased candidate prompts. None
+    # compares prompts only by their words.
+    dedup_embedding_model: str = None
+    # Candidate prompts whose embeddings have at least this cosine similarity are collapsed into one
+    dedup_embedding_threshold: float = 0.95
@@ -1,6 +1,9 @@
+import asyncio
+import os
 import random
 import re
-from os.path import join
+from dataclasses import asdict
+from os.path import exists, join
 from tqdm import tqdm
 from typing import Any, Dict, List
 import json
@@ -9,9 +12,17 @@ from ....paramlogger import ParamLogger
 from ....paramlogger.constants import LogLiterals
 from ....common.base_classes import SetupConfig, UniversalBaseClass
 from ....common.llm.llm_mgr import LLMMgr
+from ....common.llm.usage_tracker import in_llm_phase, llm_phase
 from ....common.constants.log_strings import CommonLogsStr
+from ....common.constants.str_literals import LLMLiterals, LLMPhases
+from ....common.exceptions import GlueLLMException
+from ....common.utils.concurrency import LLMSlots, run_coroutine_sync, run_in_thread
 from ...constants import PromptOptimizationParams, SupportedPromptOpt
-from ...techniques.common_logic import DatasetSpecificProcessing, PromptOptimizer
+from ...techniques.answer_extraction import AnswerExtractor
+from ...techniques.common_logic import DatasetSpecificProcessing, PromptOptimizer, ScoredPrompt, SearchStrategy
+from ...techniques.few_shot_packing import get_token_counter, pack_examples
+from ...techniques.prompt_dedup import MinHasher, deduplicate
+from ...techniques.search_strategies import BeamSearchStrategy, EvaluationMemo, SuccessiveHalvingStrategy
 from ...techniques.critique_n_refine.base_classes import CritiqueNRefinePromptPool
 
 
@@ -39,6 +50,30 @@ def extract_between(start, end, text):
     return text[start_index:end_index]
 
 
+def extract_json_prompts(text: str) -> List[str]:
+    """
+    Extracts the prompts from a JSON object of the form {"prompts": [...]}, that is present in 'text'.
+
+    Parameters:
+    - text (str): The text to search within. Text before the first '{' and after the last '}' is ignored.
+
+    Returns:
+    - List[str]: The extracted prompts. Empty list if no such JSON object could be parsed.
+    """
+    start_index = text.find("{")
+    end_index = text.rfind("}")
+    if start_index == -1 or end_index < start_index:
+        return []
+    try:
+        parsed_json = json.loads(text[start_index: end_index + 1])
+    except json.JSONDecodeError:
+        return []
+    prompts = parsed_json.get("prompts") if isinstance(parsed_json, dict) else None
+    if not isinstance(prompts, list):
+        return []
+    return [prompt for prompt in prompts if isinstance(prompt, str) and prompt.strip()]
+
+
 class CritiqueNRefine(PromptOptimizer, UniversalBaseClass):
     """
     TODO: Explain this method
@@ -58,6 +93,13 @@ class CritiqueNRefine(PromptOptimizer, UniversalBaseClass):
 
     # This has to defined outside of constructor, so that it can be used as decorator.
     iolog = ParamLogger()
+    # Extracts answers of mini-batches from LLM output, with patterns compiled once
+    answer_extractor = AnswerExtractor(DatasetSpecificProcessing.ANSWER_START, DatasetSpecificProcessing.ANSWER_END)
+    # Computes signatures of candidate prompts, to find near identical ones
+    prompt_minhasher = MinHasher()
+    # Strategy that chooses top_n candidate prompts in every round. None scores each candidate on its own random
+    # mini-batches & keeps the greedy top_n.
+    search_strategy: SearchStrategy = None
 
     def __init__(
         self,
@@ -73,18 +115,37 @@ class CritiqueNRefine(PromptOptimizer, UniversalBaseClass):
         self.data_processor = data_processor
         self.logger = logger
         self.prompt_pool = prompt_pool
+        # Progress of get_best_prompt() is saved here, so that an interrupted run can be resumed
+        self.checkpoint_path = join(base_path, "checkpoint.json")
+        # Correctness of (prompt, question) pairs evaluated by search strategy, shared by all the rounds
+        self.evaluation_memo = EvaluationMemo()
+        # Questions on which search strategy evaluates candidates & their indices in dataset. Drawn once, so that memo
+        # is reused across rounds.
+        self.search_questions = None
+        self.search_question_indices = None
         base_path = join(base_path, LogLiterals.DIR_NAME)
         self.iolog.reset_eval_glue(base_path)
+        # Records chained during search are dumped to best_prompt.jsonl when checkpoint is saved
+        self.iolog.set_chained_log_target("best_prompt")
 
     @iolog.log_io_params
-    def chat_completion(self, user_prompt: str, system_prompt: str = None):
+    def chat_completion(
+        self, user_prompt: str, system_prompt: str = None, expected_answers: int = None, cache_salt: str = None
+    ):
         """
         Make a chat completion request to the OpenAI API.
 
         :param user_prompt: Text spoken by user in a conversation.
         :param system_prompt: Text spoken by system in a conversation.
+        :param expected_answers: If set, generation is stopped once these many answers wrapped between <ANS_START>
+                                 and <ANS_END> are received.
+        :param cache_salt: Distinguishes, in response cache, requests that are repeated to get different responses.
         :return: Output of LLM
         """
+        # Arguments are looked up as they were logged, before system prompt is defaulted
+        response = LLMMgr.replay(user_prompt, system_prompt, expected_answers, cache_salt)
+        if response is not None:
+            return response
         if not system_prompt:
             system_prompt = self.prompt_pool.system_prompt
 
@@ -92,9 +153,10 @@ class CritiqueNRefine(PromptOptimizer, UniversalBaseClass):
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": user_prompt},
         ]
-        response = LLMMgr.chat_completion(messages)
+        response = LLMMgr.chat_completion(messages, expected_answers=expected_answers, cache_salt=cache_salt)
         return response
 
+    @in_llm_phase(LLMPhases.MUTATION)
     @iolog.log_io_params
     def gen_different_styles(
         self,
@@ -102,6 +164,8 @@ class CritiqueNRefine(PromptOptimizer, UniversalBaseClass):
         task_description: str,
         mutation_rounds: int = 2,
         thinking_styles_count: int = 10,
+        max_concurrency: int = 1,
+        json_mode: bool = False,
     ) -> List:
         """
         Generate different variations of base_instruction by mixing thinking styles.
@@ -111,21 +175,42 @@ class CritiqueNRefine(PromptOptimizer, UniversalBaseClass):
         :param mutation_rounds: Number of rounds of mutation to be performed when generating different styles.
         :param thinking_styles_count: Number of different thinking styles descriptions to be taken from the pool of
                                       thinking styles and given to LLM as reference (in context).
+        :param max_concurrency: Max number of mutation rounds whose LLM calls can be in flight at the same time.
+        :param json_mode: If True, ask for variations of all the rounds in a single LLM call, as a JSON response.
 
         :return: List of prompts generated in `mutation_rounds` rounds of mutation.
         """
         candidate_prompts = [task_description + "\n" + base_instruction]
 
-        for mutation_round in range(mutation_rounds):
-            mutated_sample_prompt = self.prompt_pool.meta_sample_template.format(
-                task_description=task_description,
-                meta_prompts="\n".join(
-                    self.prompt_pool.thinking_styles[:thinking_styles_count]
-                ),
-                num_variations=thinking_styles_count,
-                prompt_instruction=base_instruction,
+        if json_mode:
+            candidate_prompts.extend(
+                self.gen_styles_as_json(
+                    base_instruction,
+                    task_description,
+                    mutation_rounds * thinking_styles_count,
+                    thinking_styles_count,
+                )
+            )
+            return candidate_prompts
+
+        mutated_sample_prompt = self.prompt_pool.meta_sample_template.format(
+            task_description=task_description,
+            meta_prompts="\n".join(
+                self.prompt_pool.thinking_styles[:thinking_styles_count]
+            ),
+            num_variations=thinking_styles_count,
+            prompt_instruction=base_instruction,
+        )
+        # Rounds don't depend on each other, so all of them are run concurrently
+        generated_mutated_prompts = run_coroutine_sync(
+            self.run_mutation_rounds_async(
+                mutated_sample_prompt, mutation_rounds, max_concurrency
             )
-            generated_mutated_prompt = self.chat_completion(mutated_sample_prompt)
+        )
+
+        for mutation_round, generated_mutated_prompt in enumerate(
+            generated_mutated_prompts
+        ):
             # Find all matches of the pattern in the text
             matches = re.findall(
                 DatasetSpecificProcessing.TEXT_DELIMITER_PATTERN_MUTATION,
@@ -140,6 +225,77 @@ class CritiqueNRefine(PromptOptimizer, UniversalBaseClass):
 
         return candidate_prompts
 
+    async def run_mutation_rounds_async(
+        self, mutated_sample_prompt: str, mutation_rounds: int, max_concurrency: int
+    ) -> List[str]:
+        """
+        Make LLM calls of all the mutation rounds, with at most `max_concurrency` of them in flight.
+
+        :param mutated_sample_prompt: Prompt asking LLM to generate variations of instruction
+        :param mutation_rounds: Number of rounds of mutation
+        :param max_concurrency: Max number of LLM calls that can be in flight at the same time
+        :return: Output of LLM for each round, in order of rounds
+        """
+        llm_slots = LLMSlots(max_concurrency)
+        return list(
+            await asyncio.gather(
+                *[
+                    # Same prompt is sent in every round, so each round is cached separately
+                    run_in_thread(
+                        llm_slots,
+                        self.chat_completion,
+                        mutated_sample_prompt,
+                        cache_salt=f"mutation_round={mutation_round}",
+                    )
+                    for mutation_round in range(mutation_rounds)
+                ]
+            )
+        )
+
+    def gen_styles_as_json(
+        self,
+        base_instruction: str,
+        task_description: str,
+        num_variations: int,
+        thinking_styles_count: int,
+    ) -> List[str]:
+        """
+        Generate `num_variations` variations of base_instruction in a single LLM call, that responds with a JSON
+        object. If response isn't valid JSON, prompts wrapped between <START> and <END> are extracted instead.
+
+        :param base_instruction: Instruction given to LLM to solve the task defined in task_description.
+        :param task_description: Description of the task to be solved.
+        :param num_variations: Number of variations of base_instruction to be generated.
+        :param thinking_styles_count: Number of different thinking styles descriptions to be taken from the pool of
+                                      thinking styles and given to LLM as reference (in context).
+        :return: List of generated prompts
+        """
+        mutated_sample_prompt = self.prompt_pool.meta_sample_json_template.format(
+            task_description=task_description,
+            meta_prompts="\n".join(
+                self.prompt_pool.thinking_styles[:thinking_styles_count]
+            ),
+            num_variations=num_variations,
+            prompt_instruction=base_instruction,
+        )
+        generated_mutated_prompt = self.chat_completion(mutated_sample_prompt)
+        matches = extract_json_prompts(generated_mutated_prompt)
+        if not matches:
+            self.logger.info(
+                "Mutated prompts couldn't be parsed as JSON. Extracting them using delimiters."
+            )
+            matches = re.findall(
+                DatasetSpecificProcessing.TEXT_DELIMITER_PATTERN_MUTATION,
+                generated_mutated_prompt,
+            )
+
+        self.logger.info(
+            f"mutated_sample_prompt={mutated_sample_prompt}"
+            f"mutated_prompt_generation={generated_mutated_prompt}"
+        )
+        return matches
+
+    @in_llm_phase(LLMPhases.CRITIQUE)
     @iolog.log_io_params
     def critique_and_refine(
         self, prompt: str, critique_example_set: List, further_enhance: bool = False
@@ -223,6 +379,7 @@ class CritiqueNRefine(PromptOptimizer, UniversalBaseClass):
 
         return final_refined_prompts
 
+    @in_llm_phase(LLMPhases.SCORING)
     @iolog.log_io_params
     def get_prompt_score(
         self, instructions: List[str], params: PromptOptimizationParams
@@ -231,6 +388,7 @@ class CritiqueNRefine(PromptOptimizer, UniversalBaseClass):
         For each of the prompts in input, make LLM answer a set questions from dataset.
         Check if the answers are correct. Assign score to each prompt based on the number of batches of questions
         answered correctly. Once you get a prompt that gets all the questions right, you can stop the process.
+        Prompts are scored concurrently, with at most `params.max_concurrency` LLM calls in flight.
 
         :params instructions: Prompts using which we'll try to solve the task
         :params params: Object of PromptOptimizationParams class, that has hyperparameters related to prompt
@@ -239,51 +397,142 @@ class CritiqueNRefine(PromptOptimizer, UniversalBaseClass):
                                score corresponding to that prompt,
                                set of examples over which we evaluated)
         """
-        prompt_score_list = []
+        eval_batches_list = [
+            self.draw_eval_batches(params) for _ in range(len(instructions))
+        ]
+        prompt_score_list = run_coroutine_sync(
+            self.get_prompt_score_async(instructions, eval_batches_list, params)
+        )
 
-        for instruction in instructions:
-            correct_count, count = 0, 0
-            critique_example_set = []
-            dataset_subset = random.sample(self.dataset, params.questions_batch_size)
-            questions_pool = [
-                example[DatasetSpecificProcessing.QUESTION_LITERAL]
-                for example in dataset_subset
-            ]
-            while (
-                not critique_example_set
-                and correct_count < params.min_correct_count
-                and count < params.max_eval_batches
-            ):
-                count += 1
-                solve_prompt = self.prompt_pool.solve_template.format(
-                    questions_batch_size=params.questions_batch_size,
-                    answer_format=params.answer_format,
-                    instruction=instruction,
-                    questions="\n".join(questions_pool),
-                )
+        self.logger.info(f"prompt_score_list {prompt_score_list}")
+        return prompt_score_list
 
-                generated_text = self.chat_completion(solve_prompt)
-                critique_example_set = self.evaluate(generated_text, dataset_subset)
-                if not critique_example_set:
-                    # If all the questions were answered correctly, then we need to get a new set of questions to answer
-                    dataset_subset = random.sample(
-                        self.dataset, params.questions_batch_size
+    def draw_eval_batches(self, params: PromptOptimizationParams) -> List:
+        """
+        Sample upfront, all the mini-batches of questions that a prompt can be evaluated on. Sampling them before any
+        LLM call is made, keeps the consumption of random number generator independent of the order in which
+        concurrent LLM calls complete.
+
+        :params params: Object of PromptOptimizationParams class
+        :return: List of mini-batches. Each mini-batch is a list of examples from dataset.
+        """
+        batches_count = min(params.max_eval_batches, params.min_correct_count) + 1
+        return [
+            random.sample(self.dataset, params.questions_batch_size)
+            for _ in range(batches_count)
+        ]
+
+    async def get_prompt_score_async(
+        self,
+        instructions: List[str],
+        eval_batches_list: List,
+        params: PromptOptimizationParams,
+    ) -> List:
+        """
+        Score all the prompts concurrently. Output is same as that of get_prompt_score().
+
+        :params instructions: Prompts using which we'll try to solve the task
+        :params eval_batches_list: For each prompt, mini-batches sampled using draw_eval_batches()
+        :params params: Object of PromptOptimizationParams class
+        :return: List of [prompt string, score, set of examples over which we evaluated], in order of `instructions`
+        """
+        llm_slots = LLMSlots(params.max_concurrency)
+        return list(
+            await asyncio.gather(
+                *[
+                    self.score_instruction_async(
+                        instruction, eval_batches, params, llm_slots
                     )
-                    questions_pool = [
-                        example[DatasetSpecificProcessing.QUESTION_LITERAL]
-                        for example in dataset_subset
-                    ]
-                    correct_count += 1
-                #
-                print("critique_example_set, correct_count")
-                print(critique_example_set, correct_count)
-            print("Loop completed")
-            prompt_score_list.append(
-                [instruction, correct_count / count, dataset_subset]
+                    for instruction, eval_batches in zip(
+                        instructions, eval_batches_list
+                    )
+                ]
             )
+        )
 
-        self.logger.info(f"prompt_score_list {prompt_score_list}")
-        return prompt_score_list
+    async def score_instruction_async(
+        self,
+        instruction: str,
+        eval_batches: List,
+        params: PromptOptimizationParams,
+        llm_slots: asyncio.Semaphore,
+    ) -> List:
+        """
+        Evaluate single prompt over mini-batches in `eval_batches`, till it answers a mini-batch wrongly or it has
+        answered `params.min_correct_count` mini-batches correctly. Up to `params.eval_batch_lookahead` mini-batches
+        are solved ahead of time, but their results are consumed in order, so score doesn't depend on concurrency.
+
+        :params instruction: Prompt using which we'll try to solve the task
+        :params eval_batches: Mini-batches sampled using draw_eval_batches()
+        :params params: Object of PromptOptimizationParams class
+        :params llm_slots: Semaphore that limits number of LLM calls in flight
+        :return: [prompt string, score, set of examples over which we evaluated]
+        """
+        batches_limit = min(params.max_eval_batches, params.min_correct_count)
+        lookahead = max(1, params.eval_batch_lookahead)
+        pending_batches = {}
+        next_batch = 0
+        correct_count, count = 0, 0
+        dataset_subset = eval_batches[0]
+
+        while count < batches_limit:
+            while next_batch < min(count + lookahead, batches_limit):
+                pending_batches[next_batch] = asyncio.ensure_future(
+                    self.solve_batch_async(
+                        instruction, eval_batches[next_batch], params, llm_slots
+                    )
+                )
+                next_batch += 1
+
+            generated_text = await pending_batches.pop(count)
+            critique_example_set = self.evaluate(generated_text, eval_batches[count])
+            count += 1
+            if critique_example_set:
+                dataset_subset = eval_batches[count - 1]
+                break
+            # If all the questions were answered correctly, then we need to get a new set of questions to answer
+            dataset_subset = eval_batches[count]
+            correct_count += 1
+
+        for pending_batch in pending_batches.values():
+            pending_batch.cancel()
+
+        self.logger.debug(
+            f"instruction={instruction} correct_count={correct_count} count={count}"
+        )
+        return [instruction, correct_count / count, dataset_subset]
+
+    async def solve_batch_async(
+        self,
+        instruction: str,
+        dataset_subset: List,
+        params: PromptOptimizationParams,
+        llm_slots: asyncio.Semaphore,
+    ) -> str:
+        """
+        Ask LLM to solve a mini-batch of questions using the given prompt.
+
+        :params instruction: Prompt using which we'll try to solve the task
+        :params dataset_subset: List of examples, whose questions have to be answered
+        :params params: Object of PromptOptimizationParams class
+        :params llm_slots: Semaphore that limits number of LLM calls in flight
+        :return: Output of LLM
+        """
+        solve_prompt = self.prompt_pool.solve_template.format(
+            questions_batch_size=params.questions_batch_size,
+            answer_format=params.answer_format,
+            instruction=instruction,
+            questions="\n".join(
+                example[DatasetSpecificProcessing.QUESTION_LITERAL]
+                for example in dataset_subset
+            ),
+        )
+        return await run_in_thread(
+            llm_slots,
+            self.chat_completion,
+            solve_prompt,
+            expected_answers=len(dataset_subset) if params.stream_answers else None,
+        )
 
     @iolog.log_io_params
     def refine_prompts(
@@ -297,64 +546,220 @@ class CritiqueNRefine(PromptOptimizer, UniversalBaseClass):
         :param params: Object of class having hyperparameters for Prompt Optimization.
         :return: List of prompts, which were refined over input prompts.
         """
-        refined_prompts = []
-        for prompt, score, critique_example_set in prompt_score_list:
-            if score >= params.min_correct_count / params.max_eval_batches:
-                # if it's good enough prompt, how to mutate on that
-                refined_prompts.append(
-                    self.critique_and_refine(prompt, critique_example_set, True)
-                )
-            else:
-                # if it's not good enough prompt, how to mutate on that
-                refined_prompts.append(
-                    self.critique_and_refine(prompt, critique_example_set)
-                )
+        # Prompts are critiqued & refined concurrently, as they don't depend on each other
+        refined_prompt_score_list = run_coroutine_sync(
+            self.refine_and_score_prompts_async(
+                prompt_score_list, params, score_refined_prompts=False
+            )
+        )
+        refined_prompts = [
+            refined_prompt_score[self.GetPromptScoreIndex.PROMPT_STR]
+            for refined_prompt_score in refined_prompt_score_list
+        ]
 
         self.logger.info(f"refined_prompts {refined_prompts}")
         return refined_prompts
 
+    @iolog.log_io_params
+    def refine_and_score_prompts(
+        self, prompt_score_list: List, params: PromptOptimizationParams
+    ) -> List:
+        """
+        Refine the prompts as in refine_prompts() and score the refined prompts as in get_prompt_score(). Each prompt
+        is critiqued, refined & scored as an independent pipeline, so a refined prompt starts getting scored as soon
+        as it's available, without waiting for other prompts to be refined.
+
+        :param prompt_score_list: List of (prompt string, score for that prompt string,
+        set of examples given in context)
+        :param params: Object of class having hyperparameters for Prompt Optimization.
+        :return: Output of get_prompt_score() over refined prompts
+        """
+        refined_prompt_score_list = run_coroutine_sync(
+            self.refine_and_score_prompts_async(prompt_score_list, params)
+        )
+        refined_prompt_score_list = [
+            refined_prompt_score
+            for refined_prompt_score in refined_prompt_score_list
+            if refined_prompt_score is not None
+        ]
+
+        self.logger.info(f"refined_prompt_score_list {refined_prompt_score_list}")
+        return refined_prompt_score_list
+
+    async def refine_and_score_prompts_async(
+        self,
+        prompt_score_list: List,
+        params: PromptOptimizationParams,
+        score_refined_prompts: bool = True,
+    ) -> List:
+        """
+        Run critique, refinement & scoring pipelines of all the prompts concurrently, with at most
+        `params.max_concurrency` LLM calls in flight.
+
+        :param prompt_score_list: List of (prompt string, score for that prompt string,
+        set of examples given in context)
+        :param params: Object of class having hyperparameters for Prompt Optimization.
+        :param score_refined_prompts: If False, refined prompts are returned without being scored, with score as None
+        :return: List of [refined prompt string, score, set of examples over which we evaluated], in order of
+                 `prompt_score_list`. When scoring, refined prompts that are near duplicates of the prompt they were
+                 refined from are not scored & are None.
+        """
+        # Sampled before any LLM call, so that results don't depend on the order in which LLM calls complete
+        eval_batches_list = []
+        if score_refined_prompts:
+            eval_batches_list = [
+                self.draw_eval_batches(params) for _ in range(len(prompt_score_list))
+            ]
+        llm_slots = LLMSlots(params.max_concurrency)
+
+        async def refine_and_score(prompt_index: int) -> List:
+            prompt, score, critique_example_set = prompt_score_list[prompt_index]
+            # Good enough prompts are further enhanced, others are critiqued on the examples they got wrong
+            further_enhance = score >= params.min_correct_count / params.max_eval_batches
+            refined_prompt = await run_in_thread(
+                llm_slots,
+                self.critique_and_refine,
+                prompt,
+                critique_example_set,
+                further_enhance,
+            )
+            if not score_refined_prompts:
+                return [refined_prompt, None, critique_example_set]
+            distinct_prompts = await run_in_thread(
+                llm_slots, self.deduplicate_prompts, [prompt, refined_prompt], params
+            )
+            if len(distinct_prompts) == 1:
+                # Refinement barely changed the prompt, so its score is already known
+                return None
+            with llm_phase(LLMPhases.SCORING):
+                return await self.score_instruction_async(
+                    refined_prompt, eval_batches_list[prompt_index], params, llm_slots
+                )
+
+        return list(
+            await asyncio.gather(
+                *[refine_and_score(prompt_index) for prompt_index in range(len(prompt_score_list))]
+            )
+        )
+
     @iolog.log_io_params
     def evaluate(self, generated_text: str, dataset_subset: List) -> List:
         """
         Compare predicted answers with actual answers from the dataset.
         Return the list of questions for which the predicted answer was wrong.
 
+        When a single question is asked, whole LLM output is given to data processor, which extracts the answer.
+        When a mini-batch of questions is asked, delimited answers are aligned with questions & each one is given to
+        data processor still wrapped between delimiters, as in mine_wrong_examples(), so that it is parsed the same way
+        irrespective of batch size. Questions whose answer couldn't be extracted are logged as parse failures &
+        counted as wrongly answered.
+
         :param generated_text: Output of LLM, that has answers for a mini-batch of questions
                                (which were send in single go)
         :param dataset_subset: List of examples with question and ground truth.
         :return: List of examples that were wrongly classified.
         """
-        # Find all matches of the pattern in the text
-        answer_matches = re.findall(
-            DatasetSpecificProcessing.ANSWER_DELIMITER_PATTERN, generated_text
+        # answer_matches = [self.chat_completion(FINAL_ANSWER_EXTRACTION_PROMPT.format(text=generated_text), "You are an AI assistant. Please follow the users requests.")]
+        if len(dataset_subset) == 1:
+            answer_matches = [generated_text]
+        else:
+            extracted = self.answer_extractor.align(generated_text, len(dataset_subset))
+            if extracted.failures:
+                self.logger.info(
+                    f"Answers couldn't be extracted for {len(extracted.failures)} of {len(dataset_subset)} questions: "
+                    f"{[asdict(failure) for failure in extracted.failures]}"
+                )
+            answer_matches = [
+                None if answer is None else self.answer_extractor.wrap(answer) for answer in extracted.answers
+            ]
+
+        parsed_indices = [i for i, answer in enumerate(answer_matches) if answer is not None]
+        results = self.data_processor.access_answers(
+            [answer_matches[i] for i in parsed_indices],
+            [dataset_subset[i][DatasetSpecificProcessing.FINAL_ANSWER_LITERAL] for i in parsed_indices],
         )
+        correct_indices = {i for i, (is_correct, _) in zip(parsed_indices, results) if is_correct}
+        return [example for i, example in enumerate(dataset_subset) if i not in correct_indices]
 
-        # answer_matches = [self.chat_completion(FINAL_ANSWER_EXTRACTION_PROMPT.format(text=generated_text), "You are an AI assistant. Please follow the users requests.")]
-        answer_matches = [generated_text]
-        #
-        answers_len, dataset_len = len(answer_matches), len(dataset_subset)
-        if answers_len != dataset_len:
+    def align_batch_answers(self, generated_text: str, dataset_subset: List) -> List:
+        """
+        Map answers wrapped between ANSWER_START & ANSWER_END delimiters in LLM output to the questions of a
+        mini-batch, in order. If LLM output has more answers than questions, last `len(dataset_subset)` answers are
+        used, as in evaluate().
+
+        :param generated_text: Output of LLM, that has answers for a mini-batch of questions
+        :param dataset_subset: List of examples whose questions were asked to LLM
+        :return: List having answer for each question in `dataset_subset`, wrapped between delimiters, so that
+                 data processor gets it in the same shape as output of a single question. None for questions whose
+                 answer couldn't be aligned, which is the case for all the questions when LLM gave fewer answers than
+                 questions asked.
+        """
+        extracted = self.answer_extractor.align(generated_text, len(dataset_subset))
+        if extracted.failures:
             self.logger.info(
-                f"Answers extracted from LLM output={answers_len}, Questions asked to LLM {dataset_len}"
+                f"Answers extracted from LLM output={extracted.failures[0].answers_found}, Questions asked to LLM "
+                f"{len(dataset_subset)}. Answers couldn't be aligned to questions."
             )
-            if answers_len > dataset_len:
-                # Select last `dataset_len` number of extractions as final.
-                answer_matches = answer_matches[-dataset_len:]
+        return [None if answer is None else self.answer_extractor.wrap(answer) for answer in extracted.answers]
 
+    @in_llm_phase(LLMPhases.FEW_SHOT_MINING)
+    def mine_wrong_examples(self, params: PromptOptimizationParams) -> List:
+        """
+        Go over training examples in order & collect the first `params.few_shot_count` examples that LLM answers
+        wrongly using `params.base_instruction`. Up to `params.few_shot_mining_batch_size` questions are asked in a
+        single LLM call. Questions whose answer can't be aligned from the output of batched call, are asked again
+        one at a time.
+
+        :param params: Object of class having hyperparameters for Prompt Optimization.
+        :return: List of examples that were answered wrongly
+        """
+        batch_size = max(1, params.few_shot_mining_batch_size)
         wrong_examples = []
-        for i in range(min(answers_len, dataset_len)):
-            print("dataset_subset", dataset_subset)
-            actual_answer = dataset_subset[i][
-                DatasetSpecificProcessing.FINAL_ANSWER_LITERAL
-            ]
-            question = dataset_subset[i][DatasetSpecificProcessing.QUESTION_LITERAL]
-            is_correct, _ = self.data_processor.access_answer(
-                answer_matches[i], actual_answer
-            )
-            if not is_correct:
-                wrong_examples.append(dataset_subset[i])
-        #
-        return wrong_examples
+        for batch_start in range(0, len(self.dataset), batch_size):
+            dataset_subset = self.dataset[batch_start: batch_start + batch_size]
+            unaligned_examples = list(dataset_subset)
+            if len(dataset_subset) > 1:
+                solve_prompt = self.prompt_pool.solve_template.format(
+                    questions_batch_size=len(dataset_subset),
+                    instruction=params.base_instruction,
+                    answer_format=params.answer_format,
+                    questions="\n".join(
+                        example[DatasetSpecificProcessing.QUESTION_LITERAL]
+                        for example in dataset_subset
+                    ),
+                )
+                generated_text = self.chat_completion(
+                    solve_prompt,
+                    expected_answers=len(dataset_subset) if params.stream_answers else None,
+                )
+                answers = self.align_batch_answers(generated_text, dataset_subset)
+                unaligned_examples = [example for example, answer in zip(dataset_subset, answers) if answer is None]
+                aligned = [(example, answer) for example, answer in zip(dataset_subset, answers) if answer is not None]
+                results = self.data_processor.access_answers(
+                    [answer for _, answer in aligned],
+                    [example[DatasetSpecificProcessing.FINAL_ANSWER_LITERAL] for example, _ in aligned],
+                )
+                for (example, _), (is_correct, _) in zip(aligned, results):
+                    if not is_correct:
+                        wrong_examples.append(example)
+
+            for example in unaligned_examples:
+                solve_prompt = self.prompt_pool.solve_template.format(
+                    questions_batch_size=1,
+                    instruction=params.base_instruction,
+                    answer_format=params.answer_format,
+                    questions=example[DatasetSpecificProcessing.QUESTION_LITERAL],
+                )
+                generated_text = self.chat_completion(
+                    solve_prompt, expected_answers=1 if params.stream_answers else None
+                )
+                wrong_examples.extend(self.evaluate(generated_text, [example]))
+
+            if len(wrong_examples) >= params.few_shot_count:
+                break
+
+        # Even when few_shot_count is 0, first wrong example is kept, as examples are also used to critique instruction
+        return wrong_examples[: max(1, params.few_shot_count)]
 
     @iolog.log_io_params
     def select_top_prompts(self, prompt_score_list: List, top_n: int) -> List:
@@ -378,6 +783,143 @@ class CritiqueNRefine(PromptOptimizer, UniversalBaseClass):
         self.logger.debug(f"Sorted top n prompts:  {sorted_top_n_prompts}")
         return sorted_top_n_prompts
 
+    @in_llm_phase(LLMPhases.SCORING)
+    def evaluate_on_questions(
+        self, prompts: List[str], examples: List, params: PromptOptimizationParams
+    ) -> List[List[bool]]:
+        """
+        Find whether each prompt answers each of the examples correctly. Answers are looked up in evaluation memo &
+        only the (prompt, question) pairs missing from it are asked to LLM, in mini-batches of
+        `params.questions_batch_size` questions, with at most `params.max_concurrency` LLM calls in flight.
+
+        :params prompts: Prompts using which we'll try to solve the task
+        :params examples: Examples from dataset, whose questions have to be answered
+        :params params: Object of PromptOptimizationParams class
+        :return: For each prompt, list of whether it answered each example correctly, in order of `examples`
+        """
+        return run_coroutine_sync(self.evaluate_on_questions_async(prompts, examples, params))
+
+    async def evaluate_on_questions_async(
+        self, prompts: List[str], examples: List, params: PromptOptimizationParams
+    ) -> List[List[bool]]:
+        """
+        Async version of evaluate_on_questions(). Output is same as that of evaluate_on_questions().
+        """
+        llm_slots = LLMSlots(params.max_concurrency)
+        questions = [example[DatasetSpecificProcessing.QUESTION_LITERAL] for example in examples]
+
+        async def evaluate_prompt(prompt: str) -> List[bool]:
+            correctness = [self.evaluation_memo.get(prompt, question) for question in questions]
+            unseen = [example for example, is_correct in zip(examples, correctness) if is_correct is None]
+            batches = [
+                unseen[start: start + params.questions_batch_size]
+                for start in range(0, len(unseen), params.questions_batch_size)
+            ]
+            generated_texts = await asyncio.gather(
+                *[self.solve_batch_async(prompt, batch, params, llm_slots) for batch in batches]
+            )
+            answered = {}
+            for batch, generated_text in zip(batches, generated_texts):
+                wrong_questions = {
+                    example[DatasetSpecificProcessing.QUESTION_LITERAL]
+                    for example in self.evaluate(generated_text, batch)
+                }
+                for example in batch:
+                    question = example[DatasetSpecificProcessing.QUESTION_LITERAL]
+                    answered[question] = question not in wrong_questions
+                    self.evaluation_memo.set(prompt, question, answered[question])
+            return [
+                is_correct if is_correct is not None else answered[question]
+                for question, is_correct in zip(questions, correctness)
+            ]
+
+        return list(await asyncio.gather(*[evaluate_prompt(prompt) for prompt in prompts]))
+
+    @iolog.log_io_params
+    def search_prompts(
+        self, candidate_prompts: List[str], params: PromptOptimizationParams
+    ) -> List:
+        """
+        Choose top `params.top_n` prompts among candidates, using search strategy of optimizer. All candidates are
+        evaluated on the same questions, drawn once per run, and evaluation memo is shared across rounds. So prompts
+        carried over from earlier rounds cost no LLM call.
+
+        :param candidate_prompts: Prompts to choose from
+        :param params: Object of class having hyperparameters for Prompt Optimization.
+        :return: List of [prompt string, score, set of examples to critique prompt on], best first, like output of
+                 select_top_prompts()
+        """
+        candidate_prompts = self.deduplicate_prompts(candidate_prompts, params)
+        if self.search_questions is None:
+            eval_budget = params.search_eval_budget or params.max_eval_batches * params.questions_batch_size
+            # Same draws as sampling from dataset itself, but indices can be saved in checkpoint
+            self.search_question_indices = random.sample(
+                range(len(self.dataset)), min(eval_budget, len(self.dataset))
+            )
+            self.search_questions = [self.dataset[index] for index in self.search_question_indices]
+
+        scored_prompts = self.search_strategy.select(
+            candidate_prompts,
+            self.search_questions,
+            lambda prompts, examples: self.evaluate_on_questions(prompts, examples, params),
+            params.top_n,
+            params.questions_batch_size,
+        )
+        prompt_score_list = [
+            [scored_prompt.prompt, scored_prompt.score, self.get_critique_examples(scored_prompt, params)]
+            for scored_prompt in scored_prompts
+        ]
+        self.logger.info(
+            f"prompt_score_list {prompt_score_list} evaluation memo: size={len(self.evaluation_memo)} "
+            f"hits={self.evaluation_memo.hits} misses={self.evaluation_memo.misses}"
+        )
+        return prompt_score_list
+
+    def deduplicate_prompts(self, candidate_prompts: List[str], params: PromptOptimizationParams) -> List[str]:
+        """
+        Collapse near identical candidate prompts, so that scoring calls go only to distinct prompts. Prompts are
+        compared by estimated overlap of their word 3-grams & when `params.dedup_embedding_model` is set, also by
+        similarity of their embeddings.
+
+        :param candidate_prompts: Prompts in order of preference. First prompt of each group of duplicates is kept.
+        :param params: Object of class having hyperparameters for Prompt Optimization.
+        :return: Distinct prompts, in order of `candidate_prompts`
+        """
+        if params.dedup_similarity_threshold is None:
+            return candidate_prompts
+
+        embed = None
+        if params.dedup_embedding_model:
+            embed = lambda texts: LLMMgr.get_text_embeddings(texts, params.dedup_embedding_model)
+        kept_indices = deduplicate(
+            candidate_prompts,
+            params.dedup_similarity_threshold,
+            self.prompt_minhasher,
+            embed,
+            params.dedup_embedding_threshold,
+        )
+        if len(kept_indices) < len(candidate_prompts):
+            self.logger.info(
+                f"Collapsed {len(candidate_prompts) - len(kept_indices)} near duplicate prompts, out of "
+                f"{len(candidate_prompts)} candidate prompts"
+            )
+        return [candidate_prompts[index] for index in kept_indices]
+
+    def get_critique_examples(self, scored_prompt: ScoredPrompt, params: PromptOptimizationParams) -> List:
+        """
+        :param scored_prompt: Prompt evaluated by search strategy on first few of `self.search_questions`
+        :param params: Object of class having hyperparameters for Prompt Optimization.
+        :return: Up to `params.questions_batch_size` examples that prompt answered wrongly. When it answered all of
+                 them correctly, the last ones it was evaluated on.
+        """
+        evaluated = self.search_questions[: len(scored_prompt.correctness)]
+        wrong_examples = [
+            example for example, is_correct in zip(evaluated, scored_prompt.correctness) if not is_correct
+        ]
+        if wrong_examples:
+            return wrong_examples[: params.questions_batch_size]
+        return evaluated[-params.questions_batch_size:]
+
     def extract_examples_frm_response(self, response_with_examples: str) -> List:
         """
         Extract the elements that constitute an example in dataset viz question, reasoning for answer and the answer.
@@ -431,6 +973,54 @@ class CritiqueNRefine(PromptOptimizer, UniversalBaseClass):
 
         return synthetic_examples
 
+    def save_checkpoint(self, checkpoint: Dict) -> None:
+        """
+        Atomically write progress of get_best_prompt() to checkpoint file, along with state of random number
+        generator, LLM usage so far, questions drawn for search strategy & its evaluation memo. Chained log collected
+        so far is written to file, so that it's in sync with the checkpoint.
+
+        :param checkpoint: Dict having progress of get_best_prompt()
+        """
+        checkpoint["rng_state"] = random.getstate()
+        checkpoint["llm_usage"] = LLMMgr.usage_tracker.get_summary()
+        if self.search_question_indices is not None:
+            checkpoint["search_question_indices"] = self.search_question_indices
+            checkpoint["evaluation_memo"] = self.evaluation_memo.get_state()
+        temp_checkpoint_path = self.checkpoint_path + ".tmp"
+        with open(temp_checkpoint_path, "w") as file_obj:
+            json.dump(checkpoint, file_obj, default=str)
+        os.replace(temp_checkpoint_path, self.checkpoint_path)
+        self.iolog.dump_chained_log_to_file("best_prompt")
+
+    def load_checkpoint(self) -> Dict:
+        """
+        Read checkpoint saved by an earlier run & restore state of random number generator, LLM usage, questions
+        drawn for search strategy & its evaluation memo from it. So a resumed run evaluates prompts on the same
+        questions & doesn't pay again for evaluations done before interruption.
+
+        :return: Dict having progress of get_best_prompt(). Empty dict if there's no checkpoint.
+        """
+        if not exists(self.checkpoint_path):
+            self.logger.info(f"No checkpoint found at {self.checkpoint_path}. Starting afresh.")
+            return {}
+
+        with open(self.checkpoint_path) as file_obj:
+            checkpoint = json.load(file_obj)
+        version, internal_state, gauss_next = checkpoint["rng_state"]
+        random.setstate((version, tuple(internal_state), gauss_next))
+        LLMMgr.usage_tracker.load_summary(checkpoint["llm_usage"])
+        if checkpoint.get("search_question_indices") is not None:
+            self.search_question_indices = checkpoint["search_question_indices"]
+            self.search_questions = [self.dataset[index] for index in self.search_question_indices]
+            self.evaluation_memo.load_state(checkpoint.get("evaluation_memo", {}))
+        self.logger.info(
+            f"Resuming from checkpoint {self.checkpoint_path}. "
+            f"Completed mutation rounds: {checkpoint.get('completed_rounds', 0)}, "
+            f"completed refinement iterations: {checkpoint.get('completed_refine_iterations', 0)}"
+        )
+        return checkpoint
+
+    @in_llm_phase(LLMPhases.REASONING)
     def generate_reasoning(
         self, task_description: str, instruction: str, question: str, answer: str
     ) -> str:
@@ -442,6 +1032,7 @@ class CritiqueNRefine(PromptOptimizer, UniversalBaseClass):
         :param question: Question from the task to be solved
         :param answer: Answer to the question
         :return: Reasoning that went through for getting answer `answer` for question `question`
+        :raises GlueLLMException: When LLM call failed, so that placeholder response isn't used as reasoning
         """
 
         prompt_template = self.prompt_pool.generate_reason_template.format(
@@ -450,7 +1041,74 @@ class CritiqueNRefine(PromptOptimizer, UniversalBaseClass):
             question=question,
             answer=answer,
         )
-        return self.chat_completion(user_prompt=prompt_template)
+        reasoning = self.chat_completion(user_prompt=prompt_template)
+        if not reasoning or reasoning == LLMLiterals.FAILED_RESPONSE:
+            raise GlueLLMException(f"LLM call to generate reasoning failed for question: {question}", None)
+        return reasoning
+
+    async def generate_examples_reasoning_async(
+        self, examples: List, params: PromptOptimizationParams, checkpoint: Dict
+    ) -> None:
+        """
+        Generate reasoning for all the examples concurrently, with at most `params.max_concurrency` LLM calls in
+        flight, and set it in ANSWER_WITH_REASON_LITERAL field of each example. Failed calls of an example are retried
+        `params.reasoning_retries` times, without holding up other examples. An example whose reasoning couldn't be
+        generated is left as it is.
+
+        Reasoning is set in examples in their order. `reasoned_examples_count` in checkpoint is the number of leading
+        examples that are done, so examples after it are regenerated when run is resumed.
+
+        :param examples: List of examples, that would be given as few shots
+        :param params: Object of class having hyperparameters for Prompt Optimization.
+        :param checkpoint: Progress of get_best_prompt(), saved as examples are done
+        """
+        reasoned_examples_count = checkpoint.get("reasoned_examples_count", 0)
+        llm_slots = LLMSlots(params.max_concurrency)
+        # Index of example -> reasoning generated for it. None if it couldn't be generated.
+        completed = {}
+
+        async def reason_example(index: int):
+            example = examples[index]
+            for attempt in range(params.reasoning_retries + 1):
+                try:
+                    return index, await run_in_thread(
+                        llm_slots,
+                        self.generate_reasoning,
+                        params.task_description,
+                        params.base_instruction,
+                        example[DatasetSpecificProcessing.QUESTION_LITERAL],
+                        example[DatasetSpecificProcessing.FINAL_ANSWER_LITERAL],
+                    )
+                except Exception as e:
+                    self.logger.warning(
+                        f"Reasoning generation for example {index} failed (attempt {attempt + 1}/"
+                        f"{params.reasoning_retries + 1}): {e}"
+                    )
+            return index, None
+
+        pending = [reason_example(index) for index in range(reasoned_examples_count, len(examples))]
+        with tqdm(total=len(pending)) as progress_bar:
+            for next_done in asyncio.as_completed(pending):
+                index, reason = await next_done
+                completed[index] = reason
+                progress_bar.update(1)
+
+                # Reassemble in order, so that checkpoint always covers a prefix of examples
+                while reasoned_examples_count in completed:
+                    reason = completed.pop(reasoned_examples_count)
+                    example = examples[reasoned_examples_count]
+                    if reason is not None:
+                        example[DatasetSpecificProcessing.ANSWER_WITH_REASON_LITERAL] = (
+                            f"{reason} "
+                            + f"{DatasetSpecificProcessing.ANSWER_START}"
+                            + f"{example[DatasetSpecificProcessing.FINAL_ANSWER_LITERAL]}"
+                            + f"{DatasetSpecificProcessing.ANSWER_END}"
+                        )
+                    reasoned_examples_count += 1
+                    checkpoint.update(
+                        reasoned_examples_count=reasoned_examples_count, examples=examples
+                    )
+                    self.save_checkpoint(checkpoint)
 
     @iolog.log_io_params
     def generate_expert_identity(self, task_description: str) -> str:
@@ -479,6 +1137,7 @@ class CritiqueNRefine(PromptOptimizer, UniversalBaseClass):
         )
         return self.chat_completion(user_prompt=prompt_template)
 
+    @in_llm_phase(LLMPhases.CRITIQUE)
     @iolog.append_to_chained_log
     def generate_best_examples(
         self, examples: List, params: PromptOptimizationParams
@@ -558,6 +1217,7 @@ class CritiqueNRefine(PromptOptimizer, UniversalBaseClass):
         synthetic_examples = self.extract_examples_frm_response(synthetic_examples)
         return synthetic_examples
 
+    @in_llm_phase(LLMPhases.CRITIQUE)
     @iolog.append_to_chained_log
     def get_best_instr_by_critique(
         self, examples: List, params: PromptOptimizationParams
@@ -606,39 +1266,108 @@ class CritiqueNRefine(PromptOptimizer, UniversalBaseClass):
 
         return refined_instructions[0] if refined_instructions else None
 
+    def collate_examples(self, examples: List) -> str:
+        """
+        :param examples: List of examples, with reasoning if it was generated
+        :return: Examples formatted using `quest_reason_ans` template & concatenated
+        """
+        if self.data_processor != None:
+            return self.data_processor.collate_to_str(
+                examples, self.prompt_pool.quest_reason_ans
+            )
+
+        example_string = ""
+        for example in examples:
+            answer = example[DatasetSpecificProcessing.FINAL_ANSWER_LITERAL]
+            if DatasetSpecificProcessing.ANSWER_WITH_REASON_LITERAL in example:
+                answer = example[
+                    DatasetSpecificProcessing.ANSWER_WITH_REASON_LITERAL
+                ]
+
+            example_string += self.prompt_pool.quest_reason_ans.format(
+                question=example[DatasetSpecificProcessing.QUESTION_LITERAL],
+                answer=answer,
+            )
+        return example_string
+
+    def pack_examples(self, examples: List, params: PromptOptimizationParams) -> List:
+        """
+        Keep the examples that fit in `params.few_shot_token_budget` tokens, preferring earlier & mutually different
+        examples. Order of examples is preserved, so that final prompt is a stable prefix for prompt caching.
+
+        :param examples: List of examples, in order of preference
+        :param params: Object of PromptOptimizationParams class
+        :return: Examples to be put in final prompt
+        """
+        count_tokens = get_token_counter(params.tokenizer_model)
+        chosen_indices = pack_examples(
+            [self.collate_examples([example]) for example in examples],
+            params.few_shot_token_budget,
+            count_tokens,
+            params.few_shot_diversity_weight,
+        )
+        self.logger.info(
+            f"Packed {len(chosen_indices)} of {len(examples)} few shot examples in "
+            f"{params.few_shot_token_budget} tokens budget. Examples kept: {chosen_indices}"
+        )
+        return [examples[index] for index in chosen_indices]
+
     def get_best_prompt(
         self,
         params: PromptOptimizationParams,
         use_examples=False,
         run_without_train_examples=False,
         generate_synthetic_examples=False,
+        resume=False,
     ) -> (str, Any):
         """
         Perform `params.max_iterations` iterations for optimizing your prompt. And return the best prompt found so far.
+        Progress is checkpointed after every round of every stage. With `resume`, stages & rounds completed by an
+        earlier run of same experiment are not repeated.
 
         :params: Object of class PromptOptimizationParams, that has all hyper-parameters needed for prompt optimization.
+        :params resume: If True, continue from checkpoint saved by an earlier run of same experiment, if there's one.
         :return: Best prompt for the given task and dataset.
         """
+        checkpoint = self.load_checkpoint() if resume else {}
+        if checkpoint.get("final_best_prompt") is not None:
+            self.logger.info("Checkpoint has best prompt of a completed run. Returning it.")
+            return checkpoint["final_best_prompt"], checkpoint["expert_identity"]
 
-        current_base_instruction = params.base_instruction
+        current_base_instruction = checkpoint.get(
+            "current_base_instruction", params.base_instruction
+        )
+        prompt_score_list = checkpoint.get("prompt_score_list", [])
 
         if not generate_synthetic_examples:
             print("\nMutating Task Description....")
             # Mutate and refine task description
             for round_num in tqdm(
-                range(1, params.mutate_refine_iterations + 1),
+                range(
+                    checkpoint.get("completed_rounds", 0) + 1,
+                    params.mutate_refine_iterations + 1,
+                ),
                 desc="Iterations completed: ",
             ):
                 self.logger.info(
                     f"{CommonLogsStr.LOG_SEPERATOR} + Starting iteration: {round_num} \n "
                     f"current_base_instruction: {current_base_instruction}"
                 )
-                candidate_prompts = self.gen_different_styles(
-                    current_base_instruction,
-                    params.task_description,
-                    params.mutation_rounds + 1,
-                    params.style_variation,
-                )
+                seed_prompts = [current_base_instruction]
+                if self.search_strategy is not None and prompt_score_list:
+                    seed_prompts = self.search_strategy.frontier(
+                        [prompt_score[self.GetPromptScoreIndex.PROMPT_STR] for prompt_score in prompt_score_list]
+                    )
+                candidate_prompts = []
+                for seed_prompt in seed_prompts:
+                    candidate_prompts += self.gen_different_styles(
+                        seed_prompt,
+                        params.task_description,
+                        params.mutation_rounds + 1,
+                        params.style_variation,
+                        params.max_concurrency,
+                        params.mutation_json_mode,
+                    )
 
                 if run_without_train_examples:
                     prompt_index = 1
@@ -675,20 +1404,36 @@ class CritiqueNRefine(PromptOptimizer, UniversalBaseClass):
                         )
                         prompt_index += 1
                     return "", ""
-                prompt_score_list = self.get_prompt_score(candidate_prompts, params)
-                prompt_score_list = self.select_top_prompts(
-                    prompt_score_list, params.top_n
-                )
-
-                if params.refine_instruction:
-                    refined_prompts = self.refine_prompts(prompt_score_list, params)
-                    refined_prompt_score_list = self.get_prompt_score(
-                        refined_prompts, params
-                    )
+                if self.search_strategy is None:
+                    candidate_prompts = self.deduplicate_prompts(candidate_prompts, params)
+                    prompt_score_list = self.get_prompt_score(candidate_prompts, params)
                     prompt_score_list = self.select_top_prompts(
-                        refined_prompt_score_list + prompt_score_list, params.top_n
+                        prompt_score_list, params.top_n
                     )
 
+                    if params.refine_instruction:
+                        refined_prompt_score_list = self.refine_and_score_prompts(
+                            prompt_score_list, params
+                        )
+                        prompt_score_list = self.select_top_prompts(
+                            refined_prompt_score_list + prompt_score_list, params.top_n
+                        )
+                else:
+                    # Prompts kept in earlier round compete again. Their answers are in evaluation memo, so they are
+                    # listed first & are the ones kept, when new candidates turn out to be their near duplicates.
+                    prompt_score_list = self.search_prompts(
+                        [prompt_score[self.GetPromptScoreIndex.PROMPT_STR] for prompt_score in prompt_score_list]
+                        + candidate_prompts,
+                        params,
+                    )
+                    if params.refine_instruction:
+                        refined_prompts = self.refine_prompts(prompt_score_list, params)
+                        prompt_score_list = self.search_prompts(
+                            [prompt_score[self.GetPromptScoreIndex.PROMPT_STR] for prompt_score in prompt_score_list]
+                            + refined_prompts,
+                            params,
+                        )
+
                 current_base_instruction = prompt_score_list[0][
                     self.GetPromptScoreIndex.PROMPT_STR
                 ]
@@ -699,31 +1444,37 @@ class CritiqueNRefine(PromptOptimizer, UniversalBaseClass):
                         "score": prompt_score_list[0][self.GetPromptScoreIndex.SCORE],
                     }
                 )
-
-            examples = []
-
-            params.base_instruction = current_base_instruction
-            for example in self.dataset:
-                solve_prompt = self.prompt_pool.solve_template.format(
-                    questions_batch_size=1,
-                    instruction=params.base_instruction,
-                    answer_format=params.answer_format,
-                    questions=example[DatasetSpecificProcessing.QUESTION_LITERAL],
+                checkpoint.update(
+                    completed_rounds=round_num,
+                    current_base_instruction=current_base_instruction,
+                    prompt_score_list=prompt_score_list,
                 )
-                generated_text = self.chat_completion(solve_prompt)
+                self.save_checkpoint(checkpoint)
 
-                examples.extend(self.evaluate(generated_text, [example]))
-                if len(examples) >= params.few_shot_count:
-                    break
+            if "examples" in checkpoint:
+                params.base_instruction = checkpoint["base_instruction"]
+                examples = checkpoint["examples"]
+            else:
+                params.base_instruction = current_base_instruction
+                examples = self.mine_wrong_examples(params)
 
-            if len(examples) < params.few_shot_count:
-                examples = random.sample(
-                    self.dataset, params.few_shot_count - len(examples)
+                if len(examples) < params.few_shot_count:
+                    examples = random.sample(
+                        self.dataset, params.few_shot_count - len(examples)
+                    )
+                checkpoint.update(
+                    base_instruction=params.base_instruction, examples=examples
                 )
+                self.save_checkpoint(checkpoint)
 
             # Refine task description and examples iteratively
             print("\nRefining Task description and Examples iteratively....")
-            for i in tqdm(range(params.refine_task_eg_iterations)):
+            for i in tqdm(
+                range(
+                    checkpoint.get("completed_refine_iterations", 0),
+                    params.refine_task_eg_iterations,
+                )
+            ):
                 refine_task_desc = random.choice([True, False])
                 if refine_task_desc:
                     refined_instruction = self.get_best_instr_by_critique(
@@ -734,6 +1485,12 @@ class CritiqueNRefine(PromptOptimizer, UniversalBaseClass):
                 # comment this to turn off synthetic examples
                 elif use_examples:
                     examples = self.generate_best_examples(examples, params)
+                checkpoint.update(
+                    completed_refine_iterations=i + 1,
+                    base_instruction=params.base_instruction,
+                    examples=examples,
+                )
+                self.save_checkpoint(checkpoint)
         else:
             print("Generating Sythetic Examples....")
             train_examples = self.generate_best_examples_zero_shot(params)
@@ -747,37 +1504,12 @@ class CritiqueNRefine(PromptOptimizer, UniversalBaseClass):
 
         if params.generate_reasoning:
             print("\nGenerating CoT Reasoning for In-Context Examples....")
-            for example in tqdm(examples):
-                reason = self.generate_reasoning(
-                    params.task_description,
-                    params.base_instruction,
-                    example[DatasetSpecificProcessing.QUESTION_LITERAL],
-                    example[DatasetSpecificProcessing.FINAL_ANSWER_LITERAL],
-                )
-
-                example[DatasetSpecificProcessing.ANSWER_WITH_REASON_LITERAL] = (
-                    f"{reason} "
-                    + f"{DatasetSpecificProcessing.ANSWER_START}"
-                    + f"{example[DatasetSpecificProcessing.FINAL_ANSWER_LITERAL]}"
-                    + f"{DatasetSpecificProcessing.ANSWER_END}"
-                )
-        if self.data_processor != None:
-            example_string = self.data_processor.collate_to_str(
-                examples, self.prompt_pool.quest_reason_ans
+            run_coroutine_sync(
+                self.generate_examples_reasoning_async(examples, params, checkpoint)
             )
-        else:
-            example_string = ""
-            for example in examples:
-                answer = example[DatasetSpecificProcessing.FINAL_ANSWER_LITERAL]
-                if DatasetSpecificProcessing.ANSWER_WITH_REASON_LITERAL in example:
-                    answer = example[
-                        DatasetSpecificProcessing.ANSWER_WITH_REASON_LITERAL
-                    ]
-
-                example_string += self.prompt_pool.quest_reason_ans.format(
-                    question=example[DatasetSpecificProcessing.QUESTION_LITERAL],
-                    answer=answer,
-                )
+        if params.few_shot_token_budget is not None:
+            examples = self.pack_examples(examples, params)
+        example_string = self.collate_examples(examples)
 
         if params.few_shot_count == 0:
             final_best_prompt = self.prompt_pool.final_prompt.format(
@@ -806,7 +1538,31 @@ class CritiqueNRefine(PromptOptimizer, UniversalBaseClass):
 
             final_best_prompt += "Keywords: " + intent_keywords
 
-        self.iolog.dump_chained_log_to_file("best_prompt")
+        checkpoint.update(
+            final_best_prompt=final_best_prompt, expert_identity=expert_identity
+        )
+        self.save_checkpoint(checkpoint)
+        self.iolog.flush()
+        LLMMgr.usage_tracker.export(self.iolog.BASE_PATH)
         self.logger.info(f"Final best prompt: {final_best_prompt}")
 
         return final_best_prompt, expert_identity
+
+
+class SuccessiveHalvingCritiqueNRefine(CritiqueNRefine):
+    """
+    Critique & refine, where candidate prompts of every round are chosen by successive halving.
+    """
+
+    TECHNIQUE_NAME = SupportedPromptOpt.SUCCESSIVE_HALVING.value
+    search_strategy = SuccessiveHalvingStrategy()
+
+
+class BeamSearchCritiqueNRefine(CritiqueNRefine):
+    """
+    Critique & refine, where top_n candidate prompts of every round are kept as a beam & all of them are mutated in
+    next round.
+    """
+
+    TECHNIQUE_NAME = SupportedPromptOpt.BEAM_SEARCH.value
+    search_strategy = BeamSearchStrategy()
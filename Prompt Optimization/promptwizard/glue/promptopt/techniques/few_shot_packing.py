@@ -0,0 +1,80 @@
+import re
+from typing import Callable, List, Set
+
+from ...common.constants.str_literals import InstallLibs
+from ...common.llm.providers import import_optional
+
+_WORD_PATTERN = re.compile(r"\w+")
+
+
+def get_token_counter(model_name: str) -> Callable[[str], int]:
+    """
+    :param model_name: Name of model whose tokenizer should be used e.g. gpt-4o
+    :return: Method that returns number of tokens in given text, as counted by tiktoken for `model_name`
+    """
+    encoding_for_model = import_optional("tiktoken", "encoding_for_model", InstallLibs.TIKTOKEN)
+    try:
+        encoding = encoding_for_model(model_name)
+    except KeyError:
+        # Model unknown to installed tiktoken version. Use encoding of current generation of OpenAI models.
+        encoding = import_optional("tiktoken", "get_encoding", InstallLibs.TIKTOKEN)("o200k_base")
+
+    def count_tokens(text: str) -> int:
+        return len(encoding.encode(text, disallowed_special=()))
+
+    return count_tokens
+
+
+def _word_set(text: str) -> Set[str]:
+    return set(_WORD_PATTERN.findall(text.lower()))
+
+
+def _similarity(words_a: Set[str], words_b: Set[str]) -> float:
+    if not words_a or not words_b:
+        return 0.0
+    return len(words_a & words_b) / len(words_a | words_b)
+
+
+def pack_examples(
+    rendered_examples: List[str],
+    token_budget: int,
+    count_tokens: Callable[[str], int],
+    diversity_weight: float = 0.5,
+) -> List[int]:
+    """
+    Choose which few shot examples to keep in prompt, so that their total length is within `token_budget`.
+    Examples are given in order of preference by optimizer (earlier ones are preferred). Examples are picked greedily
+    by maximal marginal relevance: preference rank of example, traded off against its word overlap with examples
+    already picked, so that near duplicates don't use up the budget. Chosen examples keep their original relative
+    order, so that the prompt is identical across calls & its prefix can be served from prompt cache.
+
+    :param rendered_examples: Examples, each formatted as it would appear in prompt
+    :param token_budget: Max number of tokens, all the chosen examples together can have
+    :param count_tokens: Method that returns number of tokens in given text
+    :param diversity_weight: 0 picks examples only by preference rank, 1 only by how different they are from
+                             examples already picked
+    :return: Indices of chosen examples, in ascending order
+    """
+    costs = [count_tokens(example) for example in rendered_examples]
+    word_sets = [_word_set(example) for example in rendered_examples]
+    examples_count = len(rendered_examples)
+
+    chosen = []
+    remaining_budget = token_budget
+    candidates = set(range(examples_count))
+    while candidates:
+        # Budget only shrinks, so examples that don't fit now never will
+        candidates = {index for index in candidates if costs[index] <= remaining_budget}
+        best_index, best_score = None, None
+        for index in sorted(candidates):
+            preference = 1 - index / examples_count
+            redundancy = max((_similarity(word_sets[index], word_sets[j]) for j in chosen), default=0.0)
+            score = (1 - diversity_weight) * preference + diversity_weight * (1 - redundancy)
+            if best_score is None or score > best_score:
+                best_index, best_score = index, score
+        if best_index is None:
+            break
+        chosen.append(best_index)
+        remaining_budget -= costs[best_index]
+        candidates.remove(best_index)
+    return sorted(chosen)
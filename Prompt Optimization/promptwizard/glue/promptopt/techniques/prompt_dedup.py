@@ -0,0 +1,102 @@
+import hashlib
+import math
+import random
+import re
+from typing import Callable, List, Sequence, Set, Tuple
+
+_WORD_PATTERN = re.compile(r"\w+")
+# Mersenne prime, larger than any 32 bit shingle hash, for universal hashing
+_PRIME = (1 << 61) - 1
+
+
+def shingles(text: str, size: int = 3) -> Set[str]:
+    """
+    :param text: Text to be split
+    :param size: Number of consecutive words in a shingle
+    :return: Set of word n-grams of `text`, ignoring case & punctuation. Text shorter than `size` words is a single
+             shingle.
+    """
+    words = _WORD_PATTERN.findall(text.lower())
+    if len(words) <= size:
+        return {" ".join(words)}
+    return {" ".join(words[i: i + size]) for i in range(len(words) - size + 1)}
+
+
+class MinHasher:
+    """
+    Computes MinHash signatures of texts. Fraction of positions at which signatures of two texts agree, estimates
+    Jaccard similarity of their sets of shingles.
+    """
+
+    def __init__(self, num_perm: int = 64, shingle_size: int = 3, seed: int = 0):
+        """
+        :param num_perm: Length of signature. Error of similarity estimate is about 1/sqrt(num_perm).
+        :param shingle_size: Number of consecutive words in a shingle
+        :param seed: Seed for hash functions. Signatures are comparable only when computed with same seed.
+        """
+        self.shingle_size = shingle_size
+        # Private generator, so that random number generator of prompt optimizer isn't consumed
+        rng = random.Random(seed)
+        self.hash_params = [(rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(num_perm)]
+
+    def signature(self, text: str) -> Tuple[int, ...]:
+        """
+        :param text: Text whose signature is needed
+        :return: MinHash signature of `text`
+        """
+        hashes = [
+            int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=4).digest(), "little")
+            for shingle in shingles(text, self.shingle_size)
+        ]
+        return tuple(min((a * h + b) % _PRIME for h in hashes) for a, b in self.hash_params)
+
+    @staticmethod
+    def similarity(signature_a: Sequence[int], signature_b: Sequence[int]) -> float:
+        """
+        :return: Estimated Jaccard similarity of texts, whose signatures are given
+        """
+        return sum(a == b for a, b in zip(signature_a, signature_b)) / len(signature_a)
+
+
+def cosine_similarity(vector_a: Sequence[float], vector_b: Sequence[float]) -> float:
+    norm = math.sqrt(sum(a * a for a in vector_a)) * math.sqrt(sum(b * b for b in vector_b))
+    if not norm:
+        return 0.0
+    return sum(a * b for a, b in zip(vector_a, vector_b)) / norm
+
+
+def deduplicate(
+    texts: List[str],
+    lexical_threshold: float,
+    minhasher: MinHasher = None,
+    embed: Callable[[List[str]], List[List[float]]] = None,
+    embedding_threshold: float = 0.95,
+) -> List[int]:
+    """
+    Collapse near identical texts, keeping the first text of each group. Texts are first compared by estimated
+    Jaccard similarity of their shingles, which needs no LLM call. When `embed` is given, texts that survive are
+    embedded in a single call & also collapsed by cosine similarity of embeddings, catching paraphrases.
+
+    :param texts: Texts in order of preference
+    :param lexical_threshold: Texts whose estimated shingle similarity is at least this are duplicates
+    :param minhasher: Object of MinHasher. A default one is created if not given.
+    :param embed: Method that returns embedding of each of the given texts. None skips embedding check.
+    :param embedding_threshold: Texts whose embeddings have at least this cosine similarity are duplicates
+    :return: Indices of texts that were kept, in ascending order
+    """
+    minhasher = minhasher or MinHasher()
+    signatures = [minhasher.signature(text) for text in texts]
+    kept = []
+    for index, signature in enumerate(signatures):
+        if all(MinHasher.similarity(signature, signatures[j]) < lexical_threshold for j in kept):
+            kept.append(index)
+
+    if embed is None or len(kept) < 2:
+        return kept
+
+    embeddings = embed([texts[index] for index in kept])
+    distinct = []
+    for position, index in enumerate(kept):
+        if all(cosine_similarity(embeddings[position], embeddings[j]) < embedding_threshold for j in distinct):
+            distinct.append(position)
+    return [kept[position] for position in distinct]
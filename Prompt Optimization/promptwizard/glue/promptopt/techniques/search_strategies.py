@@ -0,0 +1,147 @@
+import hashlib
+import math
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .common_logic import ScoredPrompt, SearchStrategy
+
+
+class EvaluationMemo:
+    """
+    Remembers whether a prompt answered a question correctly, so that no prompt is evaluated twice on the same
+    question, across candidates, rounds & search strategies. Prompts & questions are stored as fixed size digests, so
+    memory doesn't grow with length of prompts.
+    """
+
+    def __init__(self):
+        self._correctness: Dict[Tuple[bytes, bytes], bool] = {}
+        # Lookups answered from memo & lookups that needed LLM call
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def digest(text: str) -> bytes:
+        return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+    def get(self, prompt: str, question: str) -> Optional[bool]:
+        """
+        :return: Whether `prompt` answered `question` correctly. None if it hasn't been evaluated on it yet.
+        """
+        is_correct = self._correctness.get((self.digest(prompt), self.digest(question)))
+        if is_correct is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return is_correct
+
+    def set(self, prompt: str, question: str, is_correct: bool) -> None:
+        self._correctness[(self.digest(prompt), self.digest(question))] = is_correct
+
+    def __len__(self) -> int:
+        return len(self._correctness)
+
+    def get_state(self) -> Dict[str, bool]:
+        """
+        :return: Correctness of every evaluated pair, keyed by "<prompt digest>:<question digest>" in hex, so that it
+                 can be saved in checkpoint as json
+        """
+        return {
+            f"{prompt.hex()}:{question.hex()}": is_correct
+            for (prompt, question), is_correct in self._correctness.items()
+        }
+
+    def load_state(self, state: Dict[str, bool]) -> None:
+        """
+        :param state: Dict returned by get_state()
+        """
+        for key, is_correct in state.items():
+            prompt, question = key.split(":")
+            self._correctness[(bytes.fromhex(prompt), bytes.fromhex(question))] = is_correct
+
+
+def _rank(results: List[ScoredPrompt]) -> List[ScoredPrompt]:
+    # Candidates that were evaluated longer survived more eliminations. Ties are broken as in select_top_prompts().
+    return sorted(
+        results,
+        key=lambda result: (len(result.correctness), result.score, len(result.prompt)),
+        reverse=True,
+    )
+
+
+class SuccessiveHalvingStrategy(SearchStrategy):
+    """
+    Evaluate all the candidates on a small number of questions, eliminate the worse half & double the number of
+    questions for the survivors, till one candidate is left or questions run out. Before halving, candidates whose
+    upper confidence bound is below lower confidence bound of the leader are also eliminated, so clearly bad
+    candidates are dropped early when questions are plenty. All candidates are evaluated on the same questions, so
+    they are compared on equal footing.
+    """
+    STRATEGY_NAME = "successive_halving"
+
+    def __init__(self, confidence_delta: float = 0.05):
+        """
+        :param confidence_delta: Probability with which a candidate may be wrongly eliminated by confidence bounds
+        """
+        self.confidence_delta = confidence_delta
+
+    def select(
+        self,
+        candidates: List[str],
+        questions: List,
+        evaluate: Callable[[List[str], List], List[List[bool]]],
+        keep: int,
+        batch_size: int = 1,
+    ) -> List[ScoredPrompt]:
+        results = {prompt: ScoredPrompt(prompt) for prompt in dict.fromkeys(candidates)}
+        survivors = list(results)
+        evaluated = 0
+        while len(survivors) > 1 and evaluated < len(questions):
+            evaluated = min(len(questions), max(batch_size, 2 * evaluated))
+            for prompt, correctness in zip(survivors, evaluate(survivors, questions[:evaluated])):
+                results[prompt].correctness = correctness
+
+            ranked = [result.prompt for result in _rank([results[prompt] for prompt in survivors])]
+            radius = math.sqrt(math.log(2 * len(results) / self.confidence_delta) / (2 * evaluated))
+            leader_lower_bound = results[ranked[0]].score - radius
+            survivors = [
+                prompt
+                for prompt in ranked[: math.ceil(len(ranked) / 2)]
+                if results[prompt].score + radius >= leader_lower_bound
+            ]
+        return _rank(list(results.values()))[:keep]
+
+
+class BeamSearchStrategy(SearchStrategy):
+    """
+    Keep the best `keep` candidates (the beam) & mutate all of them in next round, rather than only the best one.
+    Candidates are evaluated on all the questions, a mini-batch at a time, but a candidate is dropped as soon as it
+    can't make it to the beam even if it answers all its remaining questions correctly. So the beam is the same as
+    with exhaustive evaluation, at a fraction of its cost.
+    """
+    STRATEGY_NAME = "beam_search"
+
+    def select(
+        self,
+        candidates: List[str],
+        questions: List,
+        evaluate: Callable[[List[str], List], List[List[bool]]],
+        keep: int,
+        batch_size: int = 1,
+    ) -> List[ScoredPrompt]:
+        results = {prompt: ScoredPrompt(prompt) for prompt in dict.fromkeys(candidates)}
+        survivors = list(results)
+        evaluated = 0
+        while survivors and evaluated < len(questions):
+            evaluated = min(len(questions), evaluated + batch_size)
+            for prompt, correctness in zip(survivors, evaluate(survivors, questions[:evaluated])):
+                results[prompt].correctness = correctness
+
+            correct_counts = sorted((sum(results[prompt].correctness) for prompt in survivors), reverse=True)
+            beam_threshold = correct_counts[min(keep, len(correct_counts)) - 1]
+            remaining = len(questions) - evaluated
+            survivors = [
+                prompt for prompt in survivors if sum(results[prompt].correctness) + remaining >= beam_threshold
+            ]
+        return _rank(list(results.values()))[:keep]
+
+    def frontier(self, ranked_prompts: List[str]) -> List[str]:
+        return ranked_prompts
@@ -1,11 +1,6 @@
 from ..common.exceptions import GlueValidaionException
 from .constants import PromptOptimizationParams, PromptPool, SupportedPromptOpt
 from .techniques.common_logic import PromptOptimizer
-from .techniques.critique_n_refine.core_logic import CritiqueNRefine
-from .techniques.critique_n_refine.base_classes import (
-    CritiqueNRefineParams,
-    CritiqueNRefinePromptPool,
-)
 
 
 def get_promptopt_class(
@@ -20,7 +15,30 @@ def get_promptopt_class(
     prompt_technique_name = prompt_technique_name.lower()
     print(f"=== Prompt technique name: {prompt_technique_name} ===")
     if prompt_technique_name == SupportedPromptOpt.CRITIQUE_N_REFINE.value:
+        # Module graph of a technique is imported only when that technique is used
+        from .techniques.critique_n_refine.core_logic import CritiqueNRefine
+        from .techniques.critique_n_refine.base_classes import (
+            CritiqueNRefineParams,
+            CritiqueNRefinePromptPool,
+        )
+
         return CritiqueNRefine, CritiqueNRefineParams, CritiqueNRefinePromptPool
+    elif prompt_technique_name == SupportedPromptOpt.SUCCESSIVE_HALVING.value:
+        from .techniques.critique_n_refine.core_logic import SuccessiveHalvingCritiqueNRefine
+        from .techniques.critique_n_refine.base_classes import (
+            CritiqueNRefineParams,
+            CritiqueNRefinePromptPool,
+        )
+
+        return SuccessiveHalvingCritiqueNRefine, CritiqueNRefineParams, CritiqueNRefinePromptPool
+    elif prompt_technique_name == SupportedPromptOpt.BEAM_SEARCH.value:
+        from .techniques.critique_n_refine.core_logic import BeamSearchCritiqueNRefine
+        from .techniques.critique_n_refine.base_classes import (
+            CritiqueNRefineParams,
+            CritiqueNRefinePromptPool,
+        )
+
+        return BeamSearchCritiqueNRefine, CritiqueNRefineParams, CritiqueNRefinePromptPool
     else:
         raise GlueValidaionException(
             f"Value provided for `prompt_technique_name` field in config yaml of "